@@ -0,0 +1,6 @@
+"""
+Shared analysis code for the Helios evaluation figures and tables.
+
+The plot scripts under e2e/, online-speedup/, replay-speedup/, ... import
+from here instead of re-implementing loading, joining and binning.
+"""
@@ -0,0 +1,289 @@
+"""
+Per-block storage accounting of Helios artifacts from an artifact manifest.
+
+    python -m analysis.artifact_growth manifest.csv -o growth.csv
+
+The manifest lists, in block order, everything a block contributes:
+
+    block_number  block the row belongs to
+    kind          block | graph | constants | txplan
+    key           64-bit digest: PathDigest (graph), DataKey (constants),
+                  transaction hash (txplan); ignored for block rows
+    bytes         serialized size (raw block data size for block rows)
+
+CSV manifests may spell kind as text, and .npy manifests are structured
+arrays whose kind field holds the index into KINDS. An artifact costs
+storage only the first time its key appears; later blocks reuse it. Keys
+are deduplicated with DigestSet, an open-addressing table of uint64
+digests probed for a whole chunk at once. It uses about 16 bytes per
+unique key, so memory grows with unique paths and never with block count.
+
+The manifest is consumed in chunks (pandas chunks for CSV, slices of a
+memory-mapped .npy), and cumulative bytes per block are produced as the
+chunks go by. A block split across two chunks is held back until it is
+complete.
+"""
+
+import argparse
+import sys
+
+import numpy as np
+
+KINDS = ['block', 'graph', 'constants', 'txplan']
+BLOCK, GRAPH, CONSTANTS, TXPLAN = range(len(KINDS))
+ARTIFACT_KINDS = [GRAPH, CONSTANTS, TXPLAN]
+MANIFEST_DTYPE = np.dtype([('block_number', '<u8'), ('kind', 'u1'),
+                           ('key', '<u8'), ('bytes', '<u8')])
+MB = 1 << 20
+CHUNK_ROWS = 1 << 20
+
+
+class DigestSet:
+    """Open-addressing set of uint64 digests with vectorized batch insert."""
+
+    def __init__(self, capacity=1 << 16):
+        self.table = np.zeros(capacity, dtype=np.uint64)
+        self.size = 0
+        self.has_zero = False
+
+    def _hash(self, keys):
+        # Fibonacci hashing; digests are already well mixed
+        shift = np.uint64(64 - int(self.table.size).bit_length() + 1)
+        with np.errstate(over='ignore'):
+            return ((keys * np.uint64(0x9E3779B97F4A7C15)) >> shift).astype(np.int64)
+
+    def _grow(self):
+        old = self.table[self.table != 0]
+        self.table = np.zeros(self.table.size * 2, dtype=np.uint64)
+        self.size = 0
+        self._insert_unique(old)
+
+    def _insert_unique(self, keys):
+        """Insert distinct nonzero keys; return a mask of those that were new."""
+        new = np.zeros(keys.size, dtype=bool)
+        pending = np.arange(keys.size)
+        slots = self._hash(keys)
+        mask = self.table.size - 1
+        while pending.size:
+            k, s = keys[pending], slots[pending]
+            current = self.table[s]
+            found = current == k
+            empty = current == 0
+            # Claim empty slots; when several keys race for one, one wins
+            claim = pending[empty]
+            self.table[s[empty]] = k[empty]
+            won = self.table[slots[claim]] == keys[claim]
+            new[claim[won]] = True
+            done = found.copy()
+            done[np.flatnonzero(empty)[won]] = True
+            pending = pending[~done]
+            slots[pending] = (slots[pending] + 1) & mask
+        self.size += int(new.sum())
+        return new
+
+    def add(self, keys):
+        """Insert keys; return a mask marking each key's first-ever occurrence."""
+        keys = np.asarray(keys, dtype=np.uint64)
+        first = np.zeros(keys.size, dtype=bool)
+        uniques, index = np.unique(keys, return_index=True)
+        if uniques.size and uniques[0] == 0:
+            first[index[0]] = not self.has_zero
+            self.has_zero = True
+            uniques, index = uniques[1:], index[1:]
+        while (self.size + uniques.size) * 2 > self.table.size:
+            self._grow()
+        first[index[self._insert_unique(uniques)]] = True
+        return first
+
+    def __len__(self):
+        return self.size + self.has_zero
+
+
+def iter_manifest(path, chunk_rows=CHUNK_ROWS):
+    """Yield manifest chunks as dicts of block_number/kind/key/bytes arrays."""
+    if path.endswith('.npy'):
+        data = np.load(path, mmap_mode='r')
+        for start in range(0, data.shape[0], chunk_rows):
+            chunk = data[start:start + chunk_rows]
+            yield {name: np.asarray(chunk[name]) for name in MANIFEST_DTYPE.names}
+        return
+
+    import pandas as pd
+
+    for df in pd.read_csv(path, chunksize=chunk_rows):
+        kind = df['kind']
+        if not pd.api.types.is_integer_dtype(kind):
+            kind = kind.map({name: i for i, name in enumerate(KINDS)})
+            if kind.isna().any():
+                raise ValueError(f"{path}: unknown artifact kind(s) "
+                                 f"{sorted(set(df['kind'][kind.isna()]))}")
+        yield {
+            'block_number': df['block_number'].to_numpy(dtype=np.uint64),
+            'kind': kind.to_numpy(dtype=np.uint8),
+            'key': df['key'].apply(lambda k: int(k, 16) if isinstance(k, str) else int(k))
+                            .to_numpy(dtype=np.uint64),
+            'bytes': df['bytes'].to_numpy(dtype=np.uint64),
+        }
+
+
+def save_manifest(path, block_number, kind, key, nbytes):
+    """Write a manifest as a structured .npy (the fast, mmap-able format)."""
+    data = np.empty(len(block_number), dtype=MANIFEST_DTYPE)
+    data['block_number'], data['kind'], data['key'], data['bytes'] = \
+        block_number, kind, key, nbytes
+    np.save(path, data)
+
+
+class GrowthAccountant:
+    """Deduplicating, streaming accumulator of storage bytes per block."""
+
+    def __init__(self):
+        self.seen = {kind: DigestSet() for kind in ARTIFACT_KINDS}
+        self.totals = np.zeros(len(KINDS), dtype=np.int64)
+        self.pending = None
+
+    def _new_bytes(self, chunk):
+        """Bytes each row adds to storage (0 for reused artifacts)."""
+        kind = chunk['kind']
+        added = chunk['bytes'].astype(np.int64)
+        for k, seen in self.seen.items():
+            rows = np.flatnonzero(kind == k)
+            added[rows[~seen.add(chunk['key'][rows])]] = 0
+        return added
+
+    def _per_block(self, chunk):
+        """(block numbers, per-kind bytes added) for the blocks in a chunk."""
+        blocks = chunk['block_number']
+        added = self._new_bytes(chunk)
+        starts = np.flatnonzero(np.r_[True, blocks[1:] != blocks[:-1]])
+        group = np.repeat(np.arange(starts.size), np.diff(np.r_[starts, blocks.size]))
+        per_kind = np.zeros((starts.size, len(KINDS)), dtype=np.int64)
+        np.add.at(per_kind, (group, chunk['kind'].astype(np.int64)), added)
+        return blocks[starts].astype(np.int64), per_kind
+
+    def _emit(self, blocks, per_kind):
+        cumulative = np.cumsum(per_kind, axis=0) + self.totals
+        self.totals = cumulative[-1].copy()
+        return growth_rows(blocks, cumulative)
+
+    def update(self, chunk):
+        """Account one chunk; return the rows of every block it completed."""
+        if not len(chunk['block_number']):
+            return None
+        if (np.diff(chunk['block_number'].astype(np.int64)) < 0).any() or \
+                (self.pending is not None and int(chunk['block_number'][0]) < self.pending[0]):
+            raise ValueError('manifest rows must be in block order')
+        blocks, per_kind = self._per_block(chunk)
+        if self.pending is not None:
+            if blocks[0] == self.pending[0]:
+                per_kind[0] += self.pending[1]
+            else:
+                blocks = np.r_[self.pending[0], blocks]
+                per_kind = np.vstack([self.pending[1], per_kind])
+        # The last block may continue in the next chunk
+        self.pending = (blocks[-1], per_kind[-1])
+        if blocks.size == 1:
+            return None
+        return self._emit(blocks[:-1], per_kind[:-1])
+
+    def finish(self):
+        """Rows for the final block, once the manifest is exhausted."""
+        if self.pending is None:
+            return None
+        block, per_kind = self.pending
+        self.pending = None
+        return self._emit(np.array([block]), per_kind[None, :])
+
+
+def growth_rows(blocks, cumulative):
+    """Column dict of cumulative bytes per block and the overhead percentage."""
+    artifacts = cumulative[:, ARTIFACT_KINDS].sum(axis=1)
+    block_bytes = cumulative[:, BLOCK]
+    with np.errstate(divide='ignore', invalid='ignore'):
+        overhead = np.where(block_bytes > 0, artifacts / block_bytes * 100, 0.0)
+    rows = {'block_number': blocks, 'block_bytes': block_bytes}
+    for k in ARTIFACT_KINDS:
+        rows[f'{KINDS[k]}_bytes'] = cumulative[:, k]
+    rows['artifact_bytes'] = artifacts
+    rows['overhead_pct'] = overhead
+    return rows
+
+
+def iter_growth(path, chunk_rows=CHUNK_ROWS):
+    """Stream cumulative growth rows (column dicts) over a whole manifest."""
+    accountant = GrowthAccountant()
+    for chunk in iter_manifest(path, chunk_rows):
+        rows = accountant.update(chunk)
+        if rows is not None:
+            yield rows
+    rows = accountant.finish()
+    if rows is not None:
+        yield rows
+
+
+def sample_growth(path, block_counts, max_points=1000, chunk_rows=CHUNK_ROWS,
+                  include_last=False):
+    """
+    Growth at the given block counts (counted from the first block) plus a
+    curve of at most ~max_points rows, thinned by doubling the stride.
+    With include_last, the manifest's last block is sampled as well, so a
+    manifest shorter than every block count still yields one sample.
+    """
+    targets = np.sort(np.asarray(block_counts, dtype=np.int64))
+    samples, curve, stride, first, final = {}, [], 1, None, None
+    index = last = 0
+    for rows in iter_growth(path, chunk_rows):
+        if first is None:
+            first = int(rows['block_number'][0])
+        offset = rows['block_number'] - first + 1
+        last = int(offset[-1])
+        # Last row at or before each target block count
+        hit = np.searchsorted(offset, targets, side='right') - 1
+        for target, i in zip(targets.tolist(), hit.tolist()):
+            if i >= 0:
+                samples[target] = {name: values[i] for name, values in rows.items()}
+        final = {name: values[-1] for name, values in rows.items()}
+        keep = (index + np.arange(offset.size)) % stride == 0
+        curve.append({name: values[keep] for name, values in rows.items()})
+        index += offset.size
+        if sum(c['block_number'].size for c in curve) > 2 * max_points:
+            merged = {name: np.concatenate([c[name] for c in curve]) for name in rows}
+            while merged['block_number'].size > 2 * max_points:
+                merged = {name: values[::2] for name, values in merged.items()}
+                stride *= 2
+            curve = [merged]
+    # Targets past the end of the manifest were never reached
+    samples = {t: row for t, row in samples.items() if t <= last}
+    if include_last and final is not None:
+        samples.setdefault(last, final)
+    if not curve:
+        return samples, {}
+    return samples, {name: np.concatenate([c[name] for c in curve]) for name in curve[0]}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Cumulative Helios artifact bytes per block')
+    parser.add_argument('manifest', help='.csv or structured .npy artifact manifest')
+    parser.add_argument('-o', '--output', default='-', help='CSV output (default: stdout)')
+    parser.add_argument('--chunk-rows', type=int, default=CHUNK_ROWS)
+    args = parser.parse_args(argv)
+
+    out = sys.stdout if args.output == '-' else open(args.output, 'w')
+    try:
+        header = True
+        for rows in iter_growth(args.manifest, args.chunk_rows):
+            if header:
+                out.write(','.join(rows) + '\n')
+                header = False
+            columns = [rows[name] for name in rows]
+            out.writelines(','.join(f'{v:.4f}' if isinstance(v, float) else str(v)
+                                    for v in values) + '\n'
+                           for values in zip(*(c.tolist() for c in columns)))
+    finally:
+        if out is not sys.stdout:
+            out.close()
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
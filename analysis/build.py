@@ -0,0 +1,270 @@
+"""
+Incremental, parallel build of every generated figure in the paper.
+
+    python -m analysis.build              # rebuild stale figures
+    python -m analysis.build --list       # show figures and their state
+    python -m analysis.build combined -f  # force-rebuild one figure
+
+Each figure declares its script, its input files and its outputs. A figure
+is rebuilt when the SHA-256 over its script and inputs differs from the
+last successful build, or when an output is missing. Stale figures run
+concurrently, one subprocess each, from the script's own directory, so a
+full rebuild costs about as much as the slowest figure. PDFs that the
+LaTeX sources include from raw-figures/ are copied there afterwards.
+
+With --trace every script also writes a phase trace (see analysis.phases)
+and the slowest phases across the figures are listed at the end; use -j 1
+for timings that are not skewed by figures competing for cores.
+"""
+
+import argparse
+import glob
+import hashlib
+import json
+import os
+import shutil
+import subprocess
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from analysis.cache import CACHE_DIR, file_digest
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+RAW_FIGURES_DIR = os.path.join(REPO_DIR, 'raw-figures')
+STATE_PATH = os.path.join(CACHE_DIR, 'build-state.json')
+LOG_DIR = os.path.join(CACHE_DIR, 'build-logs')
+TRACE_DIR = os.path.join(CACHE_DIR, 'traces')
+
+E2E_CSVS = ['e2e/block_stats_seq.csv', 'e2e/block_stats_deter.csv',
+            'e2e/block_stats_optim.csv', 'e2e/block_stats_optim_partial.csv']
+SPEEDUP_MODULES = ['analysis/__init__.py', 'analysis/cache.py', 'analysis/phases.py',
+                   'analysis/speedup.py', 'analysis/streaming.py']
+STATS_MODULES = SPEEDUP_MODULES + ['analysis/results.py', 'analysis/stats.py']
+# Online runs at extra frequency thresholds, when present
+ONLINE_SWEEP_CSVS = sorted(os.path.relpath(path, REPO_DIR) for path in
+                           glob.glob(os.path.join(REPO_DIR, 'e2e', 'block_stats_optim_f*.csv')))
+MICROBENCH_INPUTS = STATS_MODULES + ['analysis/microbench.py',
+                                     'micro-benchmark/micro_benchmark.xlsx']
+
+
+class Figure:
+    """One plot script with its inputs, outputs and raw-figures/ copies."""
+
+    def __init__(self, name, script, inputs=(), outputs=(), raw=()):
+        self.name = name
+        self.script = script
+        self.inputs = list(inputs)
+        self.outputs = list(outputs)
+        self.raw = list(raw)
+
+    @property
+    def cwd(self):
+        return os.path.join(REPO_DIR, os.path.dirname(self.script))
+
+    def digest(self):
+        h = hashlib.sha256()
+        for rel in [self.script] + sorted(self.inputs):
+            h.update(rel.encode('utf-8') + b'\0')
+            h.update(file_digest(os.path.join(REPO_DIR, rel)).encode('ascii'))
+        return h.hexdigest()
+
+    def outputs_exist(self):
+        return all(os.path.exists(os.path.join(REPO_DIR, out)) for out in self.outputs)
+
+
+FIGURES = [
+    Figure('e2e-histograms', 'e2e/generate_speedup_charts.py',
+           inputs=E2E_CSVS + STATS_MODULES,
+           outputs=['e2e/deter_speedup_distribution.png',
+                    'e2e/optim_speedup_distribution.png',
+                    'e2e/optim_partial_speedup_distribution.png']),
+    Figure('combined', 'e2e/plot_combined_speedup.py',
+           inputs=E2E_CSVS + STATS_MODULES + ['analysis/bootstrap.py'],
+           outputs=['e2e/combined_speedup_distribution.pdf',
+                    'e2e/combined_speedup_distribution.png'],
+           raw=['e2e/combined_speedup_distribution.pdf']),
+    Figure('rolling', 'e2e/plot_rolling_speedup.py',
+           inputs=E2E_CSVS + SPEEDUP_MODULES + ['analysis/results.py', 'analysis/rolling.py'],
+           outputs=['e2e/rolling_speedup.pdf', 'e2e/rolling_speedup.png']),
+    Figure('cumulative-time', 'e2e/plot_cumulative_time.py',
+           inputs=E2E_CSVS + SPEEDUP_MODULES + ['analysis/results.py', 'analysis/throughput.py'],
+           outputs=['e2e/cumulative_time.pdf', 'e2e/cumulative_time.png']),
+    Figure('online', 'online-speedup/plot_online_speedup.py',
+           inputs=E2E_CSVS[:1] + ['e2e/block_stats_optim.csv'] + STATS_MODULES,
+           outputs=['online-speedup/online_speedup_distribution.pdf',
+                    'online-speedup/online_speedup_distribution.png'],
+           raw=['online-speedup/online_speedup_distribution.pdf']),
+    Figure('online-filtered', 'online-speedup/plot_online_filtered_speedup.py',
+           inputs=E2E_CSVS[:1] + ['e2e/block_stats_optim_partial.csv'] + STATS_MODULES,
+           outputs=['online-speedup/online_filtered_speedup_distribution.pdf',
+                    'online-speedup/online_filtered_speedup_distribution.png'],
+           raw=['online-speedup/online_filtered_speedup_distribution.pdf']),
+    Figure('threshold-sweep', 'online-speedup/plot_threshold_sweep.py',
+           inputs=E2E_CSVS + ONLINE_SWEEP_CSVS + SPEEDUP_MODULES +
+           ['analysis/results.py', 'analysis/online_sweep.py',
+            'table/storage-coverage-tradeoff.tex'],
+           outputs=['online-speedup/threshold_sweep.pdf',
+                    'online-speedup/threshold_sweep.png']),
+    Figure('replay', 'replay-speedup/plot_replay_speedup.py',
+           inputs=E2E_CSVS[:2] + STATS_MODULES,
+           outputs=['replay-speedup/replay_speedup_distribution.pdf',
+                    'replay-speedup/replay_speedup_distribution.png'],
+           raw=['replay-speedup/replay_speedup_distribution.pdf']),
+    Figure('microbench', 'micro-benchmark/plot_speedup.py',
+           inputs=MICROBENCH_INPUTS,
+           outputs=['micro-benchmark/microbench_execution.pdf',
+                    'micro-benchmark/microbench_execution.png'],
+           raw=['micro-benchmark/microbench_execution.pdf']),
+    Figure('node-count', 'node-count/plot_node_distribution.py',
+           inputs=STATS_MODULES,
+           outputs=['node-count/node_distribution.pdf',
+                    'node-count/node_distribution.png']),
+    Figure('overhead-breakdown', 'overhead-breakdown/plot.py',
+           inputs=STATS_MODULES + ['analysis/overhead.py'],
+           outputs=['overhead-breakdown/overhead-breakdown.pdf',
+                    'overhead-breakdown/overhead-breakdown.png'],
+           raw=['overhead-breakdown/overhead-breakdown.pdf']),
+    Figure('parallel-instruction', 'parallel-instruction/plot.py',
+           inputs=MICROBENCH_INPUTS,
+           outputs=['parallel-instruction/parallel_slowdown_corrected.pdf',
+                    'parallel-instruction/parallel_slowdown_corrected.png']),
+    Figure('pareto-cumulative', 'pareto-cumulative/plot.py',
+           inputs=['pareto-cumulative/replay.xlsx'] + STATS_MODULES,
+           outputs=['pareto-cumulative/pareto_cumulative.pdf',
+                    'pareto-cumulative/pareto_cumulative.png'],
+           raw=['pareto-cumulative/pareto_cumulative.pdf']),
+    Figure('storage-growth', 'storage-overhead/plot.py',
+           inputs=STATS_MODULES,
+           outputs=['storage-overhead/storage_growth.pdf',
+                    'storage-overhead/storage_growth.png'],
+           raw=['storage-overhead/storage_growth.pdf']),
+    Figure('microbench-tables', 'table/generate_microbench_tables.py',
+           inputs=MICROBENCH_INPUTS,
+           outputs=['table/geth-vs-revm.tex', 'table/optimization-overhead.tex',
+                    'table/opcode-reduction.tex']),
+    Figure('overhead-table', 'table/generate_overhead_table.py',
+           inputs=STATS_MODULES + ['analysis/overhead.py'],
+           outputs=['table/overhead-breakdown.tex']),
+]
+
+
+def load_state():
+    try:
+        with open(STATE_PATH) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def save_state(state):
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    tmp = f'{STATE_PATH}.{os.getpid()}.tmp'
+    with open(tmp, 'w') as f:
+        json.dump(state, f, indent=2, sort_keys=True)
+    os.replace(tmp, STATE_PATH)
+
+
+def run_figure(figure, trace_env=None):
+    """Run one plot script headless; return (figure, ok, seconds, log_path)."""
+    os.makedirs(LOG_DIR, exist_ok=True)
+    log_path = os.path.join(LOG_DIR, f'{figure.name}.log')
+    env = dict(os.environ, MPLBACKEND='Agg', **(trace_env or {}))
+    start = time.perf_counter()
+    with open(log_path, 'w') as log:
+        proc = subprocess.run([sys.executable, os.path.basename(figure.script)],
+                              cwd=figure.cwd, env=env, stdout=log,
+                              stderr=subprocess.STDOUT)
+    elapsed = time.perf_counter() - start
+    ok = proc.returncode == 0 and figure.outputs_exist()
+    return figure, ok, elapsed, log_path
+
+
+def copy_raw(figure):
+    """Copy the figure's PDFs into raw-figures/ when they differ."""
+    for rel in figure.raw:
+        src = os.path.join(REPO_DIR, rel)
+        dst = os.path.join(RAW_FIGURES_DIR, os.path.basename(rel))
+        if os.path.exists(dst) and file_digest(dst) == file_digest(src):
+            continue
+        shutil.copy2(src, dst)
+        print(f"  copied {rel} -> raw-figures/")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('figures', nargs='*',
+                        help='figure names to build (default: all)')
+    parser.add_argument('-f', '--force', action='store_true',
+                        help='rebuild even if up to date')
+    parser.add_argument('-j', '--jobs', type=int, default=os.cpu_count(),
+                        help='parallel figure builds (default: all cores)')
+    parser.add_argument('--list', action='store_true',
+                        help='list figures and whether they are stale')
+    parser.add_argument('-n', '--dry-run', action='store_true',
+                        help='show what would be rebuilt')
+    parser.add_argument('--trace', nargs='?', const=TRACE_DIR, metavar='DIR',
+                        help='write per-phase timing traces (default dir: .analysis-cache/traces)')
+    parser.add_argument('--profile', action='store_true',
+                        help='with --trace, also dump a cProfile per top-level phase')
+    args = parser.parse_args(argv)
+
+    by_name = {fig.name: fig for fig in FIGURES}
+    unknown = [name for name in args.figures if name not in by_name]
+    if unknown:
+        parser.error(f"unknown figure(s): {', '.join(unknown)}; "
+                     f"choose from {', '.join(by_name)}")
+    selected = [by_name[name] for name in args.figures] or FIGURES
+
+    state = load_state()
+    digests = {fig.name: fig.digest() for fig in selected}
+    stale = [fig for fig in selected
+             if args.force or state.get(fig.name) != digests[fig.name]
+             or not fig.outputs_exist()]
+
+    if args.list or args.dry_run:
+        for fig in selected:
+            print(f"{fig.name:<22} {'stale' if fig in stale else 'up to date':<11} {fig.script}")
+        return 0
+
+    trace_env = None
+    if args.trace:
+        from analysis.phases import PROFILE_ENV, TRACE_ENV
+        trace_env = {TRACE_ENV: os.path.abspath(args.trace),
+                     PROFILE_ENV: '1' if args.profile else '0'}
+
+    failed = []
+    if stale:
+        print(f"Building {len(stale)} of {len(selected)} figures "
+              f"with {min(args.jobs, len(stale))} workers")
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=max(1, args.jobs)) as pool:
+            runs = pool.map(lambda fig: run_figure(fig, trace_env), stale)
+            for fig, ok, elapsed, log_path in runs:
+                if ok:
+                    state[fig.name] = digests[fig.name]
+                    print(f"  {fig.name:<22} {elapsed:6.2f}s")
+                else:
+                    state.pop(fig.name, None)
+                    failed.append(fig)
+                    print(f"  {fig.name:<22} FAILED (see {os.path.relpath(log_path, REPO_DIR)})")
+        save_state(state)
+        print(f"Done in {time.perf_counter() - start:.2f}s")
+        if trace_env:
+            from analysis.phases import format_report, load_traces, rank_phases
+            traces = [t for t in load_traces(args.trace) if t['started'] >= time.time() -
+                      (time.perf_counter() - start)]
+            if traces:
+                print()
+                print(format_report(traces, rank_phases(traces, top=10)))
+    else:
+        print("All figures up to date")
+
+    for fig in selected:
+        if fig not in failed and fig.outputs_exist():
+            copy_raw(fig)
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,329 @@
+"""
+On-disk columnar cache for the CSV and Excel inputs of the figures.
+
+Each source is parsed once into .npy columns (block numbers as uint32,
+timings as float64) that later runs open with mmap_mode='r', so the
+numbers are read zero-copy instead of re-parsing text. Workbook sheets are
+cached one sheet at a time, so a figure only ever decodes the sheets it
+asks for: numeric sheet columns are .npy files like the CSV columns, text
+columns a JSON list, and a workbook's sheet names are cached too.
+
+An entry is reused while the source's size and mtime are unchanged; if
+they differ, the source is re-hashed (SHA-256) and the entry is rebuilt
+only when the content actually changed. Set HELIOS_CACHE_DIR to move the
+cache, or HELIOS_NO_CACHE=1 to bypass it.
+"""
+
+import datetime
+import hashlib
+import json
+import os
+
+import numpy as np
+
+from analysis.phases import add_rows, phase
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+CACHE_DIR = os.environ.get('HELIOS_CACHE_DIR',
+                           os.path.join(REPO_DIR, '.analysis-cache'))
+
+# Bump when the on-disk layout or a parser changes
+CACHE_VERSION = 4
+
+UINT32_MAX = np.iinfo(np.uint32).max
+
+
+def cache_disabled():
+    return os.environ.get('HELIOS_NO_CACHE', '') not in ('', '0')
+
+
+def file_digest(path, chunk_size=1 << 20):
+    """SHA-256 of a file's contents."""
+    h = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def _entry_dir(source, entry):
+    key = f'{os.path.abspath(source)}\0{entry}'.encode('utf-8')
+    name = os.path.basename(source) + '-' + hashlib.sha1(key).hexdigest()[:16]
+    return os.path.join(CACHE_DIR, name)
+
+
+def _read_meta(entry_dir):
+    try:
+        with open(os.path.join(entry_dir, 'meta.json')) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def _write_meta(entry_dir, meta):
+    tmp = os.path.join(entry_dir, f'meta.json.{os.getpid()}.tmp')
+    with open(tmp, 'w') as f:
+        json.dump(meta, f)
+    os.replace(tmp, os.path.join(entry_dir, 'meta.json'))
+
+
+def _lookup(source, entry_dir):
+    """
+    Return (meta, digest) for source. meta is the cached entry if it is
+    still valid, otherwise None; digest is the source hash when it had to
+    be computed.
+    """
+    st = os.stat(source)
+    meta = _read_meta(entry_dir)
+    if meta is None or meta.get('version') != CACHE_VERSION:
+        return None, None
+    if meta['size'] == st.st_size and meta['mtime_ns'] == st.st_mtime_ns:
+        return meta, meta['sha256']
+    digest = file_digest(source)
+    if digest != meta['sha256']:
+        return None, digest
+    # Touched but unchanged: refresh the fast-path stamp
+    meta.update(size=st.st_size, mtime_ns=st.st_mtime_ns)
+    _write_meta(entry_dir, meta)
+    return meta, digest
+
+
+def _store(source, entry_dir, digest, files, extra):
+    st = os.stat(source)
+    meta = {
+        'version': CACHE_VERSION,
+        'source': os.path.abspath(source),
+        'size': st.st_size,
+        'mtime_ns': st.st_mtime_ns,
+        'sha256': digest,
+        'files': files,
+    }
+    meta.update(extra)
+    _write_meta(entry_dir, meta)
+    # Drop data files left behind by earlier versions of the source
+    for name in os.listdir(entry_dir):
+        if name != 'meta.json' and not name.startswith(digest[:16]) \
+                and not name.endswith('.tmp'):
+            try:
+                os.remove(os.path.join(entry_dir, name))
+            except OSError:
+                pass
+
+
+def _save_file(entry_dir, name, writer):
+    tmp = os.path.join(entry_dir, f'{name}.{os.getpid()}.tmp')
+    with open(tmp, 'wb') as f:
+        writer(f)
+    os.replace(tmp, os.path.join(entry_dir, name))
+
+
+def cached_columns(source, entry, build):
+    """
+    Return a dict of NumPy columns for source, memory-mapped from the cache.
+
+    build(source) is called on a cache miss and must return a dict of
+    name -> ndarray; its result is persisted as one .npy file per column.
+    """
+    with phase(f'load {os.path.basename(source)}'):
+        columns = _cached_columns(source, entry, build)
+        add_rows(len(next(iter(columns.values()), ())))
+    return columns
+
+
+def _parse(source, build):
+    with phase(f'parse {os.path.basename(source)}'):
+        return build(source)
+
+
+def _cached_columns(source, entry, build):
+    if cache_disabled():
+        return _parse(source, build)
+
+    entry_dir = _entry_dir(source, entry)
+    meta, digest = _lookup(source, entry_dir)
+    if meta is not None:
+        try:
+            return {col: np.load(os.path.join(entry_dir, name), mmap_mode='r')
+                    for col, name in meta['files'].items()}
+        except (OSError, ValueError):
+            pass
+
+    columns = _parse(source, build)
+    digest = digest or file_digest(source)
+    os.makedirs(entry_dir, exist_ok=True)
+    files = {}
+    for col, values in columns.items():
+        name = f'{digest[:16]}.{col}.npy'
+        _save_file(entry_dir, name, lambda f, v=values: np.save(f, np.ascontiguousarray(v)))
+        files[col] = name
+    _store(source, entry_dir, digest, files, {})
+    return columns
+
+
+def _parse_block_stats(path):
+    import pandas as pd
+
+    df = pd.read_csv(path, dtype={'block_number': np.int64,
+                                  'elapsed_time_ms': np.float64})
+    blocks = df['block_number'].to_numpy()
+    columns = {'elapsed_time_ms': df['elapsed_time_ms'].to_numpy()}
+    if 'gas_used' in df.columns:
+        columns['gas_used'] = df['gas_used'].to_numpy(dtype=np.float64)
+    if blocks.size > 1 and not (np.diff(blocks) > 0).all():
+        blocks, first = np.unique(blocks, return_index=True)
+        columns = {name: values[first] for name, values in columns.items()}
+    if blocks.size and 0 <= blocks[0] and blocks[-1] <= UINT32_MAX:
+        blocks = blocks.astype(np.uint32)
+    return {'block_number': blocks, **columns}
+
+
+def block_stats_columns(path):
+    """
+    Columns of a block_stats CSV, sorted and de-duplicated by block_number.
+    Block numbers are stored as uint32, timings as float64; a gas_used
+    column, when the file has one, is kept as float64.
+    """
+    return cached_columns(path, 'block_stats', _parse_block_stats)
+
+
+def _parse_block_info(path):
+    import pandas as pd
+
+    df = pd.read_csv(path)
+    if 'block_number' not in df.columns:
+        raise ValueError(f"{path} has no block_number column")
+    df = df.drop_duplicates('block_number').sort_values('block_number', kind='stable')
+    columns = {'block_number': df['block_number'].to_numpy(dtype=np.int64)}
+    for name in df.columns.drop('block_number'):
+        if pd.api.types.is_numeric_dtype(df[name]):
+            columns[name] = df[name].to_numpy(dtype=np.float64)
+    return columns
+
+
+def block_info_columns(path):
+    """
+    Numeric per-block attribute columns of a CSV keyed by block_number
+    (tx_count, gas_used, cache_misses, ...), sorted and de-duplicated like
+    block_stats_columns. Attributes are stored as float64 so missing
+    values survive as NaN.
+    """
+    return cached_columns(path, 'block_info', _parse_block_info)
+
+
+def read_sheet(path, sheet_name):
+    """
+    pd.read_excel(path, sheet_name=sheet_name), decoding and caching only
+    the requested sheet.
+    """
+    with phase(f'load {os.path.basename(path)}:{sheet_name}'):
+        df = _read_sheet(path, sheet_name)
+        add_rows(len(df))
+    return df
+
+
+# Column label types a cached sheet can restore, besides pandas Timestamps:
+# (tag, type, decoder from str), bool before int since it subclasses int
+_LABEL_TYPES = [('str', str, str), ('bool', bool, lambda s: s == 'True'),
+                ('int', int, int), ('float', float, float),
+                ('datetime', datetime.datetime, datetime.datetime.fromisoformat),
+                ('date', datetime.date, datetime.date.fromisoformat),
+                ('time', datetime.time, datetime.time.fromisoformat)]
+
+
+def _label_tag(name):
+    """Type tag of a column label (None if it cannot be cached)."""
+    import pandas as pd
+
+    if isinstance(name, pd.Timestamp):
+        return 'timestamp'
+    if isinstance(name, np.integer):
+        return 'int'
+    return next((tag for tag, kind, _ in _LABEL_TYPES if isinstance(name, kind)), None)
+
+
+def _decode_label(label, tag):
+    import pandas as pd
+
+    if tag == 'timestamp':
+        return pd.Timestamp(label)
+    return next(decode for t, _, decode in _LABEL_TYPES if t == tag)(label)
+
+
+def _save_frame(entry_dir, digest, df):
+    """
+    One file per column: .npy for numeric/datetime columns, JSON otherwise.
+    Labels are stored as text plus a _LABEL_TYPES tag (Excel turns date
+    headers into Timestamps, which JSON cannot hold).
+    """
+    columns = []
+    for i, name in enumerate(df.columns):
+        series = df.iloc[:, i]
+        if series.dtype.kind in 'biufM':
+            file = f'{digest[:16]}.c{i}.npy'
+            _save_file(entry_dir, file, lambda f, v=series.to_numpy(): np.save(f, v))
+        else:
+            file = f'{digest[:16]}.c{i}.json'
+            values = json.dumps(series.tolist(), default=str).encode('utf-8')
+            _save_file(entry_dir, file, lambda f, v=values: f.write(v))
+        columns.append([str(name), _label_tag(name), str(series.dtype), file])
+    return columns
+
+
+def _load_frame(entry_dir, columns):
+    import pandas as pd
+
+    data = {}
+    for i, (_, _, dtype, file) in enumerate(columns):
+        path = os.path.join(entry_dir, file)
+        if file.endswith('.npy'):
+            data[i] = np.load(path, mmap_mode='r')
+        else:
+            with open(path, encoding='utf-8') as f:
+                data[i] = pd.Series(json.load(f), dtype=dtype)
+    df = pd.DataFrame(data)
+    df.columns = [_decode_label(label, tag) for label, tag, _, _ in columns]
+    return df
+
+
+def _read_sheet(path, sheet_name):
+    import pandas as pd
+
+    if cache_disabled():
+        with phase(f'parse {os.path.basename(path)}:{sheet_name}'):
+            return pd.read_excel(path, sheet_name=sheet_name)
+
+    entry_dir = _entry_dir(path, f'sheet:{sheet_name}')
+    meta, digest = _lookup(path, entry_dir)
+    if meta is not None:
+        try:
+            return _load_frame(entry_dir, meta['columns'])
+        except (OSError, ValueError, KeyError, TypeError):
+            pass
+
+    with phase(f'parse {os.path.basename(path)}:{sheet_name}'):
+        df = pd.read_excel(path, sheet_name=sheet_name)
+    if any(_label_tag(name) is None for name in df.columns):
+        return df
+    digest = digest or file_digest(path)
+    os.makedirs(entry_dir, exist_ok=True)
+    columns = _save_frame(entry_dir, digest, df)
+    _store(path, entry_dir, digest, {f'c{i}': c[3] for i, c in enumerate(columns)},
+           {'sheet': sheet_name, 'columns': columns})
+    return df
+
+
+def sheet_names(path):
+    """pd.ExcelFile(path).sheet_names, cached like the sheets themselves."""
+    import pandas as pd
+
+    if cache_disabled():
+        return pd.ExcelFile(path).sheet_names
+    entry_dir = _entry_dir(path, 'sheet-names')
+    meta, digest = _lookup(path, entry_dir)
+    if meta is not None and 'sheets' in meta:
+        return meta['sheets']
+    with phase(f'parse {os.path.basename(path)}:sheet-names'):
+        names = pd.ExcelFile(path).sheet_names
+    os.makedirs(entry_dir, exist_ok=True)
+    _store(path, entry_dir, digest or file_digest(path), {}, {'sheets': names})
+    return names
@@ -0,0 +1,322 @@
+"""
+Critical path length ratio (CPLR) and intra-path parallelism of SsaGraphs.
+
+    python -m analysis.cplr ssa_cache.bin -j 8 [-o per_graph.csv] [--profile DIGEST]
+
+Reads the record stream of analysis.ssa_dump and decodes each payload as a
+DAG in CSR form (little-endian):
+
+    u32  edge_count
+    u32  indptr[node_count + 1]   data inputs of node i are
+    u32  preds[edge_count]        preds[indptr[i]:indptr[i + 1]]
+    u8   opcodes[node_count]
+    ...  constant table (ignored)
+
+Every node sits on the ASAP level 1 + max(level of its inputs). Its sources
+are on level 0. The critical path is the number of levels, CPLR is
+critical path / nodes, and 1 / CPLR (nodes / critical path) is the
+parallelism available to an unbounded number of threads. The width
+profile counts the nodes on each level.
+
+Leveling is a vectorized Kahn wavefront. Each step releases all nodes
+whose inputs are done, through successor CSR arrays and one np.unique
+over the released edges. To amortize the Python-level loop over levels,
+graphs are leveled in batches as one disjoint-union DAG, and per-graph
+results come from segmented reductions. The dump is cut into byte ranges
+exactly as in analysis.ssa_dump and scanned by a process pool.
+"""
+
+import argparse
+import json
+import mmap
+import os
+import struct
+import sys
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from analysis.ssa_dump import (HEADER, MAGIC, NODE_COUNT_EDGES, PERCENTILES,
+                               byte_ranges, iter_records)
+from analysis.stats import NODE_COUNT_RANGES
+
+EDGE_COUNT = struct.Struct('<I')
+BATCH_NODES = 1 << 20
+PARALLELISM_BINS = [1, 2, 4, 8, 16, 32, 64, float('inf')]
+PARALLELISM_LABELS = ['1-2', '2-4', '4-8', '8-16', '16-32', '32-64', '≥64']
+RESULT_FIELDS = ['path_digest', 'nodes', 'edges', 'critical_path', 'max_width']
+
+
+def encode_graph(indptr, preds, opcodes=None, constants=b''):
+    """Payload bytes of a graph given its input CSR (and opcodes)."""
+    indptr = np.asarray(indptr, dtype='<u4')
+    preds = np.asarray(preds, dtype='<u4')
+    n = indptr.size - 1
+    if opcodes is None:
+        opcodes = np.zeros(n, dtype=np.uint8)
+    return b''.join([EDGE_COUNT.pack(preds.size), indptr.tobytes(), preds.tobytes(),
+                     np.asarray(opcodes, dtype=np.uint8).tobytes(), constants])
+
+
+def decode_graph(buf, offset, node_count, payload_len):
+    """(indptr, preds, opcodes) views of one payload starting at offset."""
+    (edge_count,) = EDGE_COUNT.unpack_from(buf, offset)
+    needed = EDGE_COUNT.size + 4 * (node_count + 1 + edge_count) + node_count
+    if needed > payload_len:
+        raise ValueError(f"graph payload at offset {offset} is {payload_len} bytes, "
+                         f"needs {needed}")
+    pos = offset + EDGE_COUNT.size
+    indptr = np.frombuffer(buf, dtype='<u4', count=node_count + 1, offset=pos)
+    pos += 4 * (node_count + 1)
+    preds = np.frombuffer(buf, dtype='<u4', count=edge_count, offset=pos)
+    pos += 4 * edge_count
+    opcodes = np.frombuffer(buf, dtype=np.uint8, count=node_count, offset=pos)
+    return indptr, preds, opcodes
+
+
+def _read_graph(mm, pos, node_count, payload_len):
+    """(indptr, preds) of the record at pos, copied out so the map can close."""
+    indptr, preds, _ = decode_graph(mm, pos + HEADER.size, node_count, payload_len)
+    return indptr.copy(), preds.copy()
+
+
+def write_graph_dump(path, graphs):
+    """Write (path_digest, indptr, preds[, opcodes]) graphs as a dump."""
+    with open(path, 'wb') as f:
+        for digest, indptr, preds, *rest in graphs:
+            payload = encode_graph(indptr, preds, *rest)
+            f.write(HEADER.pack(MAGIC, len(indptr) - 1, len(payload),
+                                int(digest) & (2**64 - 1)))
+            f.write(payload)
+
+
+def asap_levels(n, indptr, preds):
+    """ASAP level of every node of a DAG given by its input CSR."""
+    indptr = np.asarray(indptr, dtype=np.int64)
+    preds = np.asarray(preds, dtype=np.int64)
+    indeg = np.diff(indptr)
+    if preds.size and (preds.min() < 0 or preds.max() >= n):
+        raise ValueError('edge points outside its graph')
+    # Successor CSR: edges grouped by their input node
+    consumers = np.repeat(np.arange(n), indeg)
+    order = np.argsort(preds, kind='stable')
+    succ = consumers[order]
+    succ_ptr = np.zeros(n + 1, dtype=np.int64)
+    np.cumsum(np.bincount(preds, minlength=n), out=succ_ptr[1:])
+
+    remaining = indeg.copy()
+    level = np.full(n, -1, dtype=np.int64)
+    frontier = np.flatnonzero(remaining == 0)
+    depth = 0
+    while frontier.size:
+        level[frontier] = depth
+        starts = succ_ptr[frontier]
+        counts = succ_ptr[frontier + 1] - starts
+        total = int(counts.sum())
+        if not total:
+            break
+        # Concatenated edge ranges of the whole frontier
+        run_start = np.repeat(starts - (np.cumsum(counts) - counts), counts)
+        released, hits = np.unique(succ[run_start + np.arange(total)], return_counts=True)
+        remaining[released] -= hits
+        frontier = released[remaining[released] == 0]
+        depth += 1
+    if (level < 0).any():
+        raise ValueError('graph has a cycle')
+    return level
+
+
+def level_graphs(node_counts, indptrs, predss):
+    """
+    Critical path and maximum level width of many graphs, leveled together
+    as one disjoint-union DAG.
+    """
+    node_counts = np.asarray(node_counts, dtype=np.int64)
+    node_base = np.r_[0, np.cumsum(node_counts)[:-1]]
+    edge_counts = np.array([p.size for p in predss], dtype=np.int64)
+    n = int(node_counts.sum())
+    indptr = np.zeros(n + 1, dtype=np.int64)
+    if n:
+        indptr[1:] = np.concatenate([np.diff(np.asarray(p, dtype=np.int64)) for p in indptrs])
+        np.cumsum(indptr, out=indptr)
+    preds = (np.concatenate([np.asarray(p, dtype=np.int64) for p in predss])
+             + np.repeat(node_base, edge_counts)) if edge_counts.sum() else \
+        np.empty(0, dtype=np.int64)
+    # Inputs must stay inside their own graph
+    graph_of_edge = np.repeat(np.arange(node_counts.size), edge_counts)
+    if preds.size and ((preds < node_base[graph_of_edge]) |
+                       (preds >= node_base[graph_of_edge] + node_counts[graph_of_edge])).any():
+        raise ValueError('edge points outside its graph')
+
+    level = asap_levels(n, indptr, preds)
+    critical = np.zeros(node_counts.size, dtype=np.int64)
+    max_width = np.zeros(node_counts.size, dtype=np.int64)
+    nonempty = node_counts > 0
+    if not nonempty.any():
+        return critical, max_width
+    critical[nonempty] = np.maximum.reduceat(level, node_base[nonempty]) + 1
+    # Width of every (graph, level): offset levels so graphs never share one
+    level_base = np.r_[0, np.cumsum(critical)[:-1]]
+    widths = np.bincount(level + np.repeat(level_base, node_counts),
+                         minlength=int(critical.sum()))
+    max_width[nonempty] = np.maximum.reduceat(widths, level_base[nonempty])
+    return critical, max_width
+
+
+def width_profile(indptr, preds):
+    """Number of nodes on each ASAP level of one graph."""
+    n = len(indptr) - 1
+    return np.bincount(asap_levels(n, indptr, preds), minlength=1 if n else 0)
+
+
+def _results(columns):
+    return {name: np.asarray(values, dtype=np.uint64 if name == 'path_digest' else np.int64)
+            for name, values in zip(RESULT_FIELDS, columns)}
+
+
+def scan_range(path, start, end, batch_nodes=BATCH_NODES):
+    """Per-graph results (column dict) for records whose header starts in [start, end)."""
+    out = [[] for _ in RESULT_FIELDS]
+    batch = ([], [], [], [])
+
+    def flush():
+        digests, counts, indptrs, predss = batch
+        if digests:
+            critical, max_width = level_graphs(counts, indptrs, predss)
+            for column, values in zip(out, [digests, counts, [p.size for p in predss],
+                                            critical.tolist(), max_width.tolist()]):
+                column.extend(values)
+            for part in batch:
+                part.clear()
+
+    with open(path, 'rb') as f:
+        size = os.fstat(f.fileno()).st_size
+        if size:
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                pending = 0
+                for pos, node_count, payload_len, digest in iter_records(mm, start, end, size):
+                    indptr, preds = _read_graph(mm, pos, node_count, payload_len)
+                    for part, value in zip(batch, (digest, node_count, indptr, preds)):
+                        part.append(value)
+                    pending += node_count
+                    if pending >= batch_nodes:
+                        flush()
+                        pending = 0
+                flush()
+    return _results(out)
+
+
+def scan_graphs(path, workers=None):
+    """Per-graph results of a whole dump, in file order, as a column dict."""
+    ranges = byte_ranges(path, workers)
+    if len(ranges) > 1:
+        with ProcessPoolExecutor(max_workers=len(ranges)) as pool:
+            parts = list(pool.map(scan_range, *zip(*((path, lo, hi) for lo, hi in ranges))))
+    else:
+        parts = [scan_range(path, lo, hi) for lo, hi in ranges]
+    return {name: np.concatenate([p[name] for p in parts]) for name in RESULT_FIELDS}
+
+
+def graph_profile(path, digest):
+    """Width profile of the first graph with the given PathDigest, or None."""
+    with open(path, 'rb') as f:
+        size = os.fstat(f.fileno()).st_size
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            for pos, node_count, payload_len, d in iter_records(mm, 0, size, size):
+                if d == digest:
+                    return width_profile(*_read_graph(mm, pos, node_count, payload_len))
+    return None
+
+
+def summarize_cplr(results, qs=PERCENTILES):
+    """CPLR and parallelism distribution over graphs, overall and per node-count range."""
+    nodes = results['nodes']
+    keep = nodes > 0
+    nodes, critical = nodes[keep], results['critical_path'][keep]
+    if not nodes.size:
+        return {'graphs': 0}
+    cplr = critical / nodes
+    parallelism = nodes / critical
+    counts, _ = np.histogram(parallelism, bins=PARALLELISM_BINS)
+
+    # Median CPLR per node-count range (ranges as in the node-count figure)
+    bucket = np.searchsorted(NODE_COUNT_EDGES, nodes, side='left')
+    order = np.lexsort((cplr, bucket))
+    starts = np.searchsorted(bucket[order], np.arange(len(NODE_COUNT_RANGES)))
+    ends = np.searchsorted(bucket[order], np.arange(len(NODE_COUNT_RANGES)), side='right')
+    by_range = [{'range': label, 'graphs': int(hi - lo),
+                 'median_cplr': float(np.median(cplr[order[lo:hi]])) if hi > lo else None}
+                for label, lo, hi in zip(NODE_COUNT_RANGES, starts, ends)]
+
+    return {
+        'graphs': int(nodes.size),
+        'nodes': int(nodes.sum()),
+        # Ratio of sums: the CPLR of running every graph once
+        'aggregate_cplr': float(critical.sum() / nodes.sum()),
+        'cplr_percentiles': dict(zip((f'p{q}' for q in qs),
+                                     np.percentile(cplr, qs).tolist())),
+        'parallelism_percentiles': dict(zip((f'p{q}' for q in qs),
+                                            np.percentile(parallelism, qs).tolist())),
+        'mean_parallelism': float(parallelism.mean()),
+        'parallelism_ranges': PARALLELISM_LABELS,
+        'parallelism_counts': counts.tolist(),
+        'parallelism_percentages': (counts / nodes.size * 100).tolist(),
+        'max_width_p50': float(np.median(results['max_width'][keep])),
+        'by_node_range': by_range,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='CPLR and parallelism of SsaGraphs in a dump')
+    parser.add_argument('dump', help='binary SsaGraph cache dump with CSR payloads')
+    parser.add_argument('-j', '--workers', type=int, default=None,
+                        help='parallel scan processes (default: all cores)')
+    parser.add_argument('-o', '--output', help='write per-graph results as CSV')
+    parser.add_argument('--profile', metavar='DIGEST',
+                        help='print the level-width profile of one graph (hex or decimal)')
+    parser.add_argument('--json', action='store_true', help='emit the summary as JSON')
+    args = parser.parse_args(argv)
+
+    if args.profile is not None:
+        widths = graph_profile(args.dump, int(args.profile, 0))
+        if widths is None:
+            parser.error(f"no graph with PathDigest {args.profile}")
+        n, depth = int(widths.sum()), int(widths.size)
+        print(f"{n:,} nodes, critical path {depth:,}, CPLR {depth / n if n else 0:.3f}, "
+              f"parallelism {n / depth if depth else 0:.2f}")
+        for level, width in enumerate(widths.tolist()):
+            print(f"  {level:>6}: {width:>6} {'#' * min(width, 60)}")
+        return 0
+
+    results = scan_graphs(args.dump, args.workers)
+    if args.output:
+        with open(args.output, 'w') as out:
+            out.write(','.join(RESULT_FIELDS) + ',cplr\n')
+            out.writelines(f"{d:#018x},{n},{e},{c},{w},{c / n if n else 0:.6f}\n"
+                           for d, n, e, c, w in zip(*(results[f].tolist()
+                                                       for f in RESULT_FIELDS)))
+    summary = summarize_cplr(results)
+    if args.json or not summary['graphs']:
+        json.dump(summary, sys.stdout, indent=2, ensure_ascii=False)
+        sys.stdout.write('\n')
+        return 0
+
+    print(f"Graphs: {summary['graphs']:,}  nodes {summary['nodes']:,}  "
+          f"aggregate CPLR {summary['aggregate_cplr']:.3f} "
+          f"(parallelism {1 / summary['aggregate_cplr']:.2f})")
+    for (name, cplr), par in zip(summary['cplr_percentiles'].items(),
+                                 summary['parallelism_percentiles'].values()):
+        print(f"  {name:>4}: CPLR {cplr:.3f}  parallelism {par:.2f}")
+    print('\nAvailable parallelism:')
+    for label, count, pct in zip(summary['parallelism_ranges'], summary['parallelism_counts'],
+                                 summary['parallelism_percentages']):
+        print(f"  {label:>6}: {count:>10,} ({pct:5.2f}%)")
+    print('\nMedian CPLR by node count:')
+    for row in summary['by_node_range']:
+        median = '-' if row['median_cplr'] is None else f"{row['median_cplr']:.3f}"
+        print(f"  {row['range']:>8}: {row['graphs']:>10,}  {median}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
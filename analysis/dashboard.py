@@ -0,0 +1,422 @@
+"""
+Live dashboard for a running replay: tails the growing block_stats files.
+
+    python -m analysis.dashboard                     # http://127.0.0.1:8050/
+    python -m analysis.dashboard --data-dir /data/replay --interval 5 --window 500
+
+Every --interval seconds a background thread reads only the bytes appended
+to block_stats_seq.csv and block_stats_<mode>.csv since the last poll
+(a partial last line waits for the next poll). New rows are merge-joined
+against the other side's pending rows and folded into per-mode state:
+
+  * a StreamingHistogram over the bins of plot_combined_speedup.py
+  * a QuantileSketch for P50/P75/P90 (analysis.streaming)
+  * running seq/target totals for the time-weighted speedup
+  * a rolling P10/P50/P90 series: analysis.rolling over the last w-1
+    speedups plus the new ones, kept as at most --points samples (the
+    history is halved by decimation whenever it fills up)
+
+Each update costs O(new rows) plus the rows still waiting for their
+counterpart. Pending rows are dropped once the other file has moved past
+them, since both files are written in block order. Memory therefore
+depends on the lag between files, the sketch's bucket count, the window
+and --points, and stays flat however long the replay runs. The HTTP
+handler only serves the last snapshot, so page loads never trigger work;
+redraws are throttled to the poll interval. Standard library only
+besides NumPy.
+
+A truncated or replaced file (a restarted replay) is re-read from the
+start, and the statistics built from it are rebuilt rather than added to.
+A new seq file rebuilds every mode, re-reading the targets from the start.
+A new target file rebuilds only its mode, and that mode re-reads seq up
+to where the shared seq tail has got.
+"""
+
+import argparse
+import json
+import os
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import numpy as np
+
+from analysis.rolling import MODE_LABELS, MODES, rolling_quantiles
+from analysis.speedup import BINS, DATA_DIR, LABELS, block_stats_path, merge_join
+from analysis.streaming import QuantileSketch, StreamingHistogram
+
+DEFAULT_WINDOW = 100
+DEFAULT_POINTS = 2000
+ROLLING_QS = [10, 50, 90]
+
+
+class CsvTail:
+    """Rows appended to a block_stats CSV since the previous poll."""
+
+    def __init__(self, path):
+        self.path = path
+        self.offset = 0
+        self.partial = b''
+        self.columns = None
+        self.inode = None
+        # Times the file was truncated or replaced after it had been read
+        self.restarts = 0
+
+    def rewind(self):
+        """Deliver the file from the start again on the next poll."""
+        self.offset, self.partial, self.columns = 0, b'', None
+
+    def poll(self, until=None):
+        """
+        (block_numbers, elapsed_ms) of the complete lines added since the last
+        poll, reading at most up to byte offset `until`.
+        """
+        empty = np.empty(0, dtype=np.int64), np.empty(0)
+        try:
+            st = os.stat(self.path)
+        except FileNotFoundError:
+            return empty
+        if st.st_ino != self.inode or st.st_size < self.offset:
+            if self.inode is not None or self.offset:
+                self.restarts += 1
+            self.inode = st.st_ino
+            self.rewind()
+        end = st.st_size if until is None else min(st.st_size, until)
+        if end <= self.offset:
+            return empty
+        with open(self.path, 'rb') as f:
+            f.seek(self.offset)
+            data = f.read(end - self.offset)
+        self.offset += len(data)
+        lines = (self.partial + data).split(b'\n')
+        self.partial = lines.pop()
+        if self.columns is None and lines:
+            header = lines.pop(0).decode('utf-8').strip().split(',')
+            self.columns = header.index('block_number'), header.index('elapsed_time_ms')
+        rows = [line.split(b',') for line in lines if line.strip()]
+        if not rows:
+            return empty
+        b, t = self.columns
+        return (np.array([row[b] for row in rows], dtype=np.int64),
+                np.array([row[t] for row in rows], dtype=np.float64))
+
+
+class LiveJoin:
+    """
+    Incremental merge-join of two block-ordered streams. Rows without a
+    counterpart wait until the other stream passes their block.
+    """
+
+    def __init__(self):
+        self.left = np.empty(0, dtype=np.int64), np.empty(0)
+        self.right = np.empty(0, dtype=np.int64), np.empty(0)
+        self.left_high = self.right_high = -1
+
+    @staticmethod
+    def _merge(pending, new):
+        blocks = np.concatenate([pending[0], new[0]])
+        values = np.concatenate([pending[1], new[1]])
+        blocks, first = np.unique(blocks, return_index=True)
+        return blocks, values[first]
+
+    def update(self, left_new, right_new):
+        """Append new rows; return (blocks, left values, right values) newly matched."""
+        left, right = self._merge(self.left, left_new), self._merge(self.right, right_new)
+        if left_new[0].size:
+            self.left_high = max(self.left_high, int(left_new[0].max()))
+        if right_new[0].size:
+            self.right_high = max(self.right_high, int(right_new[0].max()))
+        li, ri = merge_join(left[0], right[0])
+        keep_left = np.ones(left[0].size, dtype=bool)
+        keep_left[li] = False
+        keep_left &= left[0] > self.right_high
+        keep_right = np.ones(right[0].size, dtype=bool)
+        keep_right[ri] = False
+        keep_right &= right[0] > self.left_high
+        self.left = left[0][keep_left], left[1][keep_left]
+        self.right = right[0][keep_right], right[1][keep_right]
+        return left[0][li], left[1][li], right[1][ri]
+
+    @property
+    def pending(self):
+        return self.left[0].size + self.right[0].size
+
+
+class ModeState:
+    """Incremental statistics of one target configuration against seq."""
+
+    def __init__(self, mode, window=DEFAULT_WINDOW, points=DEFAULT_POINTS):
+        self.mode = mode
+        self.window = window
+        self.points = points
+        self.join = LiveJoin()
+        self.hist = StreamingHistogram(BINS)
+        self.sketch = QuantileSketch()
+        self.seq_ms = self.target_ms = 0.0
+        self.last_block = None
+        self.tail = np.empty(0)
+        self.stride = 1
+        self.seen = 0
+        self.series = {'blocks': [], **{f'p{q}': [] for q in ROLLING_QS}}
+
+    def update(self, seq_new, target_new):
+        blocks, seq, target = self.join.update(seq_new, target_new)
+        if not blocks.size:
+            return
+        speedups = seq / target
+        self.hist.update(speedups)
+        self.sketch.update(speedups)
+        self.seq_ms += float(seq.sum())
+        self.target_ms += float(target.sum())
+        self.last_block = int(blocks[-1])
+
+        values = np.concatenate([self.tail, speedups])
+        self.tail = values[-(self.window - 1):] if self.window > 1 else values[:0]
+        if values.size < self.window:
+            return
+        quantiles = rolling_quantiles(values, self.window, ROLLING_QS)
+        ends = blocks[blocks.size - quantiles.shape[0]:]
+        # Keep windows whose overall index is a multiple of stride
+        take = np.arange((-self.seen) % self.stride, ends.size, self.stride)
+        self.seen += ends.size
+        self.series['blocks'].extend(ends[take].tolist())
+        for j, q in enumerate(ROLLING_QS):
+            self.series[f'p{q}'].extend(quantiles[take, j].tolist())
+        while len(self.series['blocks']) > self.points:
+            for key in self.series:
+                self.series[key] = self.series[key][::2]
+            self.stride *= 2
+
+    def snapshot(self):
+        n = self.sketch.count
+        result = {'mode': self.mode, 'label': MODE_LABELS.get(self.mode, self.mode),
+                  'blocks': n, 'last_block': self.last_block, 'pending': self.join.pending,
+                  'series': self.series}
+        if n:
+            result.update({
+                'percentages': self.hist.percentages().tolist(),
+                **{f'p{q}': self.sketch.quantile(q / 100) for q in [50, 75, 90]},
+                'time_speedup': self.seq_ms / self.target_ms,
+            })
+        return result
+
+
+class Dashboard:
+    """Polls the block_stats files and keeps the latest JSON snapshot."""
+
+    def __init__(self, data_dir=DATA_DIR, modes=MODES, window=DEFAULT_WINDOW,
+                 points=DEFAULT_POINTS):
+        self.seq = CsvTail(block_stats_path('seq', data_dir))
+        self.tails = {mode: CsvTail(block_stats_path(mode, data_dir)) for mode in modes}
+        self.states = {mode: ModeState(mode, window, points) for mode in modes}
+        self.data_dir = data_dir
+        self.window = window
+        self.rows = 0
+        self.started = time.time()
+        self.lock = threading.Lock()
+        self.body = b'{}'
+
+    def _rebuild(self, mode):
+        state = self.states[mode]
+        self.states[mode] = ModeState(mode, state.window, state.points)
+        return self.states[mode]
+
+    def refresh(self):
+        """Fold in the rows appended since the last call and rebuild the snapshot."""
+        seq_restarts = self.seq.restarts
+        seq_new = self.seq.poll()
+        self.rows += seq_new[0].size
+        if self.seq.restarts != seq_restarts:
+            # seq_new holds the new file from its start: rebuild every mode
+            for mode in self.states:
+                self._rebuild(mode)
+                self.tails[mode].rewind()
+        for mode, state in self.states.items():
+            tail = self.tails[mode]
+            restarts = tail.restarts
+            target_new = tail.poll()
+            self.rows += target_new[0].size
+            if tail.restarts != restarts:
+                state = self._rebuild(mode)
+                # Everything the shared seq tail has delivered so far, this poll included
+                state.update(CsvTail(self.seq.path).poll(until=self.seq.offset), target_new)
+            else:
+                state.update(seq_new, target_new)
+        body = json.dumps({
+            'data_dir': self.data_dir,
+            'bins': LABELS,
+            'window': self.window,
+            'rows': self.rows,
+            'updated': time.time(),
+            'uptime_s': time.time() - self.started,
+            'modes': [state.snapshot() for state in self.states.values()],
+        }).encode('utf-8')
+        with self.lock:
+            self.body = body
+
+    def run(self, interval, stop):
+        while not stop.is_set():
+            start = time.perf_counter()
+            try:
+                self.refresh()
+            except Exception as exc:  # keep serving the last snapshot
+                print(f"refresh failed: {exc}", file=sys.stderr)
+            stop.wait(max(0.0, interval - (time.perf_counter() - start)))
+
+    def snapshot(self):
+        with self.lock:
+            return self.body
+
+
+PAGE = """<!DOCTYPE html>
+<html><head><meta charset="utf-8"><title>Helios replay</title>
+<style>
+body { font: 13px sans-serif; margin: 16px; color: #222; }
+table { border-collapse: collapse; margin-bottom: 12px; }
+td, th { padding: 2px 10px; text-align: right; border-bottom: 1px solid #ddd; }
+th:first-child, td:first-child { text-align: left; }
+canvas { border: 1px solid #ccc; margin-right: 8px; }
+.muted { color: #777; }
+</style></head>
+<body>
+<h3>Helios replay <span class="muted" id="status"></span></h3>
+<table id="summary"></table>
+<canvas id="hist" width="560" height="260"></canvas>
+<canvas id="rolling" width="560" height="260"></canvas>
+<script>
+const COLORS = ['#1a5490', '#e67e22', '#74add1', '#2ca02c', '#9467bd'];
+const INTERVAL = __INTERVAL__;
+function axes(ctx, w, h, yMax, label) {
+  ctx.clearRect(0, 0, w, h);
+  ctx.strokeStyle = '#999'; ctx.fillStyle = '#555'; ctx.font = '11px sans-serif';
+  ctx.beginPath(); ctx.moveTo(40, 10); ctx.lineTo(40, h - 30); ctx.lineTo(w - 10, h - 30); ctx.stroke();
+  for (let i = 0; i <= 4; i++) {
+    const y = h - 30 - (h - 40) * i / 4;
+    ctx.fillText((yMax * i / 4).toFixed(yMax >= 10 ? 0 : 1), 4, y + 4);
+  }
+  ctx.fillText(label, 44, 20);
+}
+function drawHist(state) {
+  const c = document.getElementById('hist'), ctx = c.getContext('2d');
+  const modes = state.modes.filter(m => m.percentages);
+  const yMax = Math.max(10, ...modes.flatMap(m => m.percentages)) * 1.1;
+  axes(ctx, c.width, c.height, yMax, 'Block percentage (%)');
+  const slot = (c.width - 60) / state.bins.length, bar = slot * 0.8 / Math.max(modes.length, 1);
+  state.bins.forEach((label, i) => {
+    ctx.fillStyle = '#555';
+    ctx.fillText(label, 44 + i * slot, c.height - 14);
+    modes.forEach((m, j) => {
+      const v = m.percentages[i], hgt = (c.height - 40) * v / yMax;
+      ctx.fillStyle = COLORS[state.modes.indexOf(m) % COLORS.length];
+      ctx.fillRect(44 + i * slot + j * bar, c.height - 30 - hgt, bar - 1, hgt);
+    });
+  });
+}
+function drawRolling(state) {
+  const c = document.getElementById('rolling'), ctx = c.getContext('2d');
+  const all = state.modes.filter(m => m.series.blocks.length > 1);
+  const yMax = Math.max(2, ...all.flatMap(m => m.series.p90)) * 1.05;
+  axes(ctx, c.width, c.height, yMax, `Rolling speedup, ${state.window}-block window (P50, P10-P90)`);
+  if (!all.length) return;
+  const x0 = Math.min(...all.map(m => m.series.blocks[0]));
+  const x1 = Math.max(...all.map(m => m.series.blocks[m.series.blocks.length - 1]));
+  const px = b => 40 + (c.width - 50) * (b - x0) / Math.max(x1 - x0, 1);
+  const py = v => c.height - 30 - (c.height - 40) * Math.min(v, yMax) / yMax;
+  all.forEach(m => {
+    const color = COLORS[state.modes.indexOf(m) % COLORS.length], s = m.series;
+    ctx.globalAlpha = 0.15; ctx.fillStyle = color; ctx.beginPath();
+    s.blocks.forEach((b, i) => i ? ctx.lineTo(px(b), py(s.p90[i])) : ctx.moveTo(px(b), py(s.p90[i])));
+    for (let i = s.blocks.length - 1; i >= 0; i--) ctx.lineTo(px(s.blocks[i]), py(s.p10[i]));
+    ctx.fill(); ctx.globalAlpha = 1;
+    ctx.strokeStyle = color; ctx.lineWidth = 1.5; ctx.beginPath();
+    s.blocks.forEach((b, i) => i ? ctx.lineTo(px(b), py(s.p50[i])) : ctx.moveTo(px(b), py(s.p50[i])));
+    ctx.stroke();
+  });
+  ctx.fillStyle = '#555';
+  ctx.fillText(x0, 40, c.height - 14); ctx.fillText(x1, c.width - 70, c.height - 14);
+}
+function fmt(v, d) { return v === undefined ? '-' : v.toFixed(d); }
+function render(state) {
+  document.getElementById('status').textContent =
+    `${state.data_dir} - ${state.rows.toLocaleString()} rows, updated ${new Date(state.updated * 1000).toLocaleTimeString()}`;
+  const rows = state.modes.map((m, i) =>
+    `<tr><td style="color:${COLORS[i % COLORS.length]}">${m.label}</td><td>${m.blocks.toLocaleString()}</td>` +
+    `<td>${m.last_block ?? '-'}</td><td>${fmt(m.p50, 2)}x</td><td>${fmt(m.p75, 2)}x</td><td>${fmt(m.p90, 2)}x</td>` +
+    `<td>${fmt(m.time_speedup, 2)}x</td><td>${m.pending.toLocaleString()}</td></tr>`);
+  document.getElementById('summary').innerHTML =
+    '<tr><th>Mode</th><th>Blocks</th><th>Last block</th><th>P50</th><th>P75</th><th>P90</th>' +
+    '<th>Total-time</th><th>Pending</th></tr>' + rows.join('');
+  drawHist(state); drawRolling(state);
+}
+async function poll() {
+  try { render(await (await fetch('state.json', {cache: 'no-store'})).json()); }
+  catch (e) { document.getElementById('status').textContent = 'disconnected'; }
+  setTimeout(poll, INTERVAL * 1000);
+}
+poll();
+</script></body></html>
+"""
+
+
+def make_handler(dashboard, interval):
+    page = PAGE.replace('__INTERVAL__', repr(float(interval))).encode('utf-8')
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            path = self.path.split('?', 1)[0]
+            if path == '/':
+                body, kind = page, 'text/html; charset=utf-8'
+            elif path == '/state.json':
+                body, kind = dashboard.snapshot(), 'application/json'
+            else:
+                self.send_error(404)
+                return
+            self.send_response(200)
+            self.send_header('Content-Type', kind)
+            self.send_header('Content-Length', str(len(body)))
+            self.send_header('Cache-Control', 'no-store')
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    return Handler
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('modes', nargs='*', default=MODES,
+                        help=f"target modes (default: {' '.join(MODES)})")
+    parser.add_argument('--data-dir', default=DATA_DIR, help='directory of block_stats files')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8050)
+    parser.add_argument('--interval', type=float, default=2.0,
+                        help='seconds between file polls and page refreshes (default: 2)')
+    parser.add_argument('-w', '--window', type=int, default=DEFAULT_WINDOW,
+                        help=f'rolling window in blocks (default: {DEFAULT_WINDOW})')
+    parser.add_argument('--points', type=int, default=DEFAULT_POINTS,
+                        help=f'max rolling samples kept per mode (default: {DEFAULT_POINTS})')
+    args = parser.parse_args(argv)
+
+    dashboard = Dashboard(args.data_dir, args.modes, args.window, args.points)
+    dashboard.refresh()
+    stop = threading.Event()
+    poller = threading.Thread(target=dashboard.run, args=(args.interval, stop), daemon=True)
+    poller.start()
+    server = ThreadingHTTPServer((args.host, args.port), make_handler(dashboard, args.interval))
+    print(f"Serving {args.data_dir} on http://{args.host}:{server.server_port}/ "
+          f"(polling every {args.interval:g}s, Ctrl-C to stop)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        stop.set()
+        server.server_close()
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,366 @@
+"""
+Byte-budgeted Path Cache simulator: hit rate versus artifact memory budget.
+
+    python -m analysis.eviction_sim records.npz --policy lru threshold lfu
+
+Replays per-execution path records (see analysis.records; artifact_bytes
+gives each path's SsaGraph + constant-table size) against a cache with a
+fixed byte budget. A lookup hits when the path's artifacts are resident;
+the first execution of every path is a compulsory miss.
+
+Policies and how a budget sweep is computed:
+
+  lru        evict least-recently-used paths until the new one fits. LRU
+             is a stack algorithm, so one pass computes each access's
+             byte stack distance (bytes of distinct paths touched since its
+             previous access, itself included) and every budget is a
+             searchsorted over the sorted distances.
+  threshold  the static policy of table/storage-coverage-tradeoff.tex:
+             keep the most frequent paths that fit. One sort by frequency
+             and two cumulative sums answer every budget.
+  lfu        evict the least-frequently-used path (global counts, LRU
+             tie-break).
+  tinylfu    W-TinyLFU-style: a 1% LRU window in front of an LRU main
+             area; a window victim is admitted only if its (aged) access
+             frequency beats the main area's victim.
+
+lfu and tinylfu are not stack algorithms, so each budget is one replay;
+budgets are fanned out across processes.
+"""
+
+import argparse
+import heapq
+import json
+import os
+import sys
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from analysis.records import factorize, load_path_records
+
+MB = 1 << 20
+
+
+def prepare_trace(path_digest, artifact_bytes):
+    """Dense path codes per execution and the artifact size of every path."""
+    path, _ = factorize(path_digest)
+    sizes = np.zeros(int(path.max()) + 1 if path.size else 0, dtype=np.int64)
+    np.maximum.at(sizes, path, np.asarray(artifact_bytes, dtype=np.int64))
+    return path, sizes
+
+
+def _previous_and_next(path):
+    """Index of each access's previous/next access to the same path (-1 / n)."""
+    n = path.size
+    order = np.lexsort((np.arange(n), path))
+    same = np.r_[False, path[order][1:] == path[order][:-1]]
+    prev = np.full(n, -1, dtype=np.int64)
+    prev[order[same]] = order[np.flatnonzero(same) - 1]
+    nxt = np.full(n, n, dtype=np.int64)
+    nxt[prev[prev >= 0]] = np.flatnonzero(prev >= 0)
+    return prev, nxt
+
+
+def lru_stack_distances(path, sizes):
+    """
+    Byte stack distance of every access (np.inf for first accesses).
+
+    For access i with previous access j, the distance is size[path[i]] plus
+    the sizes of accesses k in (j, i) that are the last touch of their path
+    before i, i.e. next[k] > i. Those range/dominance sums are answered for
+    all accesses at once with a merge-sort tree: at each level the accesses
+    are sorted by (block, next) and queries are searchsorted into it.
+    """
+    n = path.size
+    prev, nxt = _previous_and_next(path)
+    weight = sizes[path]
+    q = np.flatnonzero(prev >= 0)
+    total = weight[q].astype(np.int64)
+    big = n + 2
+
+    # Bottom-up segment decomposition of [prev+1, i): at each level take the
+    # odd boundary blocks, then halve the block indices. Only queries with a
+    # non-empty remainder are carried to the next level.
+    active = np.flatnonzero(prev[q] + 1 < q)
+    lo, hi = prev[q[active]] + 1, q[active]
+    order = np.arange(n, dtype=np.int64)
+    level = 0
+    while active.size:
+        # The previous level's order is sorted within half-blocks; a stable
+        # sort of those runs is a cheap merge
+        keys = (order >> level) * big + nxt[order]
+        resort = np.argsort(keys, kind='stable')
+        order, keys = order[resort], keys[resort]
+        csum = np.r_[0, np.cumsum(weight[order])]
+
+        for side in (0, 1):
+            if side == 0:
+                take = np.flatnonzero((lo & 1) & (lo < hi))
+                b = lo[take]
+                lo[take] += 1
+            else:
+                take = np.flatnonzero((hi & 1) & (lo < hi))
+                hi[take] -= 1
+                b = hi[take]
+            start = np.searchsorted(keys, b * big + q[active[take]], side='right')
+            end = np.minimum((b + 1) << level, n)
+            total[active[take]] += csum[end] - csum[start]
+        lo, hi = lo >> 1, hi >> 1
+        keep = lo < hi
+        active, lo, hi = active[keep], lo[keep], hi[keep]
+        level += 1
+
+    dist = np.full(n, np.inf)
+    dist[q] = total
+    return dist
+
+
+def lru_curve(path, sizes, budgets):
+    """LRU hit rate for every budget (bytes) from one stack-distance pass."""
+    dist = np.sort(lru_stack_distances(path, sizes))
+    hits = np.searchsorted(dist, np.asarray(budgets, dtype=np.float64), side='right')
+    return hits / path.size
+
+
+def threshold_curve(path, sizes, budgets):
+    """
+    Static frequency policy: the most frequent paths that fit the budget.
+    Every kept path still misses once (when its artifact is generated).
+    """
+    freq = np.bincount(path, minlength=sizes.size)
+    order = np.lexsort((np.arange(sizes.size), -freq))
+    used = np.cumsum(sizes[order])
+    hits = np.r_[0, np.cumsum(freq[order] - 1)]
+    # Prefix of the frequency order that fits (sizes are non-negative)
+    kept = np.searchsorted(used, np.asarray(budgets, dtype=np.int64), side='right')
+    return hits[kept] / path.size
+
+
+def threshold_points(path, sizes, thresholds):
+    """(storage bytes, hit rate) when keeping paths with frequency >= t."""
+    freq = np.bincount(path, minlength=sizes.size)
+    rows = []
+    for t in thresholds:
+        keep = freq >= t
+        rows.append({'threshold': int(t), 'storage_bytes': int(sizes[keep].sum()),
+                     'hit_rate': float((freq[keep] - 1).sum() / path.size)})
+    return rows
+
+
+class LRUCache:
+    """Byte-budgeted LRU; new entries are inserted, then the tail is evicted."""
+
+    def __init__(self, budget):
+        self.budget = budget
+        self.used = 0
+        self.entries = OrderedDict()
+
+    def access(self, key, size):
+        if key in self.entries:
+            self.entries.move_to_end(key)
+            return True
+        self.entries[key] = size
+        self.used += size
+        while self.used > self.budget:
+            _, evicted = self.entries.popitem(last=False)
+            self.used -= evicted
+        return False
+
+
+class LFUCache:
+    """Byte-budgeted LFU with global frequency counts and LRU tie-break."""
+
+    def __init__(self, budget):
+        self.budget = budget
+        self.used = 0
+        self.freq = {}
+        self.stamp = {}
+        self.resident = {}
+        self.heap = []
+        self.clock = 0
+
+    def _push(self, key):
+        self.stamp[key] = (self.freq[key], self.clock)
+        heapq.heappush(self.heap, (self.freq[key], self.clock, key))
+        # Every hit leaves a stale entry behind; compact once they outnumber
+        # the resident ones 2:1 so the heap stays O(capacity)
+        if len(self.heap) > 3 * len(self.resident) + 64:
+            self.heap = [(*self.stamp[k], k) for k in self.resident]
+            heapq.heapify(self.heap)
+
+    def access(self, key, size):
+        self.clock += 1
+        self.freq[key] = self.freq.get(key, 0) + 1
+        if key in self.resident:
+            self._push(key)
+            return True
+        if size > self.budget:
+            return False
+        while self.used + size > self.budget:
+            f, t, victim = heapq.heappop(self.heap)
+            # Skip heap entries superseded by a later access
+            if victim in self.resident and self.stamp[victim] == (f, t):
+                self.used -= self.resident.pop(victim)
+                del self.stamp[victim]
+        self.resident[key] = size
+        self.used += size
+        self._push(key)
+        return False
+
+
+class TinyLFUCache:
+    """W-TinyLFU-style: LRU window, frequency-gated admission into LRU main."""
+
+    def __init__(self, budget, window_fraction=0.01, reset_interval=100000):
+        self.window = LRUCache(max(1, int(budget * window_fraction)))
+        self.main_budget = budget - self.window.budget
+        self.main = OrderedDict()
+        self.main_used = 0
+        self.freq = {}
+        self.accesses = 0
+        self.reset_interval = reset_interval
+
+    def _record(self, key):
+        self.freq[key] = self.freq.get(key, 0) + 1
+        self.accesses += 1
+        if self.accesses >= self.reset_interval:
+            # Aging: halve every counter, as TinyLFU's reset does
+            self.freq = {k: v >> 1 for k, v in self.freq.items() if v > 1}
+            self.accesses = 0
+
+    def _admit(self, key, size):
+        """Admit a window victim if it is more frequent than what it displaces."""
+        if size > self.main_budget:
+            return
+        victims, freed = [], 0
+        for victim, victim_size in self.main.items():
+            if self.main_used - freed + size <= self.main_budget:
+                break
+            victims.append(victim)
+            freed += victim_size
+        candidate = self.freq.get(key, 0)
+        if victims and candidate <= max(self.freq.get(v, 0) for v in victims):
+            return
+        for victim in victims:
+            self.main_used -= self.main.pop(victim)
+        self.main[key] = size
+        self.main_used += size
+
+    def access(self, key, size):
+        self._record(key)
+        if key in self.main:
+            self.main.move_to_end(key)
+            return True
+        window = self.window
+        if key in window.entries:
+            window.entries.move_to_end(key)
+            return True
+        window.entries[key] = size
+        window.used += size
+        while window.used > window.budget:
+            candidate, candidate_size = window.entries.popitem(last=False)
+            window.used -= candidate_size
+            self._admit(candidate, candidate_size)
+        return False
+
+
+POLICIES = {'lru': LRUCache, 'lfu': LFUCache, 'tinylfu': TinyLFUCache}
+
+
+def replay(policy, path, sizes, budget):
+    """Hit rate of one policy at one budget by full replay."""
+    cache = POLICIES[policy](budget)
+    hits = 0
+    for key, size in zip(path.tolist(), sizes[path].tolist()):
+        hits += cache.access(key, size)
+    return hits / path.size if path.size else 0.0
+
+
+def replay_curve(policy, path, sizes, budgets, workers=None):
+    """Replay curve for non-stack policies; one process per budget."""
+    args = [(policy, path, sizes, int(b)) for b in budgets]
+    workers = workers or os.cpu_count()
+    if workers > 1 and len(args) > 1:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            return np.array(list(pool.map(replay, *zip(*args))))
+    return np.array([replay(*a) for a in args])
+
+
+def hit_rate_curve(policy, path, sizes, budgets, workers=None):
+    """Hit rate per budget (bytes) for any supported policy."""
+    if policy == 'lru':
+        return lru_curve(path, sizes, budgets)
+    if policy == 'threshold':
+        return threshold_curve(path, sizes, budgets)
+    return replay_curve(policy, path, sizes, budgets, workers)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Hit rate vs. Path Cache memory budget')
+    parser.add_argument('records', help='.csv or .npz records with artifact_bytes')
+    parser.add_argument('--policy', nargs='+', default=['lru', 'threshold'],
+                        choices=['lru', 'threshold', 'lfu', 'tinylfu'])
+    parser.add_argument('--budgets-mb', default='1,2,4,8,16,32,64,128,256,512',
+                        help='comma-separated budgets in MB')
+    parser.add_argument('--thresholds', default='1,10,50,100,500',
+                        help='static frequency thresholds to report as points')
+    parser.add_argument('--workers', type=int, default=None)
+    parser.add_argument('--plot', metavar='PDF', help='also draw the curves')
+    args = parser.parse_args(argv)
+
+    records = load_path_records(args.records, columns=['tx', 'entry_point', 'path_digest',
+                                                       'artifact_bytes'])
+    if 'artifact_bytes' not in records:
+        parser.error('records need an artifact_bytes column')
+    path, sizes = prepare_trace(records['path_digest'], records['artifact_bytes'])
+    budgets_mb = [float(b) for b in args.budgets_mb.split(',')]
+    budgets = [int(b * MB) for b in budgets_mb]
+
+    out = {'budgets_mb': budgets_mb, 'curves': {},
+           'threshold_points': threshold_points(
+               path, sizes, [int(t) for t in args.thresholds.split(',')])}
+    for policy in args.policy:
+        out['curves'][policy] = hit_rate_curve(policy, path, sizes, budgets,
+                                               args.workers).tolist()
+
+    from analysis.stats import storage_stats
+    out['storage_growth'] = storage_stats()
+    json.dump(out, sys.stdout, indent=2)
+    sys.stdout.write('\n')
+
+    if args.plot:
+        plot_curves(out, args.plot)
+    return 0
+
+
+def plot_curves(result, filename):
+    """Hit rate vs. budget, with the measured artifact sizes marked."""
+    import matplotlib.pyplot as plt
+
+    fig, ax = plt.subplots(figsize=(3.5, 2.4))
+    for policy, curve in result['curves'].items():
+        ax.plot(result['budgets_mb'], np.asarray(curve) * 100, 'o-', linewidth=1.2,
+                markersize=3, label=policy)
+    for point in result['threshold_points']:
+        ax.plot(point['storage_bytes'] / MB, point['hit_rate'] * 100, 'kx', markersize=4)
+        ax.annotate(f"≥{point['threshold']}", (point['storage_bytes'] / MB, point['hit_rate'] * 100),
+                    xytext=(2, -8), textcoords='offset points', fontsize=6)
+    for blocks, mb in zip(result['storage_growth']['block_counts'],
+                          result['storage_growth']['artifacts_mb']):
+        ax.axvline(mb, color='#999999', linestyle=':', linewidth=0.6)
+        ax.text(mb, 1, f'{blocks // 1000}K', fontsize=6, color='#666666', ha='center')
+    ax.set_xscale('log')
+    ax.set_xlabel('Artifact Budget (MB)', fontweight='bold')
+    ax.set_ylabel('Hit Rate (%)', fontweight='bold')
+    ax.set_ylim(0, 100)
+    ax.grid(alpha=0.3, linestyle='--', linewidth=0.4)
+    ax.legend(loc='lower right', fontsize=7)
+    plt.tight_layout(pad=0.3)
+    plt.savefig(filename, dpi=600, bbox_inches='tight', pad_inches=0.02)
+    plt.close()
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,154 @@
+"""
+EVM opcode table shared by the PathLog tools (Cancun instruction set).
+
+For every opcode: mnemonic, stack inputs, stack outputs and static gas
+(the constant part charged before any dynamic component). The optimizer
+classes follow Helios' hybrid execution rule that only static-cost,
+side-effect-free instructions may be rewritten:
+
+  FOLD       pure 256-bit arithmetic, folded when every input is constant
+  FRAME      values fixed for the lifetime of a call frame (CALLER, ...),
+             never folded but safe to merge by fingerprint
+  REMOVABLE  FOLD | FRAME | PUSH* | POP: may be deleted when unused.
+             Everything else (memory, storage, calls, logs, control flow,
+             dynamic-gas ops, GAS delimiters) is a side effect and a root
+             of dead-code elimination.
+"""
+
+import numpy as np
+
+UINT256 = (1 << 256) - 1
+SIGN_BIT = 1 << 255
+
+# (opcode, mnemonic, stack inputs, stack outputs, static gas)
+_TABLE = [
+    (0x00, 'STOP', 0, 0, 0), (0x01, 'ADD', 2, 1, 3), (0x02, 'MUL', 2, 1, 5),
+    (0x03, 'SUB', 2, 1, 3), (0x04, 'DIV', 2, 1, 5), (0x05, 'SDIV', 2, 1, 5),
+    (0x06, 'MOD', 2, 1, 5), (0x07, 'SMOD', 2, 1, 5), (0x08, 'ADDMOD', 3, 1, 8),
+    (0x09, 'MULMOD', 3, 1, 8), (0x0a, 'EXP', 2, 1, 10), (0x0b, 'SIGNEXTEND', 2, 1, 5),
+    (0x10, 'LT', 2, 1, 3), (0x11, 'GT', 2, 1, 3), (0x12, 'SLT', 2, 1, 3),
+    (0x13, 'SGT', 2, 1, 3), (0x14, 'EQ', 2, 1, 3), (0x15, 'ISZERO', 1, 1, 3),
+    (0x16, 'AND', 2, 1, 3), (0x17, 'OR', 2, 1, 3), (0x18, 'XOR', 2, 1, 3),
+    (0x19, 'NOT', 1, 1, 3), (0x1a, 'BYTE', 2, 1, 3), (0x1b, 'SHL', 2, 1, 3),
+    (0x1c, 'SHR', 2, 1, 3), (0x1d, 'SAR', 2, 1, 3), (0x20, 'KECCAK256', 2, 1, 30),
+    (0x30, 'ADDRESS', 0, 1, 2), (0x31, 'BALANCE', 1, 1, 100), (0x32, 'ORIGIN', 0, 1, 2),
+    (0x33, 'CALLER', 0, 1, 2), (0x34, 'CALLVALUE', 0, 1, 2),
+    (0x35, 'CALLDATALOAD', 1, 1, 3), (0x36, 'CALLDATASIZE', 0, 1, 2),
+    (0x37, 'CALLDATACOPY', 3, 0, 3), (0x38, 'CODESIZE', 0, 1, 2),
+    (0x39, 'CODECOPY', 3, 0, 3), (0x3a, 'GASPRICE', 0, 1, 2),
+    (0x3b, 'EXTCODESIZE', 1, 1, 100), (0x3c, 'EXTCODECOPY', 4, 0, 100),
+    (0x3d, 'RETURNDATASIZE', 0, 1, 2), (0x3e, 'RETURNDATACOPY', 3, 0, 3),
+    (0x3f, 'EXTCODEHASH', 1, 1, 100), (0x40, 'BLOCKHASH', 1, 1, 20),
+    (0x41, 'COINBASE', 0, 1, 2), (0x42, 'TIMESTAMP', 0, 1, 2), (0x43, 'NUMBER', 0, 1, 2),
+    (0x44, 'PREVRANDAO', 0, 1, 2), (0x45, 'GASLIMIT', 0, 1, 2), (0x46, 'CHAINID', 0, 1, 2),
+    (0x47, 'SELFBALANCE', 0, 1, 5), (0x48, 'BASEFEE', 0, 1, 2), (0x49, 'BLOBHASH', 1, 1, 3),
+    (0x4a, 'BLOBBASEFEE', 0, 1, 2), (0x50, 'POP', 1, 0, 2), (0x51, 'MLOAD', 1, 1, 3),
+    (0x52, 'MSTORE', 2, 0, 3), (0x53, 'MSTORE8', 2, 0, 3), (0x54, 'SLOAD', 1, 1, 100),
+    (0x55, 'SSTORE', 2, 0, 100), (0x56, 'JUMP', 1, 0, 8), (0x57, 'JUMPI', 2, 0, 10),
+    (0x58, 'PC', 0, 1, 2), (0x59, 'MSIZE', 0, 1, 2), (0x5a, 'GAS', 0, 1, 2),
+    (0x5b, 'JUMPDEST', 0, 0, 1), (0x5c, 'TLOAD', 1, 1, 100), (0x5d, 'TSTORE', 2, 0, 100),
+    (0x5e, 'MCOPY', 3, 0, 3), (0x5f, 'PUSH0', 0, 1, 2),
+    *((0x60 + i, f'PUSH{i + 1}', 0, 1, 3) for i in range(32)),
+    *((0x80 + i, f'DUP{i + 1}', i + 1, i + 2, 3) for i in range(16)),
+    *((0x90 + i, f'SWAP{i + 1}', i + 2, i + 2, 3) for i in range(16)),
+    *((0xa0 + i, f'LOG{i}', i + 2, 0, 375 * (i + 1)) for i in range(5)),
+    (0xf0, 'CREATE', 3, 1, 32000), (0xf1, 'CALL', 7, 1, 100), (0xf2, 'CALLCODE', 7, 1, 100),
+    (0xf3, 'RETURN', 2, 0, 0), (0xf4, 'DELEGATECALL', 6, 1, 100),
+    (0xf5, 'CREATE2', 4, 1, 32000), (0xfa, 'STATICCALL', 6, 1, 100),
+    (0xfd, 'REVERT', 2, 0, 0), (0xfe, 'INVALID', 0, 0, 0), (0xff, 'SELFDESTRUCT', 1, 0, 5000),
+]
+
+OPCODES = {name: code for code, name, _, _, _ in _TABLE}
+NAMES = ['UNKNOWN_%02X' % code for code in range(256)]
+STACK_IN = np.zeros(256, dtype=np.int64)
+STACK_OUT = np.zeros(256, dtype=np.int64)
+STATIC_GAS = np.zeros(256, dtype=np.int64)
+for _code, _name, _pops, _pushes, _gas in _TABLE:
+    NAMES[_code] = _name
+    STACK_IN[_code], STACK_OUT[_code], STATIC_GAS[_code] = _pops, _pushes, _gas
+
+PUSH0, PUSH32 = OPCODES['PUSH0'], OPCODES['PUSH32']
+DUP1, DUP16 = OPCODES['DUP1'], OPCODES['DUP16']
+SWAP1, SWAP16 = OPCODES['SWAP1'], OPCODES['SWAP16']
+# Immediate bytes following each opcode in the code
+IMMEDIATE = np.zeros(256, dtype=np.int64)
+IMMEDIATE[OPCODES['PUSH1']:PUSH32 + 1] = np.arange(1, 33)
+
+# GasChunk delimiters (see chapters/design.tex, Path Tracer)
+GAS_DELIMITERS = [OPCODES[name] for name in ['GAS', 'RETURN', 'STOP', 'REVERT',
+                                             'CREATE', 'CREATE2']]
+
+
+def _signed(x):
+    return x - (1 << 256) if x & SIGN_BIT else x
+
+
+def _sdiv(a, b):
+    if b == 0:
+        return 0
+    q = abs(_signed(a)) // abs(_signed(b))
+    return (-q if (_signed(a) < 0) != (_signed(b) < 0) else q) & UINT256
+
+
+def _smod(a, b):
+    if b == 0:
+        return 0
+    r = abs(_signed(a)) % abs(_signed(b))
+    return (-r if _signed(a) < 0 else r) & UINT256
+
+
+def _signextend(b, x):
+    if b >= 31:
+        return x
+    bit = 8 * b + 7
+    mask = (1 << bit) - 1
+    return x | (UINT256 - mask) if x & (1 << bit) else x & mask
+
+
+def _sar(shift, x):
+    return (_signed(x) >> min(shift, 256)) & UINT256
+
+
+# Stack inputs in pop order: a is the top of the stack
+FOLD = {
+    OPCODES['ADD']: lambda a, b: (a + b) & UINT256,
+    OPCODES['MUL']: lambda a, b: (a * b) & UINT256,
+    OPCODES['SUB']: lambda a, b: (a - b) & UINT256,
+    OPCODES['DIV']: lambda a, b: a // b if b else 0,
+    OPCODES['SDIV']: _sdiv,
+    OPCODES['MOD']: lambda a, b: a % b if b else 0,
+    OPCODES['SMOD']: _smod,
+    OPCODES['ADDMOD']: lambda a, b, n: (a + b) % n if n else 0,
+    OPCODES['MULMOD']: lambda a, b, n: (a * b) % n if n else 0,
+    OPCODES['SIGNEXTEND']: _signextend,
+    OPCODES['LT']: lambda a, b: int(a < b),
+    OPCODES['GT']: lambda a, b: int(a > b),
+    OPCODES['SLT']: lambda a, b: int(_signed(a) < _signed(b)),
+    OPCODES['SGT']: lambda a, b: int(_signed(a) > _signed(b)),
+    OPCODES['EQ']: lambda a, b: int(a == b),
+    OPCODES['ISZERO']: lambda a: int(a == 0),
+    OPCODES['AND']: lambda a, b: a & b,
+    OPCODES['OR']: lambda a, b: a | b,
+    OPCODES['XOR']: lambda a, b: a ^ b,
+    OPCODES['NOT']: lambda a: UINT256 ^ a,
+    OPCODES['BYTE']: lambda i, x: (x >> (8 * (31 - i))) & 0xff if i < 32 else 0,
+    OPCODES['SHL']: lambda s, x: (x << s) & UINT256 if s < 256 else 0,
+    OPCODES['SHR']: lambda s, x: x >> s if s < 256 else 0,
+    OPCODES['SAR']: _sar,
+}
+
+FRAME = [OPCODES[name] for name in [
+    'ADDRESS', 'ORIGIN', 'CALLER', 'CALLVALUE', 'CALLDATALOAD', 'CALLDATASIZE',
+    'CODESIZE', 'GASPRICE', 'COINBASE', 'TIMESTAMP', 'NUMBER', 'PREVRANDAO',
+    'GASLIMIT', 'CHAINID', 'BASEFEE', 'BLOBBASEFEE', 'BLOBHASH']]
+
+IS_PUSH = np.zeros(256, dtype=bool)
+IS_PUSH[PUSH0:PUSH32 + 1] = True
+IS_FOLD = np.zeros(256, dtype=bool)
+IS_FOLD[list(FOLD)] = True
+IS_MERGEABLE = IS_FOLD.copy()
+IS_MERGEABLE[FRAME] = True
+IS_REMOVABLE = IS_MERGEABLE | IS_PUSH
+IS_REMOVABLE[OPCODES['POP']] = True
+IS_STACK_ONLY = np.zeros(256, dtype=bool)
+IS_STACK_ONLY[DUP1:SWAP16 + 1] = True
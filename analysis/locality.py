@@ -0,0 +1,138 @@
+"""
+Path locality (Pareto/Lorenz coverage and Gini) over growing block windows.
+
+    python -m analysis.locality records.npz --windows 1000,5000
+
+For a window of blocks, the coverage curve gives the share of frame
+executions that go through the most frequent p% of unique paths. It is the
+Lorenz curve of per-path execution counts read from the top, interpolated
+linearly between paths, so every percentile is exact rather than a fixed
+handful of rows. The Gini coefficient summarizes the same distribution:
+0 means every path executes equally often, and values near 1 mean a few
+paths dominate.
+
+Windows all start at the first recorded block and grow (1K, 5K, ... N
+blocks). LocalityTracker keeps per-path counts and adds only the records
+of each newly covered block range with one np.bincount. A window's
+statistics cost one sort of the current counts, whatever the window length.
+"""
+
+import argparse
+import json
+import sys
+
+import numpy as np
+
+from analysis.records import factorize, load_path_records
+
+WINDOWS = [1000, 2000, 3000, 4000, 5000, None]  # None: every recorded block
+KEY_PERCENTAGES = [0, 1, 5, 10, 20, 50, 100]
+
+
+def coverage_curve(counts, percentages=KEY_PERCENTAGES):
+    """Execution coverage (%) of the top p% of paths, for every p."""
+    counts = np.asarray(counts, dtype=np.int64)
+    counts = np.sort(counts[counts > 0])[::-1]
+    if not counts.size:
+        return np.zeros(len(percentages))
+    cumulative = np.r_[0, np.cumsum(counts)] / counts.sum() * 100
+    paths = np.asarray(percentages, dtype=np.float64) / 100 * counts.size
+    return np.interp(paths, np.arange(counts.size + 1), cumulative)
+
+
+def gini(counts):
+    """Gini coefficient of per-path execution counts (paths with count 0 ignored)."""
+    x = np.asarray(counts, dtype=np.float64)
+    x = np.sort(x[x > 0])
+    n = x.size
+    if not n or not x.sum():
+        return 0.0
+    return float(2 * np.dot(np.arange(1, n + 1), x) / (n * x.sum()) - (n + 1) / n)
+
+
+class LocalityTracker:
+    """Per-path execution counts over a growing prefix of block-ordered records."""
+
+    def __init__(self, block_number, path_digest):
+        order = np.argsort(block_number, kind='stable')
+        self.blocks = np.asarray(block_number)[order]
+        self.path, self.uniques = factorize(np.asarray(path_digest)[order])
+        self.counts = np.zeros(self.uniques.size, dtype=np.int64)
+        self.first_block = int(self.blocks[0]) if self.blocks.size else 0
+        self.position = 0
+
+    def advance(self, n_blocks):
+        """
+        Extend the window to the first n_blocks blocks (None: all of them);
+        return the number of executions added.
+        """
+        if n_blocks is None:
+            end = self.blocks.size
+        else:
+            end = int(np.searchsorted(self.blocks, self.first_block + n_blocks, side='left'))
+        if end <= self.position:
+            return 0
+        self.counts += np.bincount(self.path[self.position:end], minlength=self.counts.size)
+        added, self.position = end - self.position, end
+        return added
+
+    def stats(self, percentages=KEY_PERCENTAGES):
+        """Coverage curve, Gini and sizes of the current window."""
+        last = int(self.blocks[self.position - 1]) if self.position else self.first_block - 1
+        return {
+            'blocks': last - self.first_block + 1,
+            'executions': int(self.position),
+            'unique_paths': int(np.count_nonzero(self.counts)),
+            'gini': gini(self.counts),
+            'path_percentages': list(percentages),
+            'execution_coverage': coverage_curve(self.counts, percentages).tolist(),
+        }
+
+
+def window_stats(block_number, path_digest, windows=WINDOWS, percentages=KEY_PERCENTAGES):
+    """Locality statistics for each growing window (sorted by size)."""
+    tracker = LocalityTracker(block_number, path_digest)
+    rows = []
+    for n_blocks in sorted(windows, key=lambda w: float('inf') if w is None else w):
+        tracker.advance(n_blocks)
+        row = tracker.stats(percentages)
+        if n_blocks is not None:
+            row['blocks'] = int(n_blocks)
+        rows.append(row)
+    return rows
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Path locality over growing block windows')
+    parser.add_argument('records', help='.csv or .npz records with block_number')
+    parser.add_argument('--windows', default=','.join(str(w or 'all') for w in WINDOWS),
+                        help="comma-separated window sizes in blocks ('all' for every block)")
+    parser.add_argument('--percentages', default=','.join(map(str, KEY_PERCENTAGES)),
+                        help='comma-separated path percentages for the coverage curve')
+    parser.add_argument('--json', action='store_true', help='emit JSON rows')
+    args = parser.parse_args(argv)
+
+    records = load_path_records(args.records, columns=['tx', 'entry_point', 'path_digest',
+                                                       'block_number'])
+    if 'block_number' not in records:
+        parser.error('records need a block_number column')
+    percentages = [float(p) for p in args.percentages.split(',')]
+    rows = window_stats(records['block_number'], records['path_digest'],
+                        [None if w == 'all' else int(w) for w in args.windows.split(',')],
+                        percentages)
+    if args.json:
+        json.dump(rows, sys.stdout, indent=2)
+        sys.stdout.write('\n')
+        return 0
+
+    print(f"{'blocks':>8} {'executions':>12} {'paths':>9} {'gini':>6}  " +
+          ' '.join(f"{'top' + format(p, 'g') + '%':>8}" for p in percentages))
+    for row in rows:
+        print(f"{row['blocks']:>8,} {row['executions']:>12,} {row['unique_paths']:>9,} "
+              f"{row['gini']:6.3f}  " +
+              ' '.join(f'{c:7.1f}%' for c in row['execution_coverage']))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
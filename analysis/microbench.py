@@ -0,0 +1,361 @@
+"""
+Microbenchmark ingestion: raw timings to statistics, figure data and tables.
+
+    python -m analysis.microbench                        # workbook only
+    python -m analysis.microbench target/criterion bench.txt --tables
+
+Sources, merged in order (later measurements replace earlier ones; the
+command line always starts from the workbook):
+
+  *.xlsx     micro-benchmark/micro_benchmark.xlsx: one sheet per workload,
+             one column per system. Execution time, tracing time and
+             artifact size per system; CPLR, 8-thread parallel time and
+             opcode-reduction counts per workload. Every cell is a single
+             (already aggregated) value.
+  directory  a criterion output tree. Every benchmark.json names the
+             workload (group_id) and system (function_id), and the sibling
+             new/sample.json gives per-sample iteration counts and times.
+  otherwise  `go test -bench` output: `BenchmarkWorkload/System-8  N  T ns/op`
+             lines, repeated with -count for samples.
+
+Workload and system names are matched loosely (case, punctuation and a
+'V2' infix are ignored). Each (workload, system) execution time is reduced
+to median, MAD and a distribution-free confidence interval for the median
+built from binomial order statistics. The same numbers feed
+micro-benchmark/plot_speedup.py, parallel-instruction/plot.py (through
+analysis.stats) and the tables written by --tables, so a new benchmark run
+refreshes every one of them.
+"""
+
+import argparse
+import decimal
+import glob
+import json
+import math
+import os
+import re
+import sys
+
+import numpy as np
+
+from analysis.stats import MICROBENCH_WORKLOADS, REPO_DIR
+
+WORKBOOK = os.path.join(REPO_DIR, 'micro-benchmark', 'micro_benchmark.xlsx')
+TABLE_DIR = os.path.join(REPO_DIR, 'table')
+
+SYSTEMS = ['Geth Native', 'Revm Native', 'Forerunner-Geth', 'Forerunner-Revm',
+           'Revmc', 'Helios']
+SYSTEM_ALIASES = {'forerunnergeth': 'Forerunner-Geth', 'forerunnerrevmmock': 'Forerunner-Revm'}
+
+# Workbook rows (first column) and the metric each one holds
+SYSTEM_ROWS = {'Optimization Time(us)': 'tracing_us', 'Size(Bytes)': 'artifact_bytes',
+               'Execution Time（us）': 'exec_us'}
+WORKLOAD_ROWS = {'CPLR': 'cplr', 'Parallel Time (us) (8t)': 'parallel_us',
+                 'native opcode count': 'native_opcodes', 'CF': 'cf', 'CSE': 'cse',
+                 'DSE': 'dse', 'reduced opcode count': 'reduced_opcodes',
+                 'race execution (us)': 'race_us'}
+
+GO_BENCH_LINE = re.compile(r'^Benchmark(?P<name>\S+?)(?:-\d+)?\s+(?P<iters>\d+)\s+'
+                           r'(?P<ns>[\d.]+)\s+ns/op')
+
+
+def _normalize(name):
+    return re.sub(r'[^a-z0-9]', '', str(name).lower()).replace('v2', '')
+
+
+def canonical_workload(name):
+    """Map a sheet/benchmark name onto MICROBENCH_WORKLOADS (or keep it)."""
+    norm = _normalize(name)
+    for workload in MICROBENCH_WORKLOADS:
+        if _normalize(workload) == norm:
+            return workload
+    return str(name)
+
+
+def canonical_system(name):
+    """Map a column/benchmark name onto SYSTEMS (or keep it)."""
+    norm = _normalize(name)
+    if norm in SYSTEM_ALIASES:
+        return SYSTEM_ALIASES[norm]
+    for system in SYSTEMS:
+        if _normalize(system) == norm:
+            return system
+    return str(name)
+
+
+def _number(value):
+    try:
+        value = float(value)
+    except (TypeError, ValueError):
+        return None
+    return None if math.isnan(value) else value
+
+
+def read_workbook(path=WORKBOOK):
+    """
+    ({workload: {system: {metric: value}}}, {workload: {metric: value}})
+    from micro_benchmark.xlsx. Cells without a number ('\\', notes) are skipped.
+    """
+    from analysis.cache import read_sheet, sheet_names
+
+    per_system, per_workload = {}, {}
+    for sheet in sheet_names(path):
+        df = read_sheet(path, sheet)
+        workload = canonical_workload(sheet)
+        systems = [canonical_system(c) for c in df.columns[1:]]
+        for _, row in df.iterrows():
+            label = row.iloc[0]
+            if label in SYSTEM_ROWS:
+                for system, value in zip(systems, row.iloc[1:]):
+                    if _number(value) is not None:
+                        per_system.setdefault(workload, {}).setdefault(system, {})[
+                            SYSTEM_ROWS[label]] = _number(value)
+            elif label in WORKLOAD_ROWS and _number(row.iloc[1]) is not None:
+                per_workload.setdefault(workload, {})[WORKLOAD_ROWS[label]] = \
+                    _number(row.iloc[1])
+    return per_system, per_workload
+
+
+def read_criterion(root):
+    """{(workload, system): per-iteration times in us} from a criterion tree."""
+    samples = {}
+    for meta_path in glob.glob(os.path.join(root, '**', 'benchmark.json'), recursive=True):
+        sample_path = os.path.join(os.path.dirname(meta_path), 'sample.json')
+        if os.path.basename(os.path.dirname(meta_path)) != 'new' or \
+                not os.path.exists(sample_path):
+            continue
+        with open(meta_path) as f:
+            meta = json.load(f)
+        with open(sample_path) as f:
+            sample = json.load(f)
+        key = (canonical_workload(meta['group_id']), canonical_system(meta['function_id']))
+        samples[key] = np.asarray(sample['times']) / np.asarray(sample['iters']) / 1000
+    return samples
+
+
+def read_go_bench(path):
+    """{(workload, system): ns/op samples in us} from `go test -bench` output."""
+    samples = {}
+    with open(path) as f:
+        for line in f:
+            match = GO_BENCH_LINE.match(line.strip())
+            if not match:
+                continue
+            workload, _, system = match.group('name').partition('/')
+            key = (canonical_workload(workload), canonical_system(system or workload))
+            samples.setdefault(key, []).append(float(match.group('ns')) / 1000)
+    return {key: np.asarray(values) for key, values in samples.items()}
+
+
+def median_ci(sorted_x, confidence=0.95):
+    """Distribution-free CI for the median from binomial order statistics."""
+    n = sorted_x.size
+    alpha = (1 - confidence) / 2
+    if n > 1000:
+        z = {0.9: 1.6449, 0.95: 1.96, 0.99: 2.5758}.get(confidence, 1.96)
+        k = int(math.floor(n / 2 - z * math.sqrt(n) / 2))
+    else:
+        # Largest k with P(Binomial(n, 1/2) < k) <= alpha
+        cdf, k = 0.0, 0
+        while k < n and cdf + math.comb(n, k) / 2 ** n <= alpha:
+            cdf += math.comb(n, k) / 2 ** n
+            k += 1
+    if k < 1:
+        return float(sorted_x[0]), float(sorted_x[-1])
+    return float(sorted_x[k - 1]), float(sorted_x[n - k])
+
+
+def summarize_samples(samples, confidence=0.95, source=None):
+    """Median, MAD and median CI of one workload/system's timings (us)."""
+    x = np.sort(np.asarray(samples, dtype=np.float64))
+    median = float(np.median(x))
+    low, high = median_ci(x, confidence)
+    return {'median': median, 'mad': float(np.median(np.abs(x - median))),
+            'ci_low': low, 'ci_high': high, 'n': int(x.size), 'source': source}
+
+
+def load_microbench(sources=None, confidence=0.95):
+    """
+    Merge benchmark sources (default: the workbook) into
+    {'exec': {system: {workload: summary}}, 'system_metrics': {...},
+     'workload_metrics': {...}}.
+    """
+    exec_times, system_metrics, workload_metrics = {}, {}, {}
+    for source in sources or [WORKBOOK]:
+        if source.endswith('.xlsx'):
+            per_system, per_workload = read_workbook(source)
+            for workload, systems in per_system.items():
+                for system, metrics in systems.items():
+                    if 'exec_us' in metrics:
+                        exec_times.setdefault(system, {})[workload] = \
+                            summarize_samples([metrics['exec_us']], confidence, source)
+                    system_metrics.setdefault(system, {}).setdefault(workload, {}).update(
+                        {k: v for k, v in metrics.items() if k != 'exec_us'})
+            for workload, metrics in per_workload.items():
+                workload_metrics.setdefault(workload, {}).update(metrics)
+            continue
+        samples = read_criterion(source) if os.path.isdir(source) else read_go_bench(source)
+        for (workload, system), values in samples.items():
+            exec_times.setdefault(system, {})[workload] = \
+                summarize_samples(values, confidence, source)
+    return {'exec': exec_times, 'system_metrics': system_metrics,
+            'workload_metrics': workload_metrics}
+
+
+def cached_microbench(results=None, confidence=0.95):
+    """
+    load_microbench over the workbook and any raw results, served from the
+    results store (see analysis.results) while none of them changed.
+    """
+    from analysis.results import memoize
+
+    sources = [WORKBOOK] + list(results or [])
+    return memoize('microbench-sources', lambda: load_microbench(sources, confidence),
+                   sources, {'results': list(results or []), 'confidence': confidence})
+
+
+def exec_medians(bench, systems, workloads=MICROBENCH_WORKLOADS):
+    """{system: [median us per workload]} for the given systems."""
+    return {system: [bench['exec'][system][w]['median'] for w in workloads]
+            for system in systems}
+
+
+def _fixed(value, places):
+    """Round half up on the shortest decimal repr, as the hand-typed tables do."""
+    quantum = decimal.Decimal(1).scaleb(-places)
+    return str(decimal.Decimal(repr(float(value))).quantize(quantum, decimal.ROUND_HALF_UP))
+
+
+def _row(cells, widths):
+    """One aligned LaTeX table row (the last cell is not padded)."""
+    padded = [c.ljust(w) for c, w in zip(cells[:-1], widths)] + [cells[-1]]
+    return ' & '.join(padded) + ' \\\\'
+
+
+def _table(caption, label, columns, header, body):
+    return '\n'.join([
+        '\\begin{table}[t]',
+        '\\centering',
+        f'\\caption{{{caption}}}',
+        f'\\label{{{label}}}',
+        '\\small',
+        f'\\begin{{tabular*}}{{\\columnwidth}}{{@{{\\extracolsep{{\\fill}}}}{columns}}}',
+        '\\toprule',
+        *header,
+        '\\midrule',
+        *body,
+        '\\bottomrule',
+        '\\end{tabular*}',
+    ])
+
+
+def render_geth_vs_revm(bench, workloads=MICROBENCH_WORKLOADS):
+    """table/geth-vs-revm.tex: execution time of Geth- and Revm-based systems."""
+    times = exec_medians(bench, ['Geth Native', 'Forerunner-Geth', 'Revm Native'], workloads)
+    rows = [_row([system] + [_fixed(t, 2) for t in times[system]], [18, 6, 6])
+            for system in times]
+    header = ['\\textbf{System} & \\textbf{ERC20} & \\textbf{1hop} & \\textbf{4hop} \\\\',
+              '                & \\textbf{($\\mu$s)} & \\textbf{($\\mu$s)} & '
+              '\\textbf{($\\mu$s)} \\\\']
+    return _table('Execution Time: Geth-based vs. Revm-based Systems',
+                  'tab:substrate_comparison', 'lrrr', header,
+                  rows[:2] + ['\\midrule'] + rows[2:]) + '\n\\end{table}'
+
+
+def render_optimization_overhead(bench, workloads=MICROBENCH_WORKLOADS):
+    """table/optimization-overhead.tex: tracing time and artifact size."""
+    metrics = bench['system_metrics']
+    systems = ['Forerunner-Geth', 'Forerunner-Revm', 'Helios']
+    body = []
+    for title, metric, scale in [('Tracing Time ($\\mu$s)', 'tracing_us', 1),
+                                 ('Artifact Size (KB)', 'artifact_bytes', 1024)]:
+        if body:
+            body.append('\\midrule')
+        body.append(f'\\multicolumn{{6}}{{l}}{{\\textit{{{title}}}}} \\\\')
+        for workload in workloads:
+            geth, revm, helios = (metrics[s][workload][metric] for s in systems)
+            body.append(_row([workload, _fixed(geth / scale, 1), _fixed(revm / scale, 1),
+                              f'\\textbf{{{_fixed(helios / scale, 1)}}}',
+                              f'{_fixed(geth / helios, 1)}×', f'{_fixed(revm / helios, 1)}×'],
+                             [18, 6, 6, 14, 5]))
+    header = ['\\textbf{Benchmark} & \\multicolumn{2}{c}{\\textbf{Forerunner}} & '
+              '\\textbf{Helios} & \\multicolumn{2}{c}{\\textbf{Reduction}} \\\\',
+              '                   & \\textbf{Geth} & \\textbf{Revm} &  & '
+              '\\textbf{vs Geth} & \\textbf{vs Revm} \\\\']
+    return _table('Tracing Time and Artifact Storage Overhead',
+                  'tab:optimization_overhead', 'lrrrrr', header, body) + '\n\\end{table}'
+
+
+def render_opcode_reduction(bench, workloads=MICROBENCH_WORKLOADS):
+    """table/opcode-reduction.tex: eliminated opcodes and measured/predicted speedup."""
+    metrics = [bench['workload_metrics'][w] for w in workloads]
+    times = exec_medians(bench, ['Revm Native', 'Helios'], workloads)
+
+    def counts(label, values, width=26):
+        return _row([label] + [f'{int(v):,}' for v in values], [width, 6, 6])
+
+    eliminated = [m['cf'] + m['cse'] + m['dse'] for m in metrics]
+    body = [
+        counts('Native opcode count', [m['native_opcodes'] for m in metrics]),
+        '\\midrule',
+        '\\multicolumn{4}{l}{\\textit{Opcodes Eliminated}} \\\\',
+        counts('\\quad Constant Folding', [m['cf'] for m in metrics], 40),
+        counts('\\quad Common Subexpression Elimination', [m['cse'] for m in metrics], 54),
+        counts('\\quad Dead Code Elimination', [m['dse'] for m in metrics], 44),
+        '\\midrule',
+        counts('Total eliminated', eliminated),
+        _row(['Reduction rate'] + [f'{_fixed(e / m["native_opcodes"] * 100, 1)}\\%'
+                                   for e, m in zip(eliminated, metrics)], [26, 6, 6]),
+        '\\midrule',
+        _row(['\\textbf{Execution speedup}'] +
+             [f'\\textbf{{{_fixed(n / h, 2)}×}}' for n, h in zip(times['Revm Native'], times['Helios'])],
+             [26, 0, 0]),
+        _row(['\\textit{Predicted speedup}'] +
+             [f'\\textit{{{_fixed(m["native_opcodes"] / m["reduced_opcodes"], 2)}×}}' for m in metrics],
+             [27, 0, 0]),
+    ]
+    header = ['\\textbf{Metric} & \\textbf{ERC20} & \\textbf{1hop} & \\textbf{4hop} \\\\']
+    return _table('Opcode Reduction and Execution Speedup', 'tab:opcode_reduction',
+                  'lrrr', header, body) + '\n\\vspace{0.5em}\n\\end{table}'
+
+
+TABLES = {
+    'geth-vs-revm.tex': render_geth_vs_revm,
+    'optimization-overhead.tex': render_optimization_overhead,
+    'opcode-reduction.tex': render_opcode_reduction,
+}
+
+
+def write_tables(bench, table_dir=TABLE_DIR):
+    """Regenerate the microbenchmark tables; return the paths written."""
+    written = []
+    for name, render in TABLES.items():
+        path = os.path.join(table_dir, name)
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(render(bench))
+        written.append(path)
+    return written
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Microbenchmark statistics and tables')
+    parser.add_argument('sources', nargs='*',
+                        help='criterion directories or go test -bench output layered '
+                             'over micro-benchmark/micro_benchmark.xlsx')
+    parser.add_argument('--confidence', type=float, default=0.95)
+    parser.add_argument('--tables', action='store_true',
+                        help='rewrite the microbenchmark tables in table/')
+    args = parser.parse_args(argv)
+
+    bench = load_microbench([WORKBOOK] + args.sources, args.confidence)
+    if args.tables:
+        for path in write_tables(bench):
+            print(f"Wrote {os.path.relpath(path, REPO_DIR)}")
+        return 0
+    json.dump(bench, sys.stdout, indent=2, ensure_ascii=False)
+    sys.stdout.write('\n')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
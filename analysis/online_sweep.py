@@ -0,0 +1,152 @@
+"""
+Online speedup across a grid of path-frequency thresholds.
+
+    python -m analysis.online_sweep            # every block_stats_optim_f{N}.csv in e2e/
+    python -m analysis.online_sweep --json
+
+An Online run that only optimizes paths executed at least N times writes
+block_stats_optim_f{N}.csv. The unfiltered block_stats_optim.csv counts as
+threshold 1 and block_stats_optim_partial.csv as threshold 10, unless an
+f1/f10 file exists. For every threshold the report gives:
+
+  * the speedup histogram over the shared BINS (one row of the heatmap)
+  * speedup percentiles (the percentile-vs-threshold curves)
+  * storage, overhead and coverage from the matching row of
+    table/storage-coverage-tradeoff.tex, when that threshold is in the table
+
+The seq baseline is parsed and indexed once by a single SpeedupEngine.
+Each threshold then costs one cached column load, one merge-join and one
+histogram, so K thresholds scale as one baseline parse plus K light passes.
+"""
+
+import argparse
+import glob
+import json
+import os
+import re
+import sys
+
+import numpy as np
+
+from analysis.speedup import (BINS, DATA_DIR, LABELS, PERCENTILES, REPO_DIR, SpeedupEngine,
+                              block_stats_path, histogram, summarize)
+
+COVERAGE_TABLE = os.path.join(REPO_DIR, 'table', 'storage-coverage-tradeoff.tex')
+# Existing Online runs and the threshold they were filtered at
+FALLBACK_RUNS = {1: 'optim', 10: 'optim_partial'}
+
+_FILTER_RE = re.compile(r'block_stats_optim_f(\d+)\.csv$')
+_TABLE_ROW_RE = re.compile(r'^\$\\geq\$(\d+)[^&]*&\s*([\d.]+)\s*MB\s*&\s*([\d.]+)\\%\s*&'
+                           r'\s*([\d.]+)\\%\s*&\s*([\d.]+)\\%')
+
+
+def threshold_runs(data_dir=DATA_DIR):
+    """{threshold: block_stats path}, sorted by threshold."""
+    runs = {}
+    for path in glob.glob(os.path.join(data_dir, 'block_stats_optim_f*.csv')):
+        match = _FILTER_RE.search(os.path.basename(path))
+        if match:
+            runs[int(match.group(1))] = path
+    for threshold, mode in FALLBACK_RUNS.items():
+        path = block_stats_path(mode, data_dir)
+        if threshold not in runs and os.path.exists(path):
+            runs[threshold] = path
+    return dict(sorted(runs.items()))
+
+
+def coverage_table(path=COVERAGE_TABLE):
+    """{threshold: storage/overhead/coverage} rows of the storage-coverage table."""
+    rows = {}
+    try:
+        with open(path, encoding='utf-8') as f:
+            lines = f.read().splitlines()
+    except OSError:
+        return rows
+    for line in lines:
+        match = _TABLE_ROW_RE.match(line.strip())
+        if match:
+            threshold, *values = match.groups()
+            rows[int(threshold)] = dict(zip(['storage_mb', 'overhead_pct',
+                                             'exec_coverage_pct', 'top1_coverage_pct'],
+                                            map(float, values)))
+    return rows
+
+
+def sweep_stats(runs=None, data_dir=DATA_DIR, coverage=COVERAGE_TABLE, bins=BINS,
+                qs=PERCENTILES):
+    """
+    Histogram matrix (thresholds x bins, in percent), summary statistics and
+    coverage-table numbers for every threshold run.
+    """
+    runs = runs if runs is not None else threshold_runs(data_dir)
+    if not runs:
+        raise ValueError(f"no Online threshold runs in {data_dir}")
+    engine = SpeedupEngine(data_dir=data_dir)
+    table = coverage_table(coverage) if coverage else {}
+
+    thresholds = sorted(runs)
+    matrix = np.zeros((len(thresholds), len(bins) - 1))
+    summaries, storage = [], []
+    for row, threshold in enumerate(thresholds):
+        name = f'f{threshold}'
+        engine.attach(name, runs[threshold])
+        speedups = engine.speedups(name)
+        _, matrix[row] = histogram(speedups, bins=bins)
+        summary = summarize(speedups, qs)
+        summary['geomean'] = float(np.exp(np.mean(np.log(speedups))))
+        summaries.append(summary)
+        storage.append(table.get(threshold))
+
+    return {
+        'thresholds': thresholds,
+        'files': [os.path.basename(runs[t]) for t in thresholds],
+        'labels': LABELS if list(bins) == BINS else [f'{lo}-{hi}' for lo, hi in
+                                                     zip(bins[:-1], bins[1:])],
+        'percentages': matrix.tolist(),
+        'summary': summaries,
+        'percentiles': {f'p{q}': [s[f'p{q}'] for s in summaries] for q in qs},
+        'coverage': storage,
+    }
+
+
+def cached_sweep(data_dir=DATA_DIR):
+    """sweep_stats served from the results store (see analysis.results)."""
+    from analysis.results import memoize
+
+    runs = threshold_runs(data_dir)
+    inputs = [block_stats_path('seq', data_dir), *runs.values(), COVERAGE_TABLE]
+    return memoize('online-sweep', lambda: sweep_stats(runs, data_dir), inputs,
+                   {'runs': {str(t): os.path.basename(p) for t, p in runs.items()}})
+
+
+def format_report(stats):
+    lines = [f"{'threshold':>9} {'blocks':>7} {'p25':>6} {'p50':>6} {'p75':>6} {'p90':>6} "
+             f"{'p99':>7} {'geomean':>7} {'<1×':>6} {'storage':>9} {'exec cov':>8}"]
+    for i, threshold in enumerate(stats['thresholds']):
+        s, cov = stats['summary'][i], stats['coverage'][i]
+        storage = f"{cov['storage_mb']:.0f} MB" if cov else '-'
+        exec_cov = f"{cov['exec_coverage_pct']:.1f}%" if cov else '-'
+        lines.append(f"{'≥' + str(threshold):>9} {s['n']:>7,} {s['p25']:6.2f} {s['p50']:6.2f} "
+                     f"{s['p75']:6.2f} {s['p90']:6.2f} {s['p99']:7.2f} {s['geomean']:7.2f} "
+                     f"{stats['percentages'][i][0]:5.1f}% {storage:>9} {exec_cov:>8}")
+    return '\n'.join(lines)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--data-dir', default=DATA_DIR,
+                        help='directory with block_stats_seq.csv and the threshold runs')
+    parser.add_argument('--json', action='store_true')
+    args = parser.parse_args(argv)
+
+    stats = cached_sweep(args.data_dir)
+    if args.json:
+        json.dump(stats, sys.stdout, indent=2)
+        sys.stdout.write('\n')
+    else:
+        print(format_report(stats))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
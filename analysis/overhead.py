@@ -0,0 +1,316 @@
+"""
+Latency breakdown (Heavy Ops / Light Ops / System Overhead) from profiles.
+
+    python -m analysis.overhead --samples 'Native EVM' native-*.perf \
+        --samples 'Helios (SSA)' helios-counters.csv --iterations 100000
+
+Two kinds of profile are understood:
+
+  *.csv      per-handler counters: a name column (opcode, handler or
+             symbol) and a time column (ns, or cycles converted with
+             --ghz), plus optional run and iterations columns. Rows are
+             summed per (run, name).
+  otherwise  `perf script` text. Every sample is attributed to its leaf
+             frame and weighted by its period (cycles, converted with
+             --ghz); samples without a period count one --period each.
+             Each file is one run.
+
+Names are classified with a category map: for every category a list of
+case-insensitive fnmatch patterns, or a dict of component -> patterns when
+a category is broken down further (System Overhead is split into stack,
+gas-check, graph-node, ... components). The first matching pattern wins,
+in map order; unmatched names are reported as 'unclassified' rather than
+guessed. --map loads a JSON file of the same shape as CATEGORY_MAP.
+
+Time per iteration is the per-run total divided by the run's iteration
+count. The breakdown is the mean over runs with the sample standard
+deviation across runs. Files are read in a single streaming pass, and
+names are aggregated in chunks with np.unique and np.bincount, so each
+distinct name is classified only once.
+"""
+
+import argparse
+import fnmatch
+import json
+import re
+import sys
+
+import numpy as np
+
+CATEGORIES = ['heavy_ops', 'light_ops', 'overhead']
+CATEGORY_LABELS = {'heavy_ops': 'Heavy Ops (Keccak)', 'light_ops': 'Light Ops',
+                   'overhead': 'System Overhead'}
+UNCLASSIFIED = 'unclassified'
+
+CATEGORY_MAP = {
+    'heavy_ops': ['KECCAK256', 'SHA3', '*keccak*', '*sha3*'],
+    'light_ops': ['CALLER', 'MSTORE', 'MSTORE8', 'MLOAD', 'RETURN', 'GAS', 'CALLVALUE',
+                  'CALLDATALOAD', 'ADD', 'SUB', 'MUL', 'AND', 'OR', 'EQ', 'ISZERO',
+                  '*::caller*', '*::mstore*', '*::mload*', '*::ret*', '*::gas'],
+    'overhead': {
+        'stack': ['PUSH*', 'DUP*', 'SWAP*', 'POP', '*::stack::*', '*stack_push*',
+                  '*stack_pop*'],
+        'gas_check': ['GAS_CHECK', '*record_cost*', '*gas_check*', '*charge_gas*'],
+        'node': ['NODE', '*exec_node*', '*node_dispatch*'],
+        'input': ['INPUT', '*load_input*', '*resolve_input*'],
+        'reg': ['REG', '*register*'],
+        'chunk': ['CHUNK', '*chunk*'],
+        'dispatch': ['JUMP*', '*dispatch*', '*::step*', '*run_interpreter*'],
+    },
+}
+
+CHUNK_SAMPLES = 1 << 16
+NAME_COLUMNS = ['opcode', 'handler', 'symbol', 'name']
+# Sample header: comm (column 0 with -g, right-padded to 16 otherwise), tid,
+# [cpu], time:, optional period, event:, then the symbol unless a callchain follows
+PERF_HEADER = re.compile(r'^\S.*?\s\d+\.\d+:\s+(?:(\d+)\s+)?\S+:\s*(.*?)\s*$')
+PERF_FRAME = re.compile(r'^\s*(?:[0-9a-fA-F]+\s+)?(.*?)(?:\+0x[0-9a-fA-F]+)?(?:\s+\(.*\))?\s*$')
+
+
+class Classifier:
+    """Name -> (category, component) through a category map, memoized."""
+
+    def __init__(self, category_map=CATEGORY_MAP):
+        self.rules = []
+        for category, patterns in category_map.items():
+            if isinstance(patterns, dict):
+                for component, pats in patterns.items():
+                    self.rules.extend((p.lower(), category, component) for p in pats)
+            else:
+                self.rules.extend((p.lower(), category, category) for p in patterns)
+        self.memo = {}
+
+    def __call__(self, name):
+        key = name.lower()
+        if key not in self.memo:
+            self.memo[key] = next(((category, component)
+                                   for pattern, category, component in self.rules
+                                   if fnmatch.fnmatchcase(key, pattern)),
+                                  (UNCLASSIFIED, UNCLASSIFIED))
+        return self.memo[key]
+
+
+def load_category_map(path):
+    with open(path, encoding='utf-8') as f:
+        return json.load(f)
+
+
+class NameTotals:
+    """Streaming sum of time per name, aggregated a chunk at a time."""
+
+    def __init__(self):
+        self.totals = {}
+        self.names, self.weights = [], []
+
+    def add(self, name, weight):
+        self.names.append(name)
+        self.weights.append(weight)
+        if len(self.names) >= CHUNK_SAMPLES:
+            self.flush()
+
+    def add_many(self, names, weights):
+        uniques, inverse = np.unique(np.asarray(names, dtype=str), return_inverse=True)
+        sums = np.bincount(inverse.ravel(), weights=np.asarray(weights, dtype=np.float64),
+                           minlength=uniques.size)
+        for name, total in zip(uniques.tolist(), sums.tolist()):
+            self.totals[name] = self.totals.get(name, 0.0) + total
+
+    def flush(self):
+        if self.names:
+            self.add_many(self.names, self.weights)
+            self.names, self.weights = [], []
+        return self.totals
+
+
+def read_perf_script(path, ghz, period=1.0):
+    """
+    [({leaf symbol: ns}, None)]: a `perf script` export is a single run.
+    With callchains (perf record -g) the leaf is the first frame line under
+    a sample; without them it is the symbol on the sample line itself.
+    """
+    totals = NameTotals()
+    samples = 0
+    weight, inline, leaf_pending = None, None, False
+
+    def add(text):
+        m = PERF_FRAME.match(text)
+        totals.add(m.group(1) if m and m.group(1) else text.split()[-1], weight / ghz)
+
+    with open(path, encoding='utf-8', errors='replace') as f:
+        for line in f:
+            if not line.strip():
+                if leaf_pending and inline:
+                    add(inline)
+                leaf_pending = False
+                continue
+            m = PERF_HEADER.match(line.lstrip())
+            if m:
+                if leaf_pending and inline:
+                    add(inline)
+                weight = float(m.group(1)) if m.group(1) else period
+                inline, leaf_pending = m.group(2), True
+                samples += 1
+                continue
+            if leaf_pending and line[0].isspace():
+                add(line)
+                leaf_pending = False
+    if leaf_pending and inline:
+        add(inline)
+    if not samples:
+        raise ValueError(f"{path}: no perf script samples found")
+    return [(totals.flush(), None)]
+
+
+def read_counters(path, ghz, chunk_rows=1 << 20):
+    """[({name: ns}, iterations or None) per run] of a per-handler counter CSV."""
+    import pandas as pd
+
+    runs, iterations = {}, {}
+    for df in pd.read_csv(path, chunksize=chunk_rows):
+        name_col = next((c for c in NAME_COLUMNS if c in df.columns), None)
+        if name_col is None:
+            raise ValueError(f"{path}: needs one of the columns {', '.join(NAME_COLUMNS)}")
+        if 'ns' in df.columns:
+            ns = df['ns'].to_numpy(dtype=np.float64)
+        elif 'cycles' in df.columns:
+            ns = df['cycles'].to_numpy(dtype=np.float64) / ghz
+        else:
+            raise ValueError(f"{path}: needs an ns or cycles column")
+        run = df['run'].to_numpy() if 'run' in df.columns else np.zeros(len(df), dtype=np.int64)
+        names = df[name_col].astype(str).to_numpy()
+        for r in np.unique(run).tolist():
+            rows = run == r
+            runs.setdefault(r, NameTotals()).add_many(names[rows], ns[rows])
+            if 'iterations' in df.columns:
+                iterations[r] = float(df['iterations'].to_numpy()[rows][0])
+    return [(totals.flush(), iterations.get(r)) for r, totals in runs.items()]
+
+
+def read_profile(path, ghz=1.0, period=1.0):
+    """Per-run name totals of one profile file."""
+    if path.endswith('.csv'):
+        return read_counters(path, ghz)
+    return read_perf_script(path, ghz, period)
+
+
+def classify_run(totals, classifier, iterations):
+    """({category: ns/iter}, {(category, component): ns/iter}, {unclassified name: ns/iter})."""
+    categories, components, unknown = {}, {}, {}
+    for name, ns in totals.items():
+        category, component = classifier(name)
+        ns /= iterations
+        categories[category] = categories.get(category, 0.0) + ns
+        components[category, component] = components.get((category, component), 0.0) + ns
+        if category == UNCLASSIFIED:
+            unknown[name] = ns
+    return categories, components, unknown
+
+
+def _mean_std(per_run):
+    values = np.asarray(per_run, dtype=np.float64)
+    std = float(values.std(ddof=1)) if values.size > 1 else 0.0
+    return float(values.mean()), std
+
+
+def breakdown(profiles, category_map=CATEGORY_MAP, iterations=None, ghz=1.0, period=1.0):
+    """
+    Stacked breakdown from {label: [profile paths]}, in the layout of
+    analysis.stats.overhead_stats plus standard deviations, run counts,
+    per-component means and the largest unclassified names.
+    """
+    classifier = Classifier(category_map)
+    result = {'labels': list(profiles), 'ns': {c: [] for c in CATEGORIES},
+              'std_ns': {c: [] for c in CATEGORIES}, 'total_ns': [], 'total_std_ns': [],
+              'runs': [], 'components': [], 'unclassified_ns': [], 'unclassified': []}
+    for label, paths in profiles.items():
+        runs = [run for path in paths for run in read_profile(path, ghz, period)]
+        per_category = {c: [] for c in CATEGORIES + [UNCLASSIFIED]}
+        per_component, unknown = {}, {}
+        for totals, run_iterations in runs:
+            n = run_iterations or iterations
+            if not n:
+                raise ValueError(f"{label}: iteration count unknown (use --iterations)")
+            categories, components, missing = classify_run(totals, classifier, n)
+            for category, values in per_category.items():
+                values.append(categories.get(category, 0.0))
+            for key, ns in components.items():
+                per_component[key] = per_component.get(key, 0.0) + ns / len(runs)
+            for name, ns in missing.items():
+                unknown[name] = unknown.get(name, 0.0) + ns / len(runs)
+        for category in CATEGORIES:
+            mean, std = _mean_std(per_category[category])
+            result['ns'][category].append(mean)
+            result['std_ns'][category].append(std)
+        mean, std = _mean_std(np.sum([per_category[c] for c in CATEGORIES], axis=0))
+        result['total_ns'].append(mean)
+        result['total_std_ns'].append(std)
+        result['runs'].append(len(runs))
+        result['components'].append({f'{category}.{component}': ns for (category, component), ns
+                                     in sorted(per_component.items())
+                                     if category != UNCLASSIFIED})
+        result['unclassified_ns'].append(_mean_std(per_category[UNCLASSIFIED])[0])
+        result['unclassified'].append(dict(sorted(unknown.items(), key=lambda kv: -kv[1])[:10]))
+    return result
+
+
+def render_table(stats):
+    """table/overhead-breakdown.tex for a two-system breakdown."""
+    (native, helios) = stats['labels'][:2]
+    reductions = [(n - h) / n * 100 if n else 0.0
+                  for n, h in (stats['ns'][c][:2] for c in CATEGORIES)]
+    best = int(np.argmax(reductions))
+    rows = []
+    for i, category in enumerate(CATEGORIES):
+        n, h = stats['ns'][category][:2]
+        reduction = f'{reductions[i]:.1f}\\%'
+        if i == best:
+            reduction = f'\\textbf{{{reduction}}}'
+        rows.append(f'{CATEGORY_LABELS[category]:<18} & {n:<6.2f} & {h:<6.2f} & {reduction} \\\\')
+    return '\n'.join([
+        '\\begin{table}[t]',
+        '\\centering',
+        '\\caption{Micro-architectural latency breakdown of a hash-intensive workload '
+        '(ns per iteration).}',
+        '\\label{tab:overhead-breakdown}',
+        '\\begin{tabular}{lrrr}',
+        '\\toprule',
+        f'\\textbf{{Component}} & \\textbf{{{native.split(" (")[0]}}} & '
+        f'\\textbf{{{helios.split(" (")[0]}}} & \\textbf{{Reduction}} \\\\',
+        '\\midrule',
+        *rows,
+        '\\bottomrule',
+        '\\end{tabular}',
+        '\\end{table}',
+    ]) + '\n'
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Latency breakdown from profiler samples')
+    parser.add_argument('--samples', nargs='+', action='append', required=True,
+                        metavar=('LABEL', 'PATH'),
+                        help='system label followed by its profile files (repeatable)')
+    parser.add_argument('--map', help='JSON category map (default: CATEGORY_MAP)')
+    parser.add_argument('--iterations', type=float,
+                        help='workload iterations per run (unless the CSV has them)')
+    parser.add_argument('--ghz', type=float, default=1.0,
+                        help='clock rate converting cycles to ns (default: 1, i.e. ns)')
+    parser.add_argument('--period', type=float, default=1.0,
+                        help='weight of perf samples that carry no period')
+    parser.add_argument('--table', metavar='PATH', help='also write the LaTeX table')
+    args = parser.parse_args(argv)
+
+    if any(len(group) < 2 for group in args.samples):
+        parser.error('--samples needs a label and at least one file')
+    profiles = {group[0]: group[1:] for group in args.samples}
+    category_map = load_category_map(args.map) if args.map else CATEGORY_MAP
+    stats = breakdown(profiles, category_map, args.iterations, args.ghz, args.period)
+    if args.table:
+        with open(args.table, 'w', encoding='utf-8') as f:
+            f.write(render_table(stats))
+    json.dump(stats, sys.stdout, indent=2)
+    sys.stdout.write('\n')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
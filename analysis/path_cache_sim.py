@@ -0,0 +1,229 @@
+"""
+Reference simulator for the Path Mapping Layer (PML) online lookup.
+
+    python -m analysis.path_cache_sim records.npz --policy unique
+
+Replays recorded (CallSig, PathDigest) frame executions in order through
+the semantics of algorithm/online-lookup.tex and
+algorithm/path-frequency-update.tex:
+
+  * lookup: an unseen CallSig is a cold miss; otherwise the PathStore's
+    maximum-frequency bucket is consulted and, under the default 'unique'
+    policy, a prediction is made only if exactly one PathDigest holds the
+    maximum frequency (ambiguous otherwise);
+  * the prediction is a hit if it equals the executed PathDigest and a
+    guard miss otherwise;
+  * feedback: the executed PathDigest's frequency is incremented.
+
+Alternative tie-breaking policies predict even when the maximum is shared:
+'first' keeps the path that reached the maximum first, 'recent' the path
+that reached it most recently, 'lowest' the numerically smallest digest.
+
+The vectorized engine sorts executions by (CallSig, time) once and derives
+every PathStore state with segmented cumulative operations, so millions of
+executions replay in seconds. simulate_sequential() is a literal
+dict-and-bucket implementation of the two algorithms, used to cross-check.
+The GML layer is assumed warm (every predicted path has its artifacts).
+"""
+
+import argparse
+import json
+import sys
+
+import numpy as np
+
+from analysis.records import factorize, load_path_records
+
+POLICIES = ['unique', 'first', 'recent', 'lowest']
+OUTCOMES = ['hit', 'guard_miss', 'ambiguous', 'cold']
+HIT, GUARD_MISS, AMBIGUOUS, COLD = range(4)
+
+
+def _segment_last(mask, group_start):
+    """Index of the last position <= i where mask holds (mask must hold at group starts)."""
+    idx = np.where(mask | group_start, np.arange(mask.size), 0)
+    return np.maximum.accumulate(idx)
+
+
+def simulate(call_sig, path_digest, policy='unique'):
+    """
+    Replay executions in order; return per-execution outcome codes
+    (HIT, GUARD_MISS, AMBIGUOUS, COLD) and predicted path codes (-1 when
+    no prediction was made) in the original order.
+    """
+    if policy not in POLICIES:
+        raise ValueError(f"unknown policy {policy!r}; choose from {POLICIES}")
+    sig, _ = factorize(call_sig)
+    path, _ = factorize(path_digest)
+    n = sig.size
+    if not n:
+        return np.empty(0, dtype=np.int8), np.empty(0, dtype=np.int64)
+
+    # Work in (CallSig, time) order: each PathStore is one contiguous segment
+    order = np.lexsort((np.arange(n), sig))
+    s, p = sig[order], path[order]
+    group_start = np.r_[True, s[1:] != s[:-1]]
+    group = np.cumsum(group_start) - 1
+
+    # Frequency of the executed path after its feedback update
+    pair = s * (int(path.max()) + 1) + p
+    pair_order = np.lexsort((np.arange(n), pair))
+    pair_sorted = pair[pair_order]
+    pair_start = np.flatnonzero(np.r_[True, pair_sorted[1:] != pair_sorted[:-1]])
+    run_start = np.repeat(pair_start, np.diff(np.r_[pair_start, n]))
+    freq_after = np.empty(n, dtype=np.int64)
+    freq_after[pair_order] = np.arange(n) - run_start + 1
+
+    # Running maximum frequency within each PathStore
+    big = n + 1
+    max_after = np.maximum.accumulate(freq_after + group * big) - group * big
+    max_before = np.r_[0, max_after[:-1]]
+    max_before[group_start] = 0
+
+    # A path joins the max bucket when it reaches the max; a strict increase
+    # starts a new max bucket containing only that path
+    reach = freq_after == max_after
+    strict = freq_after > max_before
+    last_strict = _segment_last(strict, group_start)
+    reach_count = np.cumsum(reach)
+    ties_after = reach_count - reach_count[last_strict] + 1
+
+    if policy in ('unique', 'first'):
+        leader_after = p[last_strict]
+    elif policy == 'recent':
+        leader_after = p[_segment_last(reach, group_start)]
+    else:
+        # Segmented running minimum of path codes over the current max bucket
+        segment = np.cumsum(strict)
+        offset = segment * big
+        values = np.where(reach, p, big - 1) - offset
+        leader_after = np.minimum.accumulate(values) + offset
+
+    # The lookup for execution i sees the store after execution i-1
+    leader = np.r_[-1, leader_after[:-1]]
+    ties = np.r_[0, ties_after[:-1]]
+    outcome = np.where(leader == p, HIT, GUARD_MISS).astype(np.int8)
+    if policy == 'unique':
+        outcome[ties > 1] = AMBIGUOUS
+        leader = np.where(ties > 1, -1, leader)
+    outcome[group_start] = COLD
+    leader[group_start] = -1
+
+    result_outcome = np.empty(n, dtype=np.int8)
+    result_leader = np.empty(n, dtype=np.int64)
+    result_outcome[order] = outcome
+    result_leader[order] = leader
+    return result_outcome, result_leader
+
+
+class PathStore:
+    """M_freq / I_sorted pair for one CallSig (sequential reference)."""
+
+    def __init__(self):
+        self.freq = {}
+        self.buckets = {}
+        self.order = {}
+        self.clock = 0
+
+    def lookup(self, policy):
+        f_max = max(self.buckets)
+        paths = self.buckets[f_max]
+        if policy == 'unique':
+            return next(iter(paths)) if len(paths) == 1 else None
+        if policy == 'first':
+            return min(paths, key=lambda d: self.order[d])
+        if policy == 'recent':
+            return max(paths, key=lambda d: self.order[d])
+        return min(paths)
+
+    def update(self, digest):
+        f_old = self.freq.get(digest, 0)
+        if f_old:
+            self.buckets[f_old].discard(digest)
+            if not self.buckets[f_old]:
+                del self.buckets[f_old]
+        self.buckets.setdefault(f_old + 1, set()).add(digest)
+        self.freq[digest] = f_old + 1
+        self.clock += 1
+        self.order[digest] = self.clock
+
+
+def simulate_sequential(call_sig, path_digest, policy='unique'):
+    """Literal per-execution replay; same return values as simulate()."""
+    sig, _ = factorize(call_sig)
+    path, _ = factorize(path_digest)
+    stores = {}
+    outcome = np.empty(sig.size, dtype=np.int8)
+    leader = np.full(sig.size, -1, dtype=np.int64)
+    for i, (s, p) in enumerate(zip(sig.tolist(), path.tolist())):
+        store = stores.get(s)
+        if store is None:
+            outcome[i] = COLD
+            store = stores[s] = PathStore()
+        else:
+            predicted = store.lookup(policy)
+            if predicted is None:
+                outcome[i] = AMBIGUOUS
+            else:
+                leader[i] = predicted
+                outcome[i] = HIT if predicted == p else GUARD_MISS
+        store.update(p)
+    return outcome, leader
+
+
+def summarize_outcomes(outcome, call_sig=None, top=20, labels=None):
+    """
+    Overall outcome counts/rates and, optionally, the worst CallSigs. When
+    call_sig holds factorized codes, labels (see load_path_records) maps them
+    back to the CallSig strings that are reported.
+    """
+    counts = np.bincount(outcome, minlength=len(OUTCOMES))
+    total = int(outcome.size)
+    summary = {'executions': total}
+    for code, name in enumerate(OUTCOMES):
+        summary[name] = int(counts[code])
+        summary[f'{name}_rate'] = float(counts[code] / total) if total else 0.0
+
+    if call_sig is not None:
+        sig, uniques = factorize(call_sig)
+        per_sig = np.zeros((uniques.size, len(OUTCOMES)), dtype=np.int64)
+        np.add.at(per_sig, (sig, outcome), 1)
+        executions = per_sig.sum(axis=1)
+        lost = executions - per_sig[:, HIT]
+        worst = np.argsort(-lost, kind='stable')[:top]
+        summary['worst_call_sigs'] = [
+            dict({'call_sig': (str(labels[uniques[i]]) if labels is not None
+                               else int(uniques[i])),
+                  'executions': int(executions[i])},
+                 **{name: int(per_sig[i, code]) for code, name in enumerate(OUTCOMES)})
+            for i in worst
+        ]
+    return summary
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Replay CallSig->PathDigest records through the PML')
+    parser.add_argument('records', help='.csv or .npz execution records (see analysis.records)')
+    parser.add_argument('--policy', choices=POLICIES + ['all'], default='unique')
+    parser.add_argument('--top', type=int, default=20,
+                        help='CallSigs with the most non-hits to report')
+    parser.add_argument('--sequential', action='store_true',
+                        help='use the slow literal PathStore replay')
+    args = parser.parse_args(argv)
+
+    records, labels = load_path_records(args.records, columns=['tx', 'entry_point',
+                                                               'path_digest'], labels=True)
+    engine = simulate_sequential if args.sequential else simulate
+    policies = POLICIES if args.policy == 'all' else [args.policy]
+    out = {}
+    for policy in policies:
+        outcome, _ = engine(records['entry_point'], records['path_digest'], policy)
+        out[policy] = summarize_outcomes(outcome, records['entry_point'], args.top,
+                                         labels.get('entry_point'))
+    json.dump(out, sys.stdout, indent=2)
+    sys.stdout.write('\n')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
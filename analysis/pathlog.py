@@ -0,0 +1,105 @@
+"""
+Binary PathLog dumps: the Path Tracer's per-frame traces, as consumed by
+the reference optimizer (analysis.ssa_opt).
+
+Records use the framing of analysis.ssa_dump (24-byte header, then the
+payload) with magic 0x474f4c48 ('HLOG') and the header count field
+holding the number of entries. The payload is (little-endian):
+
+    u32  native_opcodes        opcodes executed, DUP/SWAP included
+    u32  dep_count
+    u32  chunk_count
+    u32  indptr[entries + 1]   D_in of entry i is deps[indptr[i]:indptr[i + 1]]
+    u32  deps[dep_count]       LSNs (entry indices) in pop order
+    u32  chunk_entry[chunk_count]   delimiter entry closing each GasChunk
+    u64  chunk_gas[chunk_count]     its accumulated static gas
+    u8   opcodes[entries]
+    u8   immediates[32 * pushes]    big-endian PUSH values, in entry order
+    u32  synthetic             (optional) entries the tracer added that were
+                               never executed, e.g. a closing STOP; 0 if absent
+
+An entry's LSN is its index. DUP and SWAP only permute the shadow stack,
+so they never become entries; dependencies always point backwards.
+"""
+
+import mmap
+import os
+import struct
+
+import numpy as np
+
+from analysis.evm import IS_PUSH
+from analysis.ssa_dump import HEADER, iter_records
+
+PATHLOG_MAGIC = 0x474f4c48
+COUNTS = struct.Struct('<III')
+SYNTHETIC = struct.Struct('<I')
+
+
+def encode_pathlog(log):
+    """Payload bytes of a PathLog dict (see decode_pathlog for its keys)."""
+    opcodes = np.asarray(log['opcodes'], dtype=np.uint8)
+    deps = np.asarray(log['deps'], dtype='<u4')
+    chunk_entry = np.asarray(log.get('chunk_entry', ()), dtype='<u4')
+    chunk_gas = np.asarray(log.get('chunk_gas', ()), dtype='<u8')
+    immediates = np.asarray(log['immediates'], dtype=np.uint8).reshape(-1, 32)
+    if immediates.shape[0] != int(IS_PUSH[opcodes].sum()):
+        raise ValueError('one 32-byte immediate is needed per PUSH entry')
+    synthetic = int(log.get('synthetic_entries', 0))
+    return b''.join([
+        COUNTS.pack(int(log.get('native_opcodes', opcodes.size)), deps.size, chunk_entry.size),
+        np.asarray(log['indptr'], dtype='<u4').tobytes(), deps.tobytes(),
+        chunk_entry.tobytes(), chunk_gas.tobytes(), opcodes.tobytes(), immediates.tobytes(),
+        SYNTHETIC.pack(synthetic) if synthetic else b'',
+    ])
+
+
+def decode_pathlog(buf, offset, entries, payload_len):
+    """
+    PathLog dict of one payload: native_opcodes, indptr, deps, chunk_entry,
+    chunk_gas, opcodes, immediates (pushes x 32 bytes), all copied, and
+    synthetic_entries.
+    """
+    native, dep_count, chunk_count = COUNTS.unpack_from(buf, offset)
+    pos = offset + COUNTS.size
+    log = {'native_opcodes': native}
+    for name, dtype, count in [('indptr', '<u4', entries + 1), ('deps', '<u4', dep_count),
+                               ('chunk_entry', '<u4', chunk_count),
+                               ('chunk_gas', '<u8', chunk_count),
+                               ('opcodes', np.uint8, entries)]:
+        size = np.dtype(dtype).itemsize * count
+        if pos + size > offset + payload_len:
+            raise ValueError(f"PathLog payload at offset {offset} is truncated")
+        log[name] = np.frombuffer(buf, dtype=dtype, count=count, offset=pos).copy()
+        pos += size
+    pushes = int(IS_PUSH[log['opcodes']].sum())
+    if pos + 32 * pushes > offset + payload_len:
+        raise ValueError(f"PathLog payload at offset {offset} is truncated")
+    log['immediates'] = np.frombuffer(buf, dtype=np.uint8, count=32 * pushes,
+                                      offset=pos).reshape(pushes, 32).copy()
+    pos += 32 * pushes
+    log['synthetic_entries'] = SYNTHETIC.unpack_from(buf, pos)[0] \
+        if pos + SYNTHETIC.size <= offset + payload_len else 0
+    return log
+
+
+def write_pathlogs(path, logs, mode='wb'):
+    """Write (path_digest, PathLog dict) pairs as a dump."""
+    with open(path, mode) as f:
+        for digest, log in logs:
+            payload = encode_pathlog(log)
+            f.write(HEADER.pack(PATHLOG_MAGIC, len(log['opcodes']), len(payload),
+                                int(digest) & (2**64 - 1)))
+            f.write(payload)
+
+
+def iter_pathlogs(path, start=0, end=None):
+    """(path_digest, PathLog dict) of every record whose header starts in [start, end)."""
+    with open(path, 'rb') as f:
+        size = os.fstat(f.fileno()).st_size
+        if not size:
+            return
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            for pos, entries, payload_len, digest in iter_records(
+                    mm, start, size if end is None else end, size, PATHLOG_MAGIC):
+                yield digest, decode_pathlog(mm, pos + HEADER.size, entries, payload_len)
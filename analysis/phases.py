@@ -0,0 +1,330 @@
+"""
+Phase-level timing of the analysis and plot scripts.
+
+    python -m analysis.build -f --trace            # every figure, traced
+    python -m analysis.phases                      # rank the slowest phases
+    python -m analysis.phases --by name --top 10   # totals per phase name
+
+Tracing is off unless HELIOS_TRACE names a directory, and then each script
+writes one JSON trace there when it exits. A trace holds the script's
+phases in order. Each phase records:
+
+  * wall time, and self time (wall minus nested phases)
+  * rows processed, when the code reports them
+  * process peak RSS at the end, and how much the phase raised it
+  * with HELIOS_PROFILE=1, a cProfile dump per top-level phase
+
+Phases come from three places:
+
+  * checkpoint('draw') in the scripts closes the previous top-level phase
+    and opens the next one
+  * `with phase('parse x.csv', rows=n)` in the shared library code (CSV
+    parsing, joins, statistics)
+  * matplotlib's savefig and tight_layout, wrapped automatically
+    ('savefig <file>', 'tight_layout')
+
+Time before the tracer was imported (interpreter start and imports such
+as matplotlib) is recorded as 'startup' where /proc makes that possible.
+When tracing is off, phase() and checkpoint() do nothing beyond a call.
+"""
+
+import argparse
+import atexit
+import contextlib
+import cProfile
+import glob
+import json
+import os
+import re
+import sys
+import time
+
+TRACE_ENV = 'HELIOS_TRACE'
+PROFILE_ENV = 'HELIOS_PROFILE'
+
+try:
+    import resource
+except ImportError:  # not on Windows
+    resource = None
+
+
+def peak_rss_mb():
+    """Peak resident set size of this process so far, in MB (None if unknown)."""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # kilobytes on Linux, bytes on macOS
+    return peak / (1 << 20) if sys.platform == 'darwin' else peak / 1024
+
+
+def _process_age():
+    """Seconds since this process started, from /proc (None elsewhere)."""
+    try:
+        with open('/proc/self/stat') as f:
+            start_ticks = int(f.read().rsplit(')', 1)[1].split()[19])
+        with open('/proc/uptime') as f:
+            uptime = float(f.read().split()[0])
+        return max(0.0, uptime - start_ticks / os.sysconf('SC_CLK_TCK'))
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+def script_name(argv0=None):
+    """Trace name of a script: its path relative to the repo, flattened."""
+    path = os.path.abspath(argv0 or sys.argv[0] or 'interactive')
+    repo = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    rel = os.path.relpath(path, repo) if path.startswith(repo + os.sep) else os.path.basename(path)
+    return re.sub(r'[^A-Za-z0-9_.-]+', '-', os.path.splitext(rel)[0]).strip('-')
+
+
+class Tracer:
+    """Stack of open phases and the list of finished ones."""
+
+    def __init__(self, trace_dir, profile=False, name=None):
+        self.trace_dir = trace_dir
+        self.profile = profile
+        self.name = name or script_name()
+        self.started = time.perf_counter()
+        self.wall_started = time.time()
+        self.stack = []
+        self.phases = []
+        self.checkpoint_open = False
+        age = _process_age()
+        if age is not None:
+            self.phases.append({'name': 'startup', 'depth': 0, 'wall_s': age, 'self_s': age,
+                                'rows': None, 'peak_rss_mb': peak_rss_mb(),
+                                'rss_growth_mb': None})
+
+    def push(self, name, rows=None):
+        frame = {'name': name, 'start': time.perf_counter(), 'children': 0.0, 'rows': rows,
+                 'rss': peak_rss_mb(), 'profiler': None}
+        if self.profile and not self.stack:
+            frame['profiler'] = cProfile.Profile()
+            frame['profiler'].enable()
+        self.stack.append(frame)
+        return frame
+
+    def pop(self):
+        frame = self.stack.pop()
+        if frame['profiler'] is not None:
+            frame['profiler'].disable()
+        wall = time.perf_counter() - frame['start']
+        if self.stack:
+            self.stack[-1]['children'] += wall
+        rss = peak_rss_mb()
+        record = {'name': frame['name'], 'depth': len(self.stack), 'wall_s': wall,
+                  'self_s': wall - frame['children'], 'rows': frame['rows'],
+                  'peak_rss_mb': rss,
+                  'rss_growth_mb': rss - frame['rss'] if rss is not None else None}
+        if frame['profiler'] is not None:
+            path = os.path.join(self.trace_dir,
+                                f"{self.name}.{len(self.phases)}-"
+                                f"{re.sub(r'[^A-Za-z0-9_.-]+', '_', frame['name'])}.prof")
+            frame['profiler'].dump_stats(path)
+            record['profile'] = os.path.basename(path)
+        self.phases.append(record)
+
+    def add_rows(self, rows):
+        if self.stack:
+            frame = self.stack[-1]
+            frame['rows'] = (frame['rows'] or 0) + int(rows)
+
+    def checkpoint(self, name, rows=None):
+        if self.checkpoint_open:
+            while len(self.stack) > 1:
+                self.pop()
+            self.pop()
+        self.checkpoint_open = True
+        self.push(name, rows)
+
+    def close(self):
+        while self.stack:
+            self.pop()
+        self.checkpoint_open = False
+
+    def trace(self):
+        return {
+            'script': self.name,
+            'argv': sys.argv[1:],
+            'started': self.wall_started,
+            'total_s': time.perf_counter() - self.started +
+            (self.phases[0]['wall_s'] if self.phases and self.phases[0]['name'] == 'startup'
+             else 0.0),
+            'peak_rss_mb': peak_rss_mb(),
+            'phases': self.phases,
+        }
+
+    def write(self):
+        self.close()
+        os.makedirs(self.trace_dir, exist_ok=True)
+        path = os.path.join(self.trace_dir, f'{self.name}.json')
+        tmp = f'{path}.{os.getpid()}.tmp'
+        with open(tmp, 'w') as f:
+            json.dump(self.trace(), f, indent=1)
+        os.replace(tmp, path)
+        return path
+
+
+_TRACER = None
+_PATCHED = False
+
+
+def _tracer():
+    """The process tracer, created on first use while HELIOS_TRACE is set."""
+    global _TRACER
+    if _TRACER is None:
+        trace_dir = os.environ.get(TRACE_ENV)
+        if not trace_dir:
+            return None
+        os.makedirs(trace_dir, exist_ok=True)
+        _TRACER = Tracer(trace_dir, os.environ.get(PROFILE_ENV, '') not in ('', '0'))
+        atexit.register(_TRACER.write)
+    _patch_matplotlib()
+    return _TRACER
+
+
+def _patch_matplotlib():
+    """Record Figure.savefig and tight_layout as phases once matplotlib is loaded."""
+    global _PATCHED
+    if _PATCHED or 'matplotlib.figure' not in sys.modules:
+        return
+    from matplotlib.figure import Figure
+
+    savefig, tight_layout = Figure.savefig, Figure.tight_layout
+
+    def traced_savefig(self, fname, *args, **kwargs):
+        label = os.path.basename(fname) if isinstance(fname, (str, os.PathLike)) else 'buffer'
+        with phase(f'savefig {label}'):
+            return savefig(self, fname, *args, **kwargs)
+
+    def traced_tight_layout(self, *args, **kwargs):
+        with phase('tight_layout'):
+            return tight_layout(self, *args, **kwargs)
+
+    Figure.savefig, Figure.tight_layout = traced_savefig, traced_tight_layout
+    _PATCHED = True
+
+
+@contextlib.contextmanager
+def _traced(tracer, name, rows):
+    tracer.push(name, rows)
+    try:
+        yield
+    finally:
+        tracer.pop()
+
+
+def phase(name, rows=None):
+    """Context manager timing one (possibly nested) phase."""
+    tracer = _tracer()
+    if tracer is None:
+        return contextlib.nullcontext()
+    return _traced(tracer, name, rows)
+
+
+def checkpoint(name, rows=None):
+    """End the current top-level phase of a script and start `name`."""
+    tracer = _tracer()
+    if tracer is not None:
+        tracer.checkpoint(name, rows)
+
+
+def add_rows(rows):
+    """Credit rows to the innermost open phase."""
+    tracer = _tracer()
+    if tracer is not None:
+        tracer.add_rows(rows)
+
+
+def load_traces(trace_dir):
+    traces = []
+    for path in sorted(glob.glob(os.path.join(trace_dir, '*.json'))):
+        try:
+            with open(path) as f:
+                traces.append(json.load(f))
+        except (OSError, ValueError):
+            continue
+    return traces
+
+
+def rank_phases(traces, by='phase', top=20):
+    """
+    Slowest phases across traces by self time: every (script, phase) pair,
+    or totals per phase name with by='name', where the per-file savefig
+    phases are collapsed into one 'savefig' row.
+    """
+    rows = {}
+    for trace in traces:
+        for p in trace['phases']:
+            name = p['name']
+            if by == 'name':
+                if name.startswith('savefig '):
+                    name = 'savefig'
+                key = (name,)
+            else:
+                key = (trace['script'], name)
+            row = rows.setdefault(key, {'script': None if by == 'name' else trace['script'],
+                                        'phase': name, 'calls': 0, 'wall_s': 0.0,
+                                        'self_s': 0.0, 'rows': 0, 'peak_rss_mb': 0.0,
+                                        'scripts': set()})
+            row['calls'] += 1
+            row['wall_s'] += p['wall_s']
+            row['self_s'] += p['self_s']
+            row['rows'] += p['rows'] or 0
+            row['peak_rss_mb'] = max(row['peak_rss_mb'], p['peak_rss_mb'] or 0.0)
+            row['scripts'].add(trace['script'])
+    ranked = sorted(rows.values(), key=lambda r: -r['self_s'])[:top]
+    for row in ranked:
+        row['scripts'] = len(row['scripts'])
+    return ranked
+
+
+def _fit(label, width):
+    """label cut to width from the left, so file names and suffixes stay visible."""
+    return label if len(label) <= width else '…' + label[-(width - 1):]
+
+
+def format_report(traces, ranked, by='phase'):
+    total = sum(t['total_s'] for t in traces)
+    lines = [f"{len(traces)} traces, {total:.2f}s total"]
+    for t in sorted(traces, key=lambda t: -t['total_s']):
+        lines.append(f"  {t['script']:<44} {t['total_s']:7.2f}s  peak {t['peak_rss_mb'] or 0:7.1f} MB")
+    lines.append('')
+    header = ('phase' if by == 'name' else 'script / phase')
+    lines.append(f"{header:<58} {'self s':>8} {'wall s':>8} {'share':>6} {'rows':>11} {'calls':>5}")
+    for r in ranked:
+        label = r['phase'] if by == 'name' else f"{r['script']}: {r['phase']}"
+        rows = f"{r['rows']:,}" if r['rows'] else '-'
+        lines.append(f"{_fit(label, 58):<58} {r['self_s']:8.3f} {r['wall_s']:8.3f} "
+                     f"{r['self_s'] / total * 100 if total else 0:5.1f}% {rows:>11} {r['calls']:>5}")
+    return '\n'.join(lines)
+
+
+def main(argv=None):
+    from analysis.cache import CACHE_DIR
+
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('trace_dir', nargs='?', default=os.path.join(CACHE_DIR, 'traces'),
+                        help='directory of JSON traces (default: .analysis-cache/traces)')
+    parser.add_argument('--by', choices=['phase', 'name'], default='phase',
+                        help="rank each script's phases, or totals per phase name")
+    parser.add_argument('--top', type=int, default=20)
+    parser.add_argument('--json', action='store_true')
+    args = parser.parse_args(argv)
+
+    traces = load_traces(args.trace_dir)
+    if not traces:
+        print(f"No traces in {args.trace_dir}; run with {TRACE_ENV}=<dir> "
+              "or python -m analysis.build --trace", file=sys.stderr)
+        return 1
+    ranked = rank_phases(traces, args.by, args.top)
+    if args.json:
+        json.dump({'traces': traces, 'ranked': ranked}, sys.stdout, indent=2)
+        sys.stdout.write('\n')
+    else:
+        print(format_report(traces, ranked, args.by))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
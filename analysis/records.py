@@ -0,0 +1,97 @@
+"""
+Loader for raw per-execution path records exported from reth.
+
+One record per frame execution, in execution order:
+
+    block_number  (optional) block the execution belongs to
+    tx            transaction hash or id
+    entry_point   CallSig / EntryPoint the frame was entered through
+    path_digest   PathDigest of the executed path
+    artifact_bytes (optional) size of the path's cached artifact
+
+Records come either as a CSV with those column names (hashes as hex
+strings or integers) or as a .npz with one uint64 array per column. Hash
+columns are returned as int64 codes: hex strings are factorized,
+integer columns are kept as their 64-bit values. Either way a column
+can be joined with np.unique or np.bincount directly. With labels=True
+the original value of every factorized code is returned as well, for
+reports that name a CallSig or PathDigest.
+"""
+
+import numpy as np
+
+KEY_COLUMNS = ['tx', 'entry_point', 'path_digest']
+OPTIONAL_COLUMNS = ['block_number', 'artifact_bytes']
+
+
+def _as_key(values):
+    """
+    Turn a hash column into int64 keys: (keys, labels), where labels[code]
+    is the original string of a factorized code and None for integer columns.
+    """
+    values = np.asarray(values)
+    if values.dtype.kind in 'iu':
+        return values.astype(np.uint64).view(np.int64), None
+    import pandas as pd
+
+    codes, uniques = pd.factorize(values)
+    return codes.astype(np.int64), np.asarray(uniques, dtype=object)
+
+
+def load_path_records(path, columns=None, labels=False):
+    """
+    Load execution records from a .csv or .npz file as a dict of arrays.
+    Key columns are int64; block_number and artifact_bytes are int64.
+    With labels=True, return (records, {column: labels}) where labels maps
+    the codes of each factorized key column back to its original strings.
+    """
+    wanted = list(columns) if columns else KEY_COLUMNS + OPTIONAL_COLUMNS
+    if path.endswith('.npz'):
+        with np.load(path) as data:
+            raw = {col: data[col] for col in wanted if col in data.files}
+    else:
+        import pandas as pd
+
+        header = pd.read_csv(path, nrows=0).columns
+        raw = {col: series.to_numpy() for col, series in
+               pd.read_csv(path, usecols=[c for c in wanted if c in header]).items()}
+
+    missing = [col for col in KEY_COLUMNS if col in wanted and col not in raw]
+    if missing:
+        raise ValueError(f"{path} is missing record column(s): {', '.join(missing)}")
+
+    records, key_labels = {}, {}
+    for col, values in raw.items():
+        if col in KEY_COLUMNS:
+            records[col], col_labels = _as_key(values)
+            if col_labels is not None:
+                key_labels[col] = col_labels
+        else:
+            records[col] = np.asarray(values, dtype=np.int64)
+    return (records, key_labels) if labels else records
+
+
+def save_path_records(path, records):
+    """Write records as a compressed .npz (the fast input format)."""
+    np.savez_compressed(path, **{col: np.asarray(values) for col, values in records.items()})
+
+
+def factorize(keys):
+    """Dense 0..k-1 codes for 64-bit keys: (codes, unique_keys)."""
+    uniques, codes = np.unique(keys, return_inverse=True)
+    return codes.astype(np.int64), uniques
+
+
+def group_ranks(groups, counts):
+    """
+    Rank of each item within its group by descending count (0 = most
+    frequent; ties go to the lower item index). groups and counts are
+    parallel arrays over items.
+    """
+    order = np.lexsort((np.arange(groups.size), -counts, groups))
+    sorted_groups = groups[order]
+    starts = np.flatnonzero(np.r_[True, sorted_groups[1:] != sorted_groups[:-1]])
+    run_start = np.repeat(starts, np.diff(np.r_[starts, sorted_groups.size]))
+    ranks = np.empty(groups.size, dtype=np.int64)
+    ranks[order] = np.arange(groups.size) - run_start
+    return ranks
@@ -0,0 +1,300 @@
+"""
+Repeated runs per configuration, and noise-aware comparisons between them.
+
+    python -m analysis.repeats seq                  # run-to-run dispersion of seq
+    python -m analysis.repeats seq optim --top 10   # speedup of optim over seq
+
+A configuration may have N repeated runs, block_stats_<mode>.run1.csv ...
+block_stats_<mode>.runN.csv, next to (or instead of) block_stats_<mode>.csv;
+a mode without run files is its single CSV. All runs are aligned by block
+in one pass: their block numbers are concatenated, np.unique assigns each
+a row, and the timings are scattered into a (blocks x runs) matrix with
+NaN where a run skipped a block -- no pairwise merges.
+
+Per block the report gives the median time and its dispersion as a robust
+coefficient of variation, 1.4826 * MAD / median. A block is flagged as
+noisy when that exceeds --threshold (default 20%), or when its slowest run
+takes more than --spike (default 2) times its fastest -- the robust CV
+alone would hide a single run that jumps from 38 ms to 4 s.
+
+Comparing two configurations (speedup = base / target) works on per-block
+log ratios of median times, paired by block:
+
+  * each block's ratio gets a standard error from its runs' MAD of log
+    time, and counts as an improvement or regression only when it clears
+    the confidence bound; otherwise it is within noise
+  * the geometric-mean speedup comes with a normal-approximation interval
+    over blocks
+  * a Wilcoxon signed-rank test (normal approximation with tie correction)
+    tells whether target is faster or slower than base at all
+"""
+
+import argparse
+import glob
+import json
+import math
+import os
+import re
+import sys
+from statistics import NormalDist
+
+import numpy as np
+
+from analysis.cache import block_stats_columns
+from analysis.speedup import DATA_DIR, block_stats_path, merge_join
+
+RUN_SUFFIX = re.compile(r'\.run(\d+)\.csv$')
+MAD_SCALE = 1.4826
+# Asymptotic efficiency of the median: its standard error is ~1.2533 sigma / sqrt(n)
+MEDIAN_SE = math.sqrt(math.pi / 2)
+
+
+def run_paths(mode, data_dir=DATA_DIR):
+    """block_stats_<mode>.run<k>.csv ordered by k, else [block_stats_<mode>.csv]."""
+    pattern = os.path.join(glob.escape(data_dir), f'block_stats_{glob.escape(mode)}.run*.csv')
+    runs = [(int(m.group(1)), path) for path in glob.glob(pattern)
+            if (m := RUN_SUFFIX.search(path))]
+    if runs:
+        return [path for _, path in sorted(runs)]
+    return [block_stats_path(mode, data_dir)]
+
+
+class RunSet:
+    """
+    N runs of one configuration aligned by block: times[i, r] is run r's
+    elapsed ms for blocks[i], NaN if the run did not execute it.
+    """
+
+    def __init__(self, paths, name=None):
+        self.paths = list(paths)
+        self.name = name
+        columns = [block_stats_columns(path) for path in self.paths]
+        blocks = np.concatenate([np.asarray(c['block_number'], dtype=np.int64)
+                                 for c in columns])
+        run = np.repeat(np.arange(len(columns)), [c['block_number'].size for c in columns])
+        self.blocks, row = np.unique(blocks, return_inverse=True)
+        self.times = np.full((self.blocks.size, len(columns)), np.nan)
+        self.times[row, run] = np.concatenate([c['elapsed_time_ms'] for c in columns])
+
+    @classmethod
+    def from_mode(cls, mode, data_dir=DATA_DIR):
+        return cls(run_paths(mode, data_dir), mode)
+
+    @property
+    def n_runs(self):
+        return self.times.shape[1]
+
+    def counts(self):
+        """Runs that executed each block."""
+        return np.sum(~np.isnan(self.times), axis=1)
+
+    def medians(self):
+        return np.nanmedian(self.times, axis=1)
+
+    def dispersion(self):
+        """Robust coefficient of variation, 1.4826 * MAD / median (NaN below 2 runs)."""
+        median = self.medians()
+        mad = np.nanmedian(np.abs(self.times - median[:, None]), axis=1)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            cv = MAD_SCALE * mad / median
+        return np.where(self.counts() >= 2, cv, np.nan)
+
+    def log_se(self):
+        """Standard error of each block's log median time (NaN below 2 runs)."""
+        with np.errstate(divide='ignore'):
+            logs = np.log(self.times)
+        mad = np.nanmedian(np.abs(logs - np.nanmedian(logs, axis=1)[:, None]), axis=1)
+        n = self.counts()
+        with np.errstate(invalid='ignore', divide='ignore'):
+            se = MEDIAN_SE * MAD_SCALE * mad / np.sqrt(n)
+        return np.where(n >= 2, se, np.nan)
+
+    def spread(self):
+        """Slowest over fastest run of each block (NaN below 2 runs)."""
+        with np.errstate(invalid='ignore', divide='ignore'):
+            ratio = np.nanmax(self.times, axis=1) / np.nanmin(self.times, axis=1)
+        return np.where(self.counts() >= 2, ratio, np.nan)
+
+    def noisy(self, threshold=0.2, spike=2.0):
+        """Blocks whose robust CV exceeds threshold or whose max/min run ratio exceeds spike."""
+        return (self.dispersion() > threshold) | (self.spread() > spike)
+
+    def report(self, threshold=0.2, spike=2.0, top=10):
+        """Run counts, dispersion quantiles and the noisiest blocks."""
+        cv = self.dispersion()
+        spread = self.spread()
+        measured = ~np.isnan(cv)
+        noisy = np.flatnonzero(self.noisy(threshold, spike))
+        noisy = noisy[np.argsort(-spread[noisy], kind='stable')]
+        times = self.times[noisy[:top]]
+        return {
+            'name': self.name,
+            'runs': self.n_runs,
+            'blocks': int(self.blocks.size),
+            'complete_blocks': int(np.sum(self.counts() == self.n_runs)),
+            'dispersion': ({f'p{q}': float(v) for q, v in
+                            zip([50, 90, 99], np.percentile(cv[measured], [50, 90, 99]))}
+                           if measured.any() else None),
+            'threshold': threshold,
+            'spike': spike,
+            'noisy_blocks': int(noisy.size),
+            'noisy_pct': float(noisy.size / self.blocks.size * 100) if self.blocks.size else 0.0,
+            'noisiest': [{'block_number': int(self.blocks[i]), 'median_ms': float(m),
+                          'min_ms': float(lo), 'max_ms': float(hi), 'dispersion': float(cv[i]),
+                          'spread': float(spread[i])}
+                         for i, m, lo, hi in zip(noisy[:top], self.medians()[noisy[:top]],
+                                                 np.nanmin(times, axis=1) if times.size else [],
+                                                 np.nanmax(times, axis=1) if times.size else [])],
+        }
+
+
+def _average_ranks(x):
+    """Ranks 1..n of x with ties given their average rank."""
+    order = np.argsort(x, kind='stable')
+    _, first, counts = np.unique(x[order], return_index=True, return_counts=True)
+    ranks = np.empty(x.size)
+    ranks[order] = np.repeat(first + (counts + 1) / 2, counts)
+    return ranks, counts
+
+
+def wilcoxon_signed_rank(d):
+    """
+    Two-sided Wilcoxon signed-rank test of paired differences d against zero
+    (zeros dropped, normal approximation with tie correction).
+    Returns (W+, z, p).
+    """
+    d = np.asarray(d, dtype=np.float64)
+    d = d[d != 0]
+    n = d.size
+    if n == 0:
+        return 0.0, 0.0, 1.0
+    ranks, ties = _average_ranks(np.abs(d))
+    w_plus = float(ranks[d > 0].sum())
+    mean = n * (n + 1) / 4
+    var = n * (n + 1) * (2 * n + 1) / 24 - float(np.sum(ties ** 3 - ties)) / 48
+    if var <= 0:
+        return w_plus, 0.0, 1.0
+    z = (w_plus - mean) / math.sqrt(var)
+    return w_plus, z, math.erfc(abs(z) / math.sqrt(2))
+
+
+def compare(base, target, confidence=0.95, exclude=None, top=10):
+    """
+    Noise-aware speedup of target over base (two RunSets), paired by block.
+    exclude=(threshold, spike) leaves out blocks noisy in either configuration.
+    """
+    base_idx, target_idx = merge_join(base.blocks, target.blocks)
+    if exclude is not None:
+        keep = ~(base.noisy(*exclude)[base_idx] | target.noisy(*exclude)[target_idx])
+        base_idx, target_idx = base_idx[keep], target_idx[keep]
+    if not base_idx.size:
+        raise ValueError(f"No blocks shared by {base.name} and {target.name}")
+    blocks = base.blocks[base_idx]
+    base_ms, target_ms = base.medians()[base_idx], target.medians()[target_idx]
+    d = np.log(base_ms) - np.log(target_ms)
+    se = np.hypot(base.log_se()[base_idx], target.log_se()[target_idx])
+
+    z_crit = NormalDist().inv_cdf(0.5 + confidence / 2)
+    measured = ~np.isnan(se)
+    improved = measured & (d > z_crit * se)
+    regressed = measured & (-d > z_crit * se)
+    half = z_crit * float(np.std(d, ddof=1)) / math.sqrt(d.size) if d.size > 1 else math.nan
+    mean = float(np.mean(d))
+    w_plus, z, p = wilcoxon_signed_rank(d)
+
+    worst = np.flatnonzero(regressed)
+    worst = worst[np.argsort(d[worst], kind='stable')][:top]
+    return {
+        'base': base.name, 'target': target.name,
+        'runs': [base.n_runs, target.n_runs],
+        'blocks': int(d.size),
+        'confidence': confidence,
+        'geomean_speedup': math.exp(mean),
+        'geomean_ci': [math.exp(mean - half), math.exp(mean + half)],
+        'median_speedup': float(np.exp(np.median(d))),
+        'measured_blocks': int(measured.sum()),
+        'improved': int(improved.sum()),
+        'regressed': int(regressed.sum()),
+        'within_noise': int(measured.sum() - improved.sum() - regressed.sum()),
+        'wilcoxon': {'w_plus': w_plus, 'z': z, 'p': p},
+        'regressions': [{'block_number': int(blocks[i]), 'base_ms': float(base_ms[i]),
+                         'target_ms': float(target_ms[i]), 'speedup': float(np.exp(d[i])),
+                         'low': float(np.exp(d[i] - z_crit * se[i])),
+                         'high': float(np.exp(d[i] + z_crit * se[i]))} for i in worst],
+    }
+
+
+def format_runs(report):
+    lines = [f"{report['name']}: {report['runs']} runs, {report['blocks']:,} blocks "
+             f"({report['complete_blocks']:,} in every run)"]
+    if report['dispersion'] is None:
+        lines.append('  single run: no run-to-run dispersion')
+        return '\n'.join(lines)
+    disp = report['dispersion']
+    lines.append(f"  dispersion (robust CV): P50 {disp['p50']:.1%}, P90 {disp['p90']:.1%}, "
+                 f"P99 {disp['p99']:.1%}")
+    lines.append(f"  noisy (CV > {report['threshold']:.0%} or max/min > {report['spike']:g}): "
+                 f"{report['noisy_blocks']:,} blocks ({report['noisy_pct']:.1f}%)")
+    for b in report['noisiest']:
+        lines.append(f"    {b['block_number']}: median {b['median_ms']:.2f} ms, "
+                     f"range {b['min_ms']:.2f}-{b['max_ms']:.2f} ms ({b['spread']:.1f}×), "
+                     f"CV {b['dispersion']:.0%}")
+    return '\n'.join(lines)
+
+
+def format_comparison(c):
+    w = c['wilcoxon']
+    lines = [f"{c['target']} vs {c['base']} ({c['runs'][1]} vs {c['runs'][0]} runs, "
+             f"{c['blocks']:,} blocks):",
+             f"  geomean speedup {c['geomean_speedup']:.2f}× "
+             f"[{c['geomean_ci'][0]:.2f}, {c['geomean_ci'][1]:.2f}] at {c['confidence']:.0%}, "
+             f"median {c['median_speedup']:.2f}×",
+             f"  Wilcoxon signed-rank: z = {w['z']:.2f}, p = {w['p']:.3g}"]
+    if c['measured_blocks']:
+        lines.append(f"  per block, beyond noise: {c['improved']:,} faster, "
+                     f"{c['regressed']:,} slower, {c['within_noise']:,} within noise")
+        for r in c['regressions']:
+            lines.append(f"    {r['block_number']}: {r['base_ms']:.2f} -> {r['target_ms']:.2f} ms, "
+                         f"{r['speedup']:.2f}× [{r['low']:.2f}, {r['high']:.2f}]")
+    else:
+        lines.append('  per-block noise bounds need at least 2 runs of each configuration')
+    return '\n'.join(lines)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('configs', nargs='+', metavar='MODE',
+                        help='one mode to report its dispersion, or base and target to compare')
+    parser.add_argument('--data-dir', default=DATA_DIR, help='directory of block_stats files')
+    parser.add_argument('--threshold', type=float, default=0.2,
+                        help='robust CV above which a block is noisy (default: 0.2)')
+    parser.add_argument('--spike', type=float, default=2.0,
+                        help='max/min run ratio above which a block is noisy (default: 2)')
+    parser.add_argument('--exclude-noisy', action='store_true',
+                        help='leave noisy blocks out of the comparison')
+    parser.add_argument('--confidence', type=float, default=0.95)
+    parser.add_argument('--top', type=int, default=10, help='blocks to list')
+    parser.add_argument('--json', action='store_true')
+    args = parser.parse_args(argv)
+    if len(args.configs) > 2:
+        parser.error('give one mode, or a base and a target mode')
+
+    runs = [RunSet.from_mode(mode, args.data_dir) for mode in args.configs]
+    result = {'runs': [r.report(args.threshold, args.spike, args.top) for r in runs]}
+    if len(runs) == 2:
+        result['comparison'] = compare(runs[0], runs[1], args.confidence,
+                                       (args.threshold, args.spike) if args.exclude_noisy
+                                       else None, args.top)
+    if args.json:
+        json.dump(result, sys.stdout, indent=2)
+        sys.stdout.write('\n')
+        return 0
+    parts = [format_runs(r) for r in result['runs']]
+    if 'comparison' in result:
+        parts.append(format_comparison(result['comparison']))
+    print('\n\n'.join(parts))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,203 @@
+"""
+Persistent store of computed statistics, so tables and figures regenerate
+without touching the raw data.
+
+    python -m analysis.results                 # list stored results
+    python -m analysis.results --clear [NAME]  # drop all (or one analysis's)
+
+Results live in a SQLite database under the analysis cache, keyed by
+(analysis, input digest, parameters). The input digest is a SHA-256 over
+the contents of every input file plus the analysis/ sources, so editing
+the code or the data invalidates exactly the results that depend on it.
+File hashes are remembered by size and mtime, so a warm lookup only
+stat()s its inputs and reads one row. Values are stored as JSON, and a
+miss returns the same JSON round trip as a hit. HELIOS_NO_CACHE=1
+bypasses the store like the column cache.
+"""
+
+import argparse
+import glob
+import hashlib
+import json
+import os
+import sqlite3
+import sys
+import time
+
+import numpy as np
+
+from analysis.cache import CACHE_DIR, cache_disabled, file_digest
+from analysis.phases import phase
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DB_PATH = os.environ.get('HELIOS_RESULTS_DB', os.path.join(CACHE_DIR, 'results.sqlite'))
+
+# Bump when the key or the value encoding changes
+STORE_VERSION = 1
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS files (
+    path TEXT PRIMARY KEY,
+    size INTEGER NOT NULL,
+    mtime_ns INTEGER NOT NULL,
+    sha256 TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS results (
+    analysis TEXT NOT NULL,
+    inputs TEXT NOT NULL,
+    params TEXT NOT NULL,
+    value TEXT NOT NULL,
+    seconds REAL NOT NULL,
+    created REAL NOT NULL,
+    PRIMARY KEY (analysis, inputs, params)
+);
+"""
+
+
+def code_files():
+    """Sources every stored result depends on."""
+    return sorted(glob.glob(os.path.join(REPO_DIR, 'analysis', '*.py')))
+
+
+def expand_inputs(paths):
+    """Absolute, sorted input files; directories contribute every file below them."""
+    files = set()
+    for path in paths:
+        path = os.path.abspath(path)
+        if os.path.isdir(path):
+            for root, _, names in os.walk(path):
+                files.update(os.path.join(root, name) for name in names)
+        else:
+            files.add(path)
+    return sorted(files)
+
+
+def _default(value):
+    if isinstance(value, np.ndarray):
+        return value.tolist()
+    if isinstance(value, np.generic):
+        return value.item()
+    if isinstance(value, (set, frozenset)):
+        return sorted(value)
+    raise TypeError(f"{type(value).__name__} is not JSON serializable")
+
+
+def encode(value):
+    return json.dumps(value, default=_default, ensure_ascii=False)
+
+
+class ResultStore:
+    """SQLite-backed memo table of analysis results."""
+
+    def __init__(self, path=DB_PATH):
+        self.path = path
+        self._db = None
+
+    @property
+    def db(self):
+        if self._db is None:
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+            # Figures build concurrently: wait out other writers
+            self._db = sqlite3.connect(self.path, timeout=30)
+            self._db.execute('PRAGMA journal_mode=WAL')
+            self._db.executescript(SCHEMA)
+        return self._db
+
+    def close(self):
+        if self._db is not None:
+            self._db.close()
+            self._db = None
+
+    def file_sha256(self, path):
+        """Content hash of path, recomputed only when its size or mtime changed."""
+        st = os.stat(path)
+        row = self.db.execute('SELECT size, mtime_ns, sha256 FROM files WHERE path = ?',
+                              (path,)).fetchone()
+        if row and row[0] == st.st_size and row[1] == st.st_mtime_ns:
+            return row[2]
+        digest = file_digest(path)
+        with self.db:
+            self.db.execute('INSERT OR REPLACE INTO files VALUES (?, ?, ?, ?)',
+                            (path, st.st_size, st.st_mtime_ns, digest))
+        return digest
+
+    def inputs_digest(self, paths):
+        """SHA-256 over the analysis sources and the contents of paths."""
+        h = hashlib.sha256(f'v{STORE_VERSION}\0'.encode('ascii'))
+        for path in code_files() + expand_inputs(paths):
+            h.update(os.path.relpath(path, REPO_DIR).encode('utf-8') + b'\0')
+            h.update(self.file_sha256(path).encode('ascii') if os.path.exists(path)
+                     else b'missing')
+        return h.hexdigest()
+
+    def memoize(self, analysis, compute, inputs=(), params=None):
+        """
+        Stored result of compute() for (analysis, inputs, params), running
+        it only on a miss. params must be JSON-serializable.
+        """
+        with phase(f'result {analysis}'):
+            return self._memoize(analysis, compute, inputs, params)
+
+    def _memoize(self, analysis, compute, inputs, params):
+        key = (analysis, self.inputs_digest(inputs), encode(params or {}))
+        row = self.db.execute('SELECT value FROM results WHERE analysis = ? AND inputs = ? '
+                              'AND params = ?', key).fetchone()
+        if row is not None:
+            return json.loads(row[0])
+        start = time.perf_counter()
+        with phase(f'compute {analysis}'):
+            value = encode(compute())
+        with self.db:
+            self.db.execute('INSERT OR REPLACE INTO results VALUES (?, ?, ?, ?, ?, ?)',
+                            key + (value, time.perf_counter() - start, time.time()))
+        return json.loads(value)
+
+    def entries(self):
+        """(analysis, params, bytes, compute seconds, created) of every stored result."""
+        return self.db.execute('SELECT analysis, params, length(value), seconds, created '
+                               'FROM results ORDER BY analysis, created').fetchall()
+
+    def clear(self, analyses=None):
+        """Drop every stored result, or those of the given analyses; returns the count."""
+        with self.db:
+            if not analyses:
+                return self.db.execute('DELETE FROM results').rowcount
+            return sum(self.db.execute('DELETE FROM results WHERE analysis = ?',
+                                       (name,)).rowcount for name in analyses)
+
+
+_STORE = None
+
+
+def memoize(analysis, compute, inputs=(), params=None):
+    """ResultStore.memoize on the shared store (plain compute() when caching is off)."""
+    global _STORE
+    if cache_disabled():
+        with phase(f'compute {analysis}'):
+            return json.loads(encode(compute()))
+    if _STORE is None:
+        _STORE = ResultStore()
+    return _STORE.memoize(analysis, compute, inputs, params)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--clear', nargs='*', metavar='NAME',
+                        help='drop stored results (default: all analyses)')
+    parser.add_argument('--db', default=DB_PATH, help=f'store path (default: {DB_PATH})')
+    args = parser.parse_args(argv)
+
+    store = ResultStore(args.db)
+    if args.clear is not None:
+        print(f"Dropped {store.clear(args.clear)} stored results")
+        return 0
+    entries = store.entries()
+    for analysis, params, size, seconds, created in entries:
+        stamp = time.strftime('%Y-%m-%d %H:%M', time.localtime(created))
+        print(f"{analysis:<22} {stamp}  {size:>9,} B  {seconds:8.3f}s  {params}")
+    print(f"{len(entries)} stored results in {os.path.relpath(args.db, REPO_DIR)}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,238 @@
+"""
+Rolling-window speedup series over block_number, with change points.
+
+    python -m analysis.rolling                  # deter, optim, optim_partial
+    python -m analysis.rolling optim -w 200 --json
+
+The histograms collapse a run into one distribution; this keeps block
+order to show how speedup evolves as the Path Cache warms up. For every
+window of `w` consecutive joined blocks the series holds the P10/P25/P50/
+P75/P90 speedup (np.percentile's linear interpolation), reported at the
+window's last block.
+
+Quantiles are not recomputed per window. The blocks are cut into chunks of
+w, and every window starting in chunk c lies inside chunks c and c+1. Each
+chunk pair's 2w values are ranked once. A Fenwick tree over those ranks
+then slides across the pair, removing one block and adding the next, and
+answers each order statistic by binary descent in O(log w). All pairs are
+advanced in lockstep as rows of one array, so the whole series costs
+O(n log w) work in O(w log w) vectorized steps.
+
+Change points are found on per-block log speedups by binary segmentation
+for shifts in mean. Every split must reduce the squared error by more than
+a BIC-style penalty, 2 sigma^2 ln n, where sigma comes from the MAD of first
+differences so it is robust to the shifts themselves. The series is taken
+as stable from the last change point on.
+"""
+
+import argparse
+import json
+import math
+import sys
+
+import numpy as np
+
+from analysis.speedup import SpeedupEngine, block_stats_path
+
+MODES = ['deter', 'optim', 'optim_partial']
+MODE_LABELS = {'deter': 'Replay', 'optim': 'Online', 'optim_partial': 'Online (filtered)'}
+ROLLING_PERCENTILES = [10, 25, 50, 75, 90]
+DEFAULT_WINDOW = 100
+
+
+def _fenwick_add(tree, rows, ranks, delta):
+    """Add delta at 0-based rank ranks[i] in row rows[i] of a stack of Fenwick trees."""
+    size = tree.shape[1] - 1
+    pos = ranks + 1
+    while True:
+        live = pos <= size
+        if not live.any():
+            return
+        tree[rows[live], pos[live]] += delta
+        pos = pos + (pos & -pos)
+
+
+def _fenwick_kth(tree, rows, k):
+    """0-based rank of the k-th smallest (0-based) element in every row."""
+    size = tree.shape[1] - 1
+    pos = np.zeros(rows.size, dtype=np.int64)
+    remaining = np.full(rows.size, k + 1, dtype=np.int64)
+    step = 1 << (size.bit_length() - 1)
+    while step:
+        nxt = pos + step
+        counts = tree[rows, np.minimum(nxt, size)]
+        take = (nxt <= size) & (counts < remaining)
+        pos = np.where(take, nxt, pos)
+        remaining -= np.where(take, counts, 0)
+        step >>= 1
+    return pos
+
+
+def rolling_quantiles(values, window, qs=ROLLING_PERCENTILES):
+    """
+    Percentiles qs of every window values[i:i + window], as an array of shape
+    (len(values) - window + 1, len(qs)), equal to np.percentile per window.
+    """
+    x = np.asarray(values, dtype=np.float64)
+    w = int(window)
+    if w < 1:
+        raise ValueError("window must be at least 1")
+    if x.size < w:
+        raise ValueError(f"{x.size} values are fewer than the window of {w}")
+    n_windows = x.size - w + 1
+    n_rows = -(-n_windows // w)
+
+    # Row c holds the chunk pair x[c*w : c*w + 2w]; padding is never queried
+    padded = np.full((n_rows + 1) * w, np.inf)
+    padded[:x.size] = x
+    pairs = np.lib.stride_tricks.sliding_window_view(padded, 2 * w)[::w]
+    order = np.argsort(pairs, axis=1, kind='stable')
+    ordered = np.take_along_axis(pairs, order, axis=1)
+    rank = np.empty_like(order)
+    np.put_along_axis(rank, order, np.broadcast_to(np.arange(2 * w), order.shape), axis=1)
+
+    # Fenwick trees over each row's ranks, holding the row's first chunk
+    rows = np.arange(n_rows)
+    counts = np.zeros((n_rows, 2 * w + 1), dtype=np.int64)
+    counts[rows[:, None], rank[:, :w] + 1] = 1
+    prefix = np.cumsum(counts, axis=1)
+    idx = np.arange(1, 2 * w + 1)
+    tree = np.zeros_like(counts)
+    tree[:, 1:] = prefix[:, idx] - prefix[:, idx - (idx & -idx)]
+
+    h = (w - 1) * np.asarray(qs, dtype=np.float64) / 100
+    lo = np.floor(h).astype(np.int64)
+    hi = np.minimum(lo + 1, w - 1)
+    frac = h - lo
+    ks = np.union1d(lo, hi)
+    out = np.empty((n_rows, w, len(qs)))
+    with np.errstate(invalid='ignore'):
+        for t in range(w):
+            kth = {k: ordered[rows, _fenwick_kth(tree, rows, k)] for k in ks.tolist()}
+            for j in range(len(qs)):
+                a, b = kth[lo[j]], kth[hi[j]]
+                out[:, t, j] = a + frac[j] * (b - a)
+            if t < w - 1:
+                _fenwick_add(tree, rows, rank[:, t], -1)
+                _fenwick_add(tree, rows, rank[:, w + t], 1)
+    return out.reshape(n_rows * w, len(qs))[:n_windows]
+
+
+def change_points(values, min_size=2, penalty=None, max_points=None):
+    """
+    Indices where the mean of values shifts, by greedy binary segmentation.
+    A split is kept while it lowers the squared error by more than penalty
+    (default 2 sigma^2 ln n); segments are at least min_size long.
+    """
+    x = np.asarray(values, dtype=np.float64)
+    n = x.size
+    min_size = max(int(min_size), 1)
+    if n < 2 * min_size:
+        return []
+    if penalty is None:
+        sigma = 1.4826 * np.median(np.abs(np.diff(x))) / math.sqrt(2)
+        penalty = 2 * sigma ** 2 * math.log(n)
+    s1 = np.r_[0, np.cumsum(x)]
+    s2 = np.r_[0, np.cumsum(x * x)]
+
+    def cost(a, b):
+        return s2[b] - s2[a] - (s1[b] - s1[a]) ** 2 / (b - a)
+
+    def best_split(a, b):
+        splits = np.arange(a + min_size, b - min_size + 1)
+        if not splits.size:
+            return 0.0, None
+        gain = cost(a, b) - cost(a, splits) - cost(splits, b)
+        i = int(np.argmax(gain))
+        return float(gain[i]), int(splits[i])
+
+    points = []
+    candidates = {(0, n): best_split(0, n)}
+    while candidates and (max_points is None or len(points) < max_points):
+        (a, b), (gain, split) = max(candidates.items(), key=lambda item: item[1][0])
+        if split is None or gain <= penalty:
+            break
+        del candidates[(a, b)]
+        points.append(split)
+        candidates[(a, split)] = best_split(a, split)
+        candidates[(split, b)] = best_split(split, b)
+    return sorted(points)
+
+
+def rolling_series(blocks, speedups, window=DEFAULT_WINDOW, qs=ROLLING_PERCENTILES,
+                   penalty=None):
+    """Rolling percentiles, change points and segments of one mode's speedups."""
+    blocks = np.asarray(blocks, dtype=np.int64)
+    speedups = np.asarray(speedups, dtype=np.float64)
+    quantiles = rolling_quantiles(speedups, window, qs)
+    points = change_points(np.log(speedups), min_size=window, penalty=penalty)
+    bounds = [0] + points + [speedups.size]
+    segments = [{'first_block': int(blocks[a]), 'last_block': int(blocks[b - 1]),
+                 'n': b - a, 'median': float(np.median(speedups[a:b]))}
+                for a, b in zip(bounds[:-1], bounds[1:])]
+    return {
+        'window': int(window),
+        'first_block': int(blocks[0]),
+        'blocks': blocks[window - 1:].tolist(),
+        'percentiles': {f'p{q}': quantiles[:, j].tolist() for j, q in enumerate(qs)},
+        'change_points': [int(blocks[i]) for i in points],
+        'segments': segments,
+        'stable_from': segments[-1]['first_block'],
+        'stable_median': segments[-1]['median'],
+    }
+
+
+def rolling_stats(modes=MODES, window=DEFAULT_WINDOW, qs=ROLLING_PERCENTILES,
+                  penalty=None, data_dir=None):
+    """{mode: rolling_series} over the blocks each mode shares with seq."""
+    engine = SpeedupEngine() if data_dir is None else SpeedupEngine(data_dir=data_dir)
+    result = {}
+    for mode in modes:
+        engine.attach(mode)
+        result[mode] = rolling_series(engine.blocks(mode), engine.speedups(mode),
+                                      window, qs, penalty)
+    return result
+
+
+def cached_rolling(modes=MODES, window=DEFAULT_WINDOW, qs=ROLLING_PERCENTILES,
+                   penalty=None):
+    """rolling_stats served from the results store (see analysis.results)."""
+    from analysis.results import memoize
+
+    inputs = [block_stats_path(mode) for mode in ['seq', *modes]]
+    return memoize('rolling-speedup',
+                   lambda: rolling_stats(modes, window, qs, penalty), inputs,
+                   {'modes': list(modes), 'window': window, 'qs': list(qs),
+                    'penalty': penalty})
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('modes', nargs='*', default=MODES,
+                        help=f"block_stats modes (default: {' '.join(MODES)})")
+    parser.add_argument('-w', '--window', type=int, default=DEFAULT_WINDOW,
+                        help=f'blocks per window (default: {DEFAULT_WINDOW})')
+    parser.add_argument('--penalty', type=float,
+                        help='change-point penalty on log speedup (default: BIC-style)')
+    parser.add_argument('--json', action='store_true', help='print the full series as JSON')
+    args = parser.parse_args(argv)
+
+    stats = cached_rolling(args.modes, args.window, ROLLING_PERCENTILES, args.penalty)
+    if args.json:
+        json.dump(stats, sys.stdout, indent=2)
+        sys.stdout.write('\n')
+        return 0
+    for mode, series in stats.items():
+        p50 = series['percentiles']['p50']
+        print(f"{MODE_LABELS.get(mode, mode)} ({mode}), {args.window}-block window:")
+        print(f"  rolling median {p50[0]:.2f}x -> {p50[-1]:.2f}x "
+              f"(min {min(p50):.2f}x, max {max(p50):.2f}x)")
+        for seg in series['segments']:
+            print(f"  blocks {seg['first_block']}-{seg['last_block']}: "
+                  f"median {seg['median']:.2f}x over {seg['n']} blocks")
+        print(f"  stable from block {series['stable_from']}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
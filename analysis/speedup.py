@@ -0,0 +1,147 @@
+"""
+Block-level speedup engine shared by the e2e/online/replay plot scripts.
+
+The sequential baseline is loaded once and kept as a pair of arrays sorted
+by block_number. Target configurations (deter, optim, optim_partial, ...)
+are joined against it with a sorted-array merge-join (np.searchsorted)
+instead of Python set intersections and pd.merge.
+"""
+
+import os
+
+import numpy as np
+
+from analysis.cache import block_stats_columns
+from analysis.phases import add_rows, phase
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DATA_DIR = os.path.join(REPO_DIR, 'e2e')
+
+# Non-uniform bins used by the combined/online/replay figures
+BINS = [0, 1, 2, 3, 4, 5, 10, 20, float('inf')]
+LABELS = ['<1×', '1-2×', '2-3×', '3-4×', '4-5×', '5-10×', '10-20×', '≥20×']
+
+PERCENTILES = [25, 50, 75, 90, 95, 99]
+
+
+def block_stats_path(mode, data_dir=DATA_DIR):
+    """Return the path of block_stats_<mode>.csv inside data_dir."""
+    return os.path.join(data_dir, f'block_stats_{mode}.csv')
+
+
+def load_block_stats(path):
+    """
+    Load a block_stats CSV as (block_numbers, elapsed_ms) arrays sorted by
+    block number. Duplicate block numbers keep their first occurrence.
+    Parsed columns are served from the on-disk cache (see analysis.cache).
+    """
+    columns = block_stats_columns(path)
+    return columns['block_number'], columns['elapsed_time_ms']
+
+
+def merge_join(left_blocks, right_blocks):
+    """
+    Sorted-array merge-join of two strictly increasing block arrays.
+    Returns (left_idx, right_idx) of the matching positions.
+    """
+    if not left_blocks.size:
+        return np.empty(0, dtype=np.intp), np.empty(0, dtype=np.intp)
+    pos = np.searchsorted(left_blocks, right_blocks)
+    pos_clipped = np.minimum(pos, left_blocks.size - 1)
+    hit = (pos < left_blocks.size) & (left_blocks[pos_clipped] == right_blocks)
+    return pos[hit], np.flatnonzero(hit)
+
+
+class SpeedupEngine:
+    """
+    Sequential baseline indexed by block_number plus any number of attached
+    target configurations.
+
+        engine = SpeedupEngine()
+        engine.attach('deter')
+        speedups = engine.speedups('deter')
+    """
+
+    def __init__(self, seq_path=None, data_dir=DATA_DIR):
+        self.data_dir = data_dir
+        if seq_path is None:
+            seq_path = block_stats_path('seq', data_dir)
+        self.seq_blocks, self.seq_times = load_block_stats(seq_path)
+        self.targets = {}
+
+    def attach(self, name, path=None):
+        """Load block_stats_<name>.csv (or path) and join it to the baseline."""
+        if path is None:
+            path = block_stats_path(name, self.data_dir)
+        with phase(f'attach {name}'):
+            blocks, times = load_block_stats(path)
+            seq_idx, target_idx = merge_join(self.seq_blocks, blocks)
+            self.targets[name] = (blocks[target_idx], self.seq_times[seq_idx],
+                                  times[target_idx])
+            add_rows(target_idx.size)
+        return self
+
+    def blocks(self, name):
+        """Block numbers shared by the baseline and the named target."""
+        return self.targets[name][0]
+
+    def common_blocks(self, *names):
+        """Block numbers shared by the baseline and every named target."""
+        common = self.blocks(names[0])
+        for name in names[1:]:
+            common = np.intersect1d(common, self.blocks(name), assume_unique=True)
+        return common
+
+    def speedups(self, name, block_subset=None):
+        """
+        Per-block speedup (seq / target) in block order, optionally
+        restricted to a sorted array of block numbers.
+        """
+        blocks, seq_times, target_times = self.targets[name]
+        if block_subset is not None:
+            idx, _ = merge_join(blocks, np.asarray(block_subset, dtype=np.int64))
+            seq_times, target_times = seq_times[idx], target_times[idx]
+        if seq_times.size == 0:
+            raise ValueError(f"No overlapping blocks found for {name} dataset")
+        return seq_times / target_times
+
+
+def histogram(speedups, bins=BINS):
+    """Return (counts, percentages) of speedups falling in each bin."""
+    counts, _ = np.histogram(speedups, bins=bins)
+    percentages = (counts / len(speedups)) * 100
+    return counts, percentages
+
+
+def percentiles(speedups, qs=PERCENTILES):
+    """Return {q: value} for the requested percentiles."""
+    return dict(zip(qs, np.percentile(speedups, qs)))
+
+
+def summarize(speedups, qs=PERCENTILES):
+    """Min/max/mean/median plus the requested percentiles."""
+    stats = {
+        'n': int(len(speedups)),
+        'min': float(np.min(speedups)),
+        'max': float(np.max(speedups)),
+        'mean': float(np.mean(speedups)),
+        'median': float(np.median(speedups)),
+    }
+    for q, value in percentiles(speedups, qs).items():
+        stats[f'p{q}'] = float(value)
+    return stats
+
+
+def print_summary(stats, title):
+    """Print the statistics block used by the online/replay scripts."""
+    print(f"\n{title} Speedup Statistics:")
+    print(f"  Blocks analyzed: {stats['n']}")
+    print(f"  Min:    {stats['min']:.2f}×")
+    print(f"  P25:    {stats['p25']:.2f}×")
+    print(f"  Median: {stats['median']:.2f}×")
+    print(f"  P75:    {stats['p75']:.2f}×")
+    print(f"  P90:    {stats['p90']:.2f}×")
+    print(f"  P95:    {stats['p95']:.2f}×")
+    print(f"  P99:    {stats['p99']:.2f}×")
+    print(f"  Max:    {stats['max']:.2f}×")
+    print(f"  Mean:   {stats['mean']:.2f}×")
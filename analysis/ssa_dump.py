@@ -0,0 +1,207 @@
+"""
+Streaming analyzer for binary SsaGraph cache dumps (node-count distribution).
+
+    python -m analysis.ssa_dump ssa_cache.bin -j 8
+
+A dump is a plain sequence of records, one per cached SsaGraph:
+
+    u32  magic        0x47415348 ('HSAG' little-endian)
+    u32  node_count
+    u64  payload_len  bytes of serialized graph that follow the header
+    u64  path_digest
+    ...  payload      (nodes, edges, constant table; never decoded here,
+                      see analysis.cplr for the graph encoding)
+
+The file is memory-mapped and only the 24-byte headers are read, so graphs
+are never materialized and memory is bounded by the number of distinct
+node counts. To parallelize, the file is cut into byte ranges; each worker
+scans for the magic from its range start and accepts a candidate header
+only when the record it describes is followed by another valid header (or
+ends exactly at EOF). It then walks record to record and counts those that
+start inside its range. Per-worker Counters of exact node counts are merged
+into one distribution, from which histograms, percentiles and the most
+common sizes are exact.
+"""
+
+import argparse
+import json
+import mmap
+import os
+import struct
+import sys
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from analysis.stats import NODE_COUNT_RANGES
+
+MAGIC = 0x47415348
+HEADER = struct.Struct('<IIQQ')
+
+# Inclusive upper bounds of NODE_COUNT_RANGES (the last range is open)
+NODE_COUNT_EDGES = [10, 20, 50, 100, 200, 500, 1000, 2000, 5000, 10000]
+PERCENTILES = [25, 50, 75, 90, 95, 99]
+
+
+def write_dump(path, node_counts, path_digests=None, node_bytes=8):
+    """Write a dump with zero-filled payloads (node_bytes per node)."""
+    if path_digests is None:
+        path_digests = range(len(node_counts))
+    with open(path, 'wb') as f:
+        for count, digest in zip(node_counts, path_digests):
+            payload = int(count) * node_bytes
+            f.write(HEADER.pack(MAGIC, int(count), payload, int(digest) & (2**64 - 1)))
+            f.write(bytes(payload))
+
+
+def _record_end(mm, pos, size, magic=MAGIC):
+    """End offset of a valid record header at pos, or None."""
+    if pos + HEADER.size > size:
+        return None
+    found, _, payload_len, _ = HEADER.unpack_from(mm, pos)
+    end = pos + HEADER.size + payload_len
+    if found != magic or end > size:
+        return None
+    return end
+
+
+def _sync(mm, pos, size, magic=MAGIC):
+    """First offset >= pos holding a record that chains to the next one."""
+    magic_bytes = struct.pack('<I', magic)
+    while True:
+        pos = mm.find(magic_bytes, pos)
+        if pos < 0:
+            return size
+        end = _record_end(mm, pos, size, magic)
+        if end is not None and (end == size or _record_end(mm, end, size, magic) is not None):
+            return pos
+        pos += 1
+
+
+def iter_records(mm, start, end, size, magic=MAGIC):
+    """
+    (offset, node_count, payload_len, path_digest) of every record whose
+    header starts in [start, end) of a mapped dump of the given size. Other
+    record streams with the same framing (PathLog dumps) pass their magic.
+    """
+    pos = 0 if start == 0 else _sync(mm, start, size, magic)
+    while pos < end and pos < size:
+        found, node_count, payload_len, digest = HEADER.unpack_from(mm, pos)
+        if found != magic:
+            raise ValueError(f"bad record header at offset {pos}")
+        yield pos, node_count, payload_len, digest
+        pos += HEADER.size + payload_len
+
+
+def byte_ranges(path, workers=None, min_bytes=4 << 20):
+    """Split a dump into up to `workers` ranges of at least min_bytes."""
+    size = os.path.getsize(path)
+    workers = workers or os.cpu_count() or 1
+    n_ranges = max(1, min(workers, size // min_bytes))
+    bounds = [size * i // n_ranges for i in range(n_ranges + 1)]
+    return list(zip(bounds[:-1], bounds[1:]))
+
+
+def scan_range(path, start, end):
+    """Counter of node counts for records whose header starts in [start, end)."""
+    sizes = Counter()
+    with open(path, 'rb') as f:
+        size = os.fstat(f.fileno()).st_size
+        if not size:
+            return sizes
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            try:
+                for _, node_count, _, _ in iter_records(mm, start, end, size):
+                    sizes[node_count] += 1
+            except ValueError as e:
+                raise ValueError(f"{path}: {e}") from None
+    return sizes
+
+
+def scan_dump(path, workers=None):
+    """
+    Exact node-count distribution of a dump as (node_counts, graphs) arrays,
+    node_counts ascending.
+    """
+    # Ranges smaller than a few MB are not worth a process
+    ranges = byte_ranges(path, workers)
+    if len(ranges) > 1:
+        with ProcessPoolExecutor(max_workers=len(ranges)) as pool:
+            parts = list(pool.map(scan_range, *zip(*((path, lo, hi) for lo, hi in ranges))))
+    else:
+        parts = [scan_range(path, lo, hi) for lo, hi in ranges]
+
+    total = Counter()
+    for part in parts:
+        total.update(part)
+    node_counts = np.array(sorted(total), dtype=np.int64)
+    graphs = np.array([total[k] for k in node_counts], dtype=np.int64)
+    return node_counts, graphs
+
+
+def weighted_percentiles(values, weights, qs):
+    """np.percentile (linear interpolation) of values repeated weights times."""
+    cumulative = np.cumsum(weights)
+    n = int(cumulative[-1])
+    h = (n - 1) * np.asarray(qs, dtype=np.float64) / 100
+    lo = values[np.searchsorted(cumulative, np.floor(h), side='right')]
+    hi = values[np.searchsorted(cumulative, np.ceil(h), side='right')]
+    return lo + (h - np.floor(h)) * (hi - lo)
+
+
+def summarize_node_counts(node_counts, graphs, qs=PERCENTILES, top=20):
+    """Summary statistics, range histogram and most common exact sizes."""
+    n = int(graphs.sum())
+    if not n:
+        return {'graphs': 0}
+    per_range = np.bincount(np.searchsorted(NODE_COUNT_EDGES, node_counts, side='left'),
+                            weights=graphs, minlength=len(NODE_COUNT_RANGES))
+    common = np.lexsort((node_counts, -graphs))[:top]
+    return {
+        'graphs': n,
+        'min': int(node_counts[0]),
+        'max': int(node_counts[-1]),
+        'mean': float(np.dot(node_counts, graphs) / n),
+        'percentiles': dict(zip((f'p{q}' for q in qs),
+                                weighted_percentiles(node_counts, graphs, qs).tolist())),
+        'ranges': NODE_COUNT_RANGES,
+        'range_counts': per_range.astype(np.int64).tolist(),
+        'percentages': (per_range / n * 100).tolist(),
+        'most_common': [{'nodes': int(node_counts[i]), 'graphs': int(graphs[i]),
+                         'percentage': float(graphs[i] / n * 100)} for i in common],
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Node-count distribution of an SsaGraph dump')
+    parser.add_argument('dump', help='binary SsaGraph cache dump')
+    parser.add_argument('-j', '--workers', type=int, default=None,
+                        help='parallel scan processes (default: all cores)')
+    parser.add_argument('--top', type=int, default=20, help='most common node counts to list')
+    parser.add_argument('--json', action='store_true', help='emit the summary as JSON')
+    args = parser.parse_args(argv)
+
+    summary = summarize_node_counts(*scan_dump(args.dump, args.workers), top=args.top)
+    if args.json or not summary['graphs']:
+        json.dump(summary, sys.stdout, indent=2)
+        sys.stdout.write('\n')
+        return 0
+
+    print(f"Graphs: {summary['graphs']:,}  min {summary['min']:,}  "
+          f"max {summary['max']:,}  mean {summary['mean']:.2f}")
+    for name, value in summary['percentiles'].items():
+        print(f"  {name:>4}: {value:,.0f} nodes")
+    print('\nRange distribution:')
+    for label, count, pct in zip(summary['ranges'], summary['range_counts'],
+                                 summary['percentages']):
+        print(f"  {label:>8}: {count:>10,} ({pct:5.2f}%)")
+    print('\nMost common node counts:')
+    for rank, row in enumerate(summary['most_common'], 1):
+        print(f"  {rank:>3}. {row['nodes']:>8,} nodes: {row['graphs']:>9,} "
+              f"({row['percentage']:.2f}%)")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
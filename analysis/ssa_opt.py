@@ -0,0 +1,342 @@
+"""
+Reference SSA optimizer over PathLog dumps, with per-pass reduction statistics.
+
+    python -m analysis.ssa_opt pathlogs.bin -j 8 [--passes cf,dce,cse] [-o graphs.bin]
+
+A Python model of the SSA Optimizer in chapters/design.tex, for measuring
+opcode reduction on real traffic and trying new passes without touching
+the Rust engine. Each PathLog (see analysis.pathlog) becomes an array-backed
+graph. The inputs of node i are refs[indptr[i]:indptr[i + 1]]: a ref >= 0
+names a node, and a ref < 0 names constant -ref - 1 in a hash-consed
+constant table. The default pipeline follows the paper:
+
+  cf   PUSH nodes become constant-table entries, and foldable arithmetic
+       whose inputs are all constant is evaluated and removed
+  dce  liveness flows backwards from side-effecting nodes (anything
+       outside analysis.evm.IS_REMOVABLE) until a fixed point; unreached
+       nodes are removed
+  cse  side-effect-free nodes are fingerprinted by (opcode, input refs).
+       Nodes with equal fingerprints are unified and consumers redirected
+
+DCE propagates one frontier at a time over the CSR arrays. CSE hash-conses
+each ASAP level with one np.unique over fingerprint rows: equal nodes sit
+on the same level, and lower levels are already canonical. Folding
+evaluates 256-bit values, so it loops over foldable nodes in Python.
+
+PASSES maps names to pass functions (state -> nodes removed); a new pass
+is one more entry. Paths above --max-nodes are skipped as non-optimizable
+(T_max). Statistics count nodes removed per pass, plus the DUP/SWAP
+traffic the tracer already collapsed ('stack'); reduction rates are
+relative to the native opcode count. Dumps are processed over byte ranges
+in a process pool, and -o writes the compacted SsaGraphs in the
+analysis.cplr encoding, with the constant table as 32-byte words.
+"""
+
+import argparse
+import json
+import os
+import shutil
+import sys
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from analysis.cplr import asap_levels, write_graph_dump
+from analysis.evm import FOLD, IS_FOLD, IS_MERGEABLE, IS_PUSH, IS_REMOVABLE
+from analysis.pathlog import iter_pathlogs
+from analysis.ssa_dump import PERCENTILES, byte_ranges
+
+ALIVE, FOLDED, DEAD, MERGED = range(4)
+# Widest mergeable opcode (ADDMOD/MULMOD); narrower rows are padded
+MAX_ARITY = 3
+PAD = np.iinfo(np.int64).min
+STAT_FIELDS = ['path_digest', 'native_opcodes', 'entries', 'stack', 'cf', 'dce', 'cse',
+               'nodes', 'constants', 'skipped']
+
+
+class ConstantTable:
+    """Hash-consed 256-bit constants: equal values share one id."""
+
+    def __init__(self):
+        self.ids = {}
+        self.values = []
+
+    def intern(self, value):
+        cid = self.ids.get(value)
+        if cid is None:
+            cid = self.ids[value] = len(self.values)
+            self.values.append(value)
+        return cid
+
+    def to_bytes(self):
+        return b''.join(v.to_bytes(32, 'big') for v in self.values)
+
+    def __len__(self):
+        return len(self.values)
+
+
+class SsaState:
+    """Array-backed SsaGraph under optimization."""
+
+    def __init__(self, log):
+        self.opcodes = np.asarray(log['opcodes'], dtype=np.int64)
+        self.indptr = np.asarray(log['indptr'], dtype=np.int64)
+        self.refs = np.asarray(log['deps'], dtype=np.int64).copy()
+        self.immediates = log['immediates']
+        self.n = self.opcodes.size
+        self.status = np.full(self.n, ALIVE, dtype=np.int8)
+        self.constants = ConstantTable()
+        # Constant id each folded node evaluated to (-1: not constant)
+        self.value = np.full(self.n, -1, dtype=np.int64)
+
+    @property
+    def alive(self):
+        return self.status == ALIVE
+
+    def consumers(self):
+        """Consumer node of every ref."""
+        return np.repeat(np.arange(self.n), np.diff(self.indptr))
+
+    def remove(self, nodes, reason):
+        self.status[nodes] = reason
+        return int(np.size(nodes))
+
+    def node_csr(self):
+        """(indptr, preds) of node-to-node edges, constant refs dropped."""
+        keep = self.refs >= 0
+        counts = np.bincount(self.consumers()[keep], minlength=self.n)
+        indptr = np.zeros(self.n + 1, dtype=np.int64)
+        np.cumsum(counts, out=indptr[1:])
+        return indptr, self.refs[keep]
+
+    def compact(self):
+        """(indptr, preds, opcodes) of the surviving graph, renumbered."""
+        alive = self.alive
+        new_index = np.cumsum(alive) - 1
+        consumer = self.consumers()
+        keep = alive[consumer] & (self.refs >= 0)
+        counts = np.bincount(new_index[consumer[keep]], minlength=int(alive.sum()))
+        indptr = np.zeros(counts.size + 1, dtype=np.int64)
+        np.cumsum(counts, out=indptr[1:])
+        return indptr, new_index[self.refs[keep]], self.opcodes[alive]
+
+
+def constant_folding(state):
+    """Turn PUSHes into constants and evaluate fully constant arithmetic."""
+    pushes = np.flatnonzero(IS_PUSH[state.opcodes])
+    for node, word in zip(pushes.tolist(), state.immediates):
+        state.value[node] = state.constants.intern(int.from_bytes(word.tobytes(), 'big'))
+    removed = state.remove(pushes, FOLDED)
+
+    values = state.constants.values
+    refs, indptr, value = state.refs, state.indptr, state.value
+    for node in np.flatnonzero(IS_FOLD[state.opcodes] & state.alive).tolist():
+        inputs = refs[indptr[node]:indptr[node + 1]]
+        # Inputs precede their consumers, so their values are final
+        cids = [value[r] if r >= 0 else -r - 1 for r in inputs.tolist()]
+        if all(c >= 0 for c in cids):
+            result = FOLD[int(state.opcodes[node])](*(values[c] for c in cids))
+            value[node] = state.constants.intern(result)
+            state.status[node] = FOLDED
+            removed += 1
+
+    # Consumers read folded nodes from the constant table
+    node_refs = np.flatnonzero(refs >= 0)
+    folded = value[refs[node_refs]] >= 0
+    refs[node_refs[folded]] = -value[refs[node_refs[folded]]] - 1
+    return removed
+
+
+def dead_code_elimination(state):
+    """Remove removable nodes that no side effect depends on."""
+    alive = state.alive
+    live = alive & ~IS_REMOVABLE[state.opcodes]
+    frontier = np.flatnonzero(live)
+    while frontier.size:
+        starts = state.indptr[frontier]
+        counts = state.indptr[frontier + 1] - starts
+        total = int(counts.sum())
+        if not total:
+            break
+        run_start = np.repeat(starts - (np.cumsum(counts) - counts), counts)
+        inputs = state.refs[run_start + np.arange(total)]
+        inputs = np.unique(inputs[inputs >= 0])
+        frontier = inputs[~live[inputs]]
+        live[frontier] = True
+    return state.remove(np.flatnonzero(alive & ~live), DEAD)
+
+
+def common_subexpression_elimination(state):
+    """Unify nodes with equal (opcode, input refs) fingerprints."""
+    candidates = state.alive & IS_MERGEABLE[state.opcodes]
+    if not candidates.any():
+        return 0
+    # Fingerprint rows: opcode then inputs, padded to MAX_ARITY
+    arity = np.diff(state.indptr)
+    consumer = state.consumers()
+    slot = np.arange(state.refs.size) - state.indptr[consumer]
+    rows = np.full((state.n, MAX_ARITY + 1), PAD, dtype=np.int64)
+    rows[:, 0] = state.opcodes
+    fits = candidates[consumer] & (slot < MAX_ARITY)
+    rows[consumer[fits], slot[fits] + 1] = state.refs[fits]
+    candidates &= arity <= MAX_ARITY
+
+    level = asap_levels(state.n, *state.node_csr())
+    nodes = np.flatnonzero(candidates)
+    nodes = nodes[np.argsort(level[nodes], kind='stable')]
+    bounds = np.flatnonzero(np.diff(level[nodes])) + 1
+    canon = np.arange(state.n)
+    for group in np.split(nodes, bounds):
+        fingerprint = rows[group]
+        refs = fingerprint[:, 1:]
+        is_node = refs >= 0
+        refs[is_node] = canon[refs[is_node]]
+        _, first, inverse = np.unique(fingerprint, axis=0, return_index=True,
+                                      return_inverse=True)
+        canon[group] = group[first[inverse.ravel()]]
+
+    merged = np.flatnonzero(canon != np.arange(state.n))
+    node_refs = np.flatnonzero(state.refs >= 0)
+    state.refs[node_refs] = canon[state.refs[node_refs]]
+    return state.remove(merged, MERGED)
+
+
+PASSES = {
+    'cf': constant_folding,
+    'dce': dead_code_elimination,
+    'cse': common_subexpression_elimination,
+}
+DEFAULT_PASSES = ['cf', 'dce', 'cse']
+PASS_LABELS = {'cf': 'Constant Folding', 'dce': 'Dead Code Elimination',
+               'cse': 'Common Subexpression Elimination'}
+
+
+def optimize(log, passes=DEFAULT_PASSES, max_nodes=None):
+    """Run the passes over one PathLog; return (SsaState or None, stats dict)."""
+    entries = len(log['opcodes'])
+    # Executed opcodes that became no entry: the collapsed DUP/SWAP traffic
+    executed = entries - int(log.get('synthetic_entries', 0))
+    stats = {'native_opcodes': int(log['native_opcodes']), 'entries': entries,
+             'stack': int(log['native_opcodes']) - executed}
+    stats.update({name: 0 for name in PASSES})
+    if max_nodes is not None and entries > max_nodes:
+        stats.update(nodes=entries, constants=0, skipped=1)
+        return None, stats
+    state = SsaState(log)
+    for name in passes:
+        stats[name] += PASSES[name](state)
+    stats.update(nodes=int(state.alive.sum()), constants=len(state.constants), skipped=0)
+    return state, stats
+
+
+def optimize_range(path, start, end, passes=DEFAULT_PASSES, max_nodes=None, graphs=None):
+    """Per-path statistics (column dict) for PathLogs whose header starts in [start, end)."""
+    columns = {name: [] for name in STAT_FIELDS + [p for p in passes if p not in STAT_FIELDS]}
+    out = []
+    for digest, log in iter_pathlogs(path, start, end):
+        state, stats = optimize(log, passes, max_nodes)
+        columns['path_digest'].append(digest)
+        for name, value in stats.items():
+            columns[name].append(value)
+        if graphs is not None and state is not None:
+            out.append((digest, *state.compact(), state.constants.to_bytes()))
+    if graphs is not None:
+        write_graph_dump(graphs, out)
+    return {name: np.asarray(values, dtype=np.uint64 if name == 'path_digest' else np.int64)
+            for name, values in columns.items()}
+
+
+def optimize_dump(path, workers=None, passes=DEFAULT_PASSES, max_nodes=None, graphs=None):
+    """Per-path statistics of a whole PathLog dump; optionally write the SsaGraphs."""
+    ranges = byte_ranges(path, workers)
+    parts = [None if graphs is None else f'{graphs}.part{i}' for i in range(len(ranges))]
+    args = [(path, lo, hi, passes, max_nodes, part) for (lo, hi), part in zip(ranges, parts)]
+    if len(ranges) > 1:
+        with ProcessPoolExecutor(max_workers=len(ranges)) as pool:
+            results = list(pool.map(optimize_range, *zip(*args)))
+    else:
+        results = [optimize_range(*a) for a in args]
+    if graphs is not None:
+        with open(graphs, 'wb') as out:
+            for part in parts:
+                with open(part, 'rb') as f:
+                    shutil.copyfileobj(f, out)
+                os.remove(part)
+    return {name: np.concatenate([r[name] for r in results]) for name in results[0]}
+
+
+def summarize_reduction(stats, passes=DEFAULT_PASSES, qs=PERCENTILES):
+    """Totals, per-pass shares and the distribution of per-path reduction rates."""
+    done = stats['skipped'] == 0
+    native = stats['native_opcodes'][done]
+    if not native.size:
+        return {'paths': 0, 'skipped': int((~done).sum())}
+    removed = {name: int(stats[name][done].sum()) for name in ['stack'] + list(passes)}
+    eliminated = sum(stats[name][done] for name in passes)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        rate = np.where(native > 0, eliminated / native * 100, 0.0)
+    return {
+        'paths': int(done.sum()),
+        'skipped': int((~done).sum()),
+        'native_opcodes': int(native.sum()),
+        'entries': int(stats['entries'][done].sum()),
+        'eliminated': removed,
+        'nodes': int(stats['nodes'][done].sum()),
+        'constants': int(stats['constants'][done].sum()),
+        'reduction_pct': {name: count / native.sum() * 100 for name, count in removed.items()},
+        # Like the opcode-reduction table: passes only, over native opcodes
+        'total_reduction_pct': float(eliminated.sum() / native.sum() * 100),
+        'reduction_percentiles': dict(zip((f'p{q}' for q in qs),
+                                          np.percentile(rate, qs).tolist())),
+        'predicted_speedup': float(native.sum() / max(native.sum() - eliminated.sum(), 1)),
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Reference SSA optimizer over PathLog dumps')
+    parser.add_argument('pathlogs', help='binary PathLog dump (see analysis.pathlog)')
+    parser.add_argument('-j', '--workers', type=int, default=None,
+                        help='parallel processes (default: all cores)')
+    parser.add_argument('--passes', default=','.join(DEFAULT_PASSES),
+                        help=f"comma-separated pass pipeline from: {', '.join(PASSES)}")
+    parser.add_argument('--max-nodes', type=int, default=None,
+                        help='complexity threshold T_max: skip longer PathLogs')
+    parser.add_argument('-o', '--graphs', help='write the optimized SsaGraphs as a dump')
+    parser.add_argument('--stats', help='write per-path statistics as CSV')
+    parser.add_argument('--json', action='store_true', help='emit the summary as JSON')
+    args = parser.parse_args(argv)
+
+    passes = [p for p in args.passes.split(',') if p]
+    unknown = [p for p in passes if p not in PASSES]
+    if unknown:
+        parser.error(f"unknown pass(es): {', '.join(unknown)}")
+    stats = optimize_dump(args.pathlogs, args.workers, passes, args.max_nodes, args.graphs)
+    if args.stats:
+        with open(args.stats, 'w') as out:
+            out.write(','.join(stats) + '\n')
+            out.writelines(','.join(map(str, row)) + '\n'
+                           for row in zip(*(stats[name].tolist() for name in stats)))
+    summary = summarize_reduction(stats, passes)
+    if args.json or not summary['paths']:
+        json.dump(summary, sys.stdout, indent=2)
+        sys.stdout.write('\n')
+        return 0
+
+    native = summary['native_opcodes']
+    print(f"Paths: {summary['paths']:,} ({summary['skipped']:,} over T_max)  "
+          f"native opcodes {native:,}  PathLog entries {summary['entries']:,}")
+    print(f"  {'DUP/SWAP collapsed by tracer':<34} {summary['eliminated']['stack']:>12,} "
+          f"({summary['reduction_pct']['stack']:5.1f}%)")
+    for name in passes:
+        print(f"  {PASS_LABELS.get(name, name):<34} "
+              f"{summary['eliminated'][name]:>12,} ({summary['reduction_pct'][name]:5.1f}%)")
+    print(f"Total eliminated by passes: {summary['total_reduction_pct']:.1f}% "
+          f"(per path: " + ', '.join(f'{k} {v:.1f}%' for k, v in
+                                     summary['reduction_percentiles'].items()) + ')')
+    print(f"Remaining nodes {summary['nodes']:,}, constants {summary['constants']:,}, "
+          f"predicted speedup {summary['predicted_speedup']:.2f}×")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,364 @@
+"""
+Headless statistics behind every figure, emitted as JSON.
+
+    python -m analysis.stats                 # all analyses
+    python -m analysis.stats combined replay # selected analyses
+
+Nothing here imports matplotlib, and pandas is only imported when a cache
+entry has to be (re)built, so a warm run costs a few milliseconds. The plot
+scripts take their numbers from the same functions and only add drawing.
+cached_stats serves them from the results store (see analysis.results),
+recomputing only when an input, a parameter or the code changed.
+"""
+
+import argparse
+import json
+import os
+import sys
+
+import numpy as np
+
+from analysis.results import memoize
+from analysis.speedup import (BINS, LABELS, SpeedupEngine, block_stats_path,
+                              histogram, percentiles, summarize)
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+MICROBENCH_WORKLOADS = ['ERC20-Transfer', 'Uniswap-Swap-1hop', 'Uniswap-Swap-4hop']
+# Systems in the micro-benchmark figure (timings: micro-benchmark/micro_benchmark.xlsx)
+MICROBENCH_SYSTEMS = ['Revm Native', 'Forerunner-Revm', 'Revmc', 'Helios']
+# Timings the paper publishes instead of the workbook's (us): Revmc is
+# proportionally scaled and rounded by hand. Raw --results still override it.
+MICROBENCH_PUBLISHED_US = {'Revmc': [5.55, 42.35, 126.84]}
+
+# Data from replay.xlsx
+STORAGE_BLOCK_COUNTS = [1000, 2000, 3000, 4000, 5000]
+STORAGE_BLOCK_SIZES_MB = [227.93, 421.85, 626.38, 812.41, 1015.72]
+STORAGE_ARTIFACTS_MB = [119, 188, 301, 362, 426]
+
+# Fine-grained breakdown (unit: nanoseconds), Native EVM vs. Helios (SSA)
+# Native Overhead = Stack (12*5.27) + Gas Check (13*5.47) = 134.35 ns
+# Helios Overhead = Node (7*5.14) + Input (7*4.83) + Reg (4*3.97) + Chunk (2*3.99) = 93.65 ns
+OVERHEAD_LABELS = ['Native EVM', 'Helios (SSA)']
+OVERHEAD_NS = {
+    'heavy_ops': [314.79, 312.33],
+    'light_ops': [46.49, 45.96],
+    'overhead': [134.35, 93.65],
+}
+
+# Data from e2e/SSA_GRAPH_NODES_ANALYSIS_SUMMARY_CN.md (134,601 graphs)
+NODE_COUNT_RANGES = ['0-10', '11-20', '21-50', '51-100', '101-200',
+                     '201-500', '501-1K', '1K-2K', '2K-5K', '5K-10K', '10K+']
+NODE_COUNT_PERCENTAGES = [0.89, 1.07, 9.23, 10.55, 9.18, 30.81, 7.98, 26.31,
+                          2.70, 0.75, 0.53]
+
+PARALLEL_WORKLOADS = ['ERC20-Transfer', 'Uniswap-V2-Swap-1hop', 'Uniswap-V2-Swap-4hop']
+
+SPEEDUP_MODES = {'replay': 'deter', 'online': 'optim', 'online-filtered': 'optim_partial'}
+# One-x-wide bins of the e2e/*_speedup_distribution.png histograms
+HISTOGRAM_BINS = list(range(0, 51)) + [float('inf')]
+HISTOGRAM_LABELS = ['<1×'] + [f'{i}×' for i in range(1, 50)] + ['≥50×']
+
+
+def _engine(modes):
+    engine = SpeedupEngine()
+    for mode in modes:
+        engine.attach(mode)
+    return engine
+
+
+def speedup_stats(name):
+    """Summary statistics and bin distribution for one e2e mode."""
+    mode = SPEEDUP_MODES[name]
+    speedups = _engine([mode]).speedups(mode)
+    counts, pcts = histogram(speedups, BINS)
+    return {
+        'mode': mode,
+        'stats': summarize(speedups),
+        'bins': LABELS,
+        'counts': counts.tolist(),
+        'percentages': pcts.tolist(),
+    }
+
+
+def combined_stats():
+    """P50/P75/P90 and bin percentages for the combined mainnet figure."""
+    engine = _engine(SPEEDUP_MODES.values())
+    result = {'bins': LABELS}
+    for name, mode in SPEEDUP_MODES.items():
+        speedups = engine.speedups(mode)
+        _, pcts = histogram(speedups, BINS)
+        p = percentiles(speedups, [50, 75, 90])
+        result[name] = {'n': int(len(speedups)), 'p50': p[50], 'p75': p[75],
+                        'p90': p[90], 'percentages': pcts.tolist()}
+    return result
+
+
+def e2e_histogram_stats():
+    """
+    Fine-grained histograms of e2e/generate_speedup_charts.py: deter and
+    optim over the blocks common to seq/deter/optim, optim_partial over all
+    of its blocks.
+    """
+    engine = _engine(SPEEDUP_MODES.values())
+    common = engine.common_blocks('deter', 'optim')
+    result = {'common_blocks': int(len(common)), 'labels': HISTOGRAM_LABELS}
+    for mode, subset in [('deter', common), ('optim', common), ('optim_partial', None)]:
+        speedups = engine.speedups(mode, subset)
+        _, pcts = histogram(speedups, HISTOGRAM_BINS)
+        result[mode] = {**summarize(speedups, qs=[]), 'percentages': pcts.tolist()}
+    return result
+
+
+def _microbench(results=None):
+    """micro_benchmark.xlsx, overridden by any raw benchmark results given."""
+    from analysis.microbench import cached_microbench
+
+    return cached_microbench(results)
+
+
+def microbench_stats(results=None):
+    """
+    Per-system execution time (median, MAD, CI) and speedup over Revm Native,
+    from micro_benchmark.xlsx and optional raw results (see analysis.microbench).
+    """
+    from analysis.microbench import WORKBOOK, exec_medians
+
+    bench = _microbench(results)
+    time_us = exec_medians(bench, MICROBENCH_SYSTEMS)
+    for system, published in MICROBENCH_PUBLISHED_US.items():
+        if all(bench['exec'][system][w]['source'] == WORKBOOK for w in MICROBENCH_WORKLOADS):
+            time_us[system] = list(published)
+    native = np.asarray(time_us['Revm Native'])
+    return {
+        'workloads': MICROBENCH_WORKLOADS,
+        'time_us': time_us,
+        'speedup': {system: (native / np.asarray(times)).tolist()
+                    for system, times in time_us.items()},
+        'summary': {system: [bench['exec'][system][w] for w in MICROBENCH_WORKLOADS]
+                    for system in MICROBENCH_SYSTEMS},
+    }
+
+
+def storage_stats(manifest=None):
+    """
+    Block data vs. Helios artifact size and the overhead percentage, either
+    from replay.xlsx or accounted per block from an artifact manifest (see
+    analysis.artifact_growth), which also yields the whole growth curve.
+    """
+    if manifest is not None:
+        from analysis.artifact_growth import MB, sample_growth
+
+        samples, curve = sample_growth(manifest, STORAGE_BLOCK_COUNTS, include_last=True)
+        counts = sorted(samples)
+        first = int(curve['block_number'][0]) if curve else 0
+        return {
+            'block_counts': counts,
+            'block_data_mb': [samples[c]['block_bytes'] / MB for c in counts],
+            'artifacts_mb': [samples[c]['artifact_bytes'] / MB for c in counts],
+            'overhead_pct': [float(samples[c]['overhead_pct']) for c in counts],
+            'curve': {
+                'blocks': (curve['block_number'] - first + 1).tolist() if curve else [],
+                'block_data_mb': (curve['block_bytes'] / MB).tolist() if curve else [],
+                'artifacts_mb': (curve['artifact_bytes'] / MB).tolist() if curve else [],
+            },
+        }
+    block_mb = np.asarray(STORAGE_BLOCK_SIZES_MB)
+    artifact_mb = np.asarray(STORAGE_ARTIFACTS_MB)
+    return {
+        'block_counts': STORAGE_BLOCK_COUNTS,
+        'block_data_mb': STORAGE_BLOCK_SIZES_MB,
+        'artifacts_mb': STORAGE_ARTIFACTS_MB,
+        'overhead_pct': (artifact_mb / block_mb * 100).tolist(),
+    }
+
+
+def overhead_stats(profiles=None, category_map=None, iterations=None, ghz=1.0):
+    """
+    Stacked latency breakdown and totals per system (ns/iteration): the
+    measured constants above, or {label: [profile paths]} classified by
+    analysis.overhead (which adds standard deviations across runs).
+    """
+    if profiles is not None:
+        from analysis.overhead import CATEGORY_MAP, breakdown
+
+        return breakdown(profiles, category_map or CATEGORY_MAP, iterations, ghz)
+    totals = np.sum([OVERHEAD_NS[k] for k in OVERHEAD_NS], axis=0)
+    return {
+        'labels': OVERHEAD_LABELS,
+        'ns': OVERHEAD_NS,
+        'total_ns': totals.tolist(),
+    }
+
+
+def node_count_stats(dump=None, workers=None):
+    """
+    Share of SsaGraphs per node-count range: quoted from the analysis summary,
+    or computed exactly from a binary cache dump (see analysis.ssa_dump).
+    """
+    if dump is not None:
+        from analysis.ssa_dump import scan_dump, summarize_node_counts
+
+        return summarize_node_counts(*scan_dump(dump, workers))
+    return {'ranges': NODE_COUNT_RANGES, 'percentages': NODE_COUNT_PERCENTAGES}
+
+
+def parallel_stats(results=None, dump=None, workers=None):
+    """
+    8-thread slowdown vs. native and the CPLR-predicted speedup, plus the
+    CPLR distribution over every graph of an SsaGraph dump when given
+    (see analysis.cplr).
+    """
+    from analysis.microbench import canonical_workload
+
+    bench = _microbench(results)
+    result = {'workloads': PARALLEL_WORKLOADS, 'slowdown': [], 'theoretical_speedup': []}
+    for workload in map(canonical_workload, PARALLEL_WORKLOADS):
+        metrics = bench['workload_metrics'][workload]
+        native = bench['exec']['Revm Native'][workload]['median']
+        result['slowdown'].append(metrics['parallel_us'] / native)
+        result['theoretical_speedup'].append(1 / metrics['cplr'] if metrics['cplr'] > 0 else 1)
+    if dump is not None:
+        from analysis.cplr import scan_graphs, summarize_cplr
+
+        result['mainnet'] = summarize_cplr(scan_graphs(dump, workers))
+    return result
+
+
+def pareto_stats(records=None, n_blocks=5000):
+    """
+    Cumulative execution coverage by fraction of unique paths (5,000 blocks).
+
+    With raw execution records (see analysis.records) the curve is exact at
+    every percentile and comes with a Gini coefficient; otherwise the Top-1%
+    and Top-5% points are the values quoted in the paper and the rest come
+    from replay.xlsx.
+    """
+    if records is not None:
+        from analysis.locality import KEY_PERCENTAGES, LocalityTracker
+        from analysis.records import load_path_records
+
+        data = load_path_records(records, columns=['tx', 'entry_point', 'path_digest',
+                                                   'block_number'])
+        if 'block_number' not in data:
+            raise ValueError(f"{records} has no block_number column, which the "
+                             "per-block locality curve needs")
+        tracker = LocalityTracker(data['block_number'], data['path_digest'])
+        tracker.advance(n_blocks)
+        curve = tracker.stats(list(range(101)))
+        return {
+            'path_percentages': KEY_PERCENTAGES,
+            'execution_coverage': [curve['execution_coverage'][p] for p in KEY_PERCENTAGES],
+            'curve_percentages': curve['path_percentages'],
+            'curve_coverage': curve['execution_coverage'],
+            'gini': curve['gini'],
+        }
+
+    from analysis.cache import read_sheet
+
+    df = read_sheet(os.path.join(REPO_DIR, 'pareto-cumulative', 'replay.xlsx'), '帕累托效应')
+    rows = df[df['区块数量'] == n_blocks]
+    if rows.empty:
+        raise ValueError(f"replay.xlsx has no Pareto row for {n_blocks} blocks; "
+                         f"choose from {', '.join(str(n) for n in df['区块数量'].tolist())}")
+    row = rows.iloc[0]
+    return {
+        'path_percentages': [0, 1, 5, 10, 20, 50, 100],
+        'execution_coverage': [0,
+                               70,  # Top 1%
+                               85,  # Top 5%
+                               float(row['Top10%占比'] * 100),
+                               float(row['Top20%占比'] * 100),
+                               float(row['Top50%占比'] * 100),
+                               100],
+    }
+
+
+ANALYSES = {
+    'combined': combined_stats,
+    'replay': lambda: speedup_stats('replay'),
+    'online': lambda: speedup_stats('online'),
+    'online-filtered': lambda: speedup_stats('online-filtered'),
+    'e2e-histograms': e2e_histogram_stats,
+    'microbench': microbench_stats,
+    'storage-growth': storage_stats,
+    'overhead-breakdown': overhead_stats,
+    'node-count': node_count_stats,
+    'parallel-instruction': parallel_stats,
+    'pareto-cumulative': pareto_stats,
+}
+
+
+# Data files behind each analysis's default numbers (besides analysis/*.py)
+MICROBENCH_WORKBOOK = os.path.join(REPO_DIR, 'micro-benchmark', 'micro_benchmark.xlsx')
+STATS_INPUTS = {
+    'combined': [block_stats_path(mode) for mode in ['seq', *SPEEDUP_MODES.values()]],
+    'e2e-histograms': [block_stats_path(mode) for mode in ['seq', *SPEEDUP_MODES.values()]],
+    **{name: [block_stats_path('seq'), block_stats_path(mode)]
+       for name, mode in SPEEDUP_MODES.items()},
+    'microbench': [MICROBENCH_WORKBOOK],
+    'parallel-instruction': [MICROBENCH_WORKBOOK],
+    'pareto-cumulative': [os.path.join(REPO_DIR, 'pareto-cumulative', 'replay.xlsx')],
+}
+# Parameters naming input files or directories, hashed by content
+PATH_PARAMS = {'results', 'manifest', 'profiles', 'dump', 'records'}
+# Parameters that cannot change a result
+IGNORED_PARAMS = {'workers'}
+
+
+def _paths(value):
+    if isinstance(value, str):
+        return [value]
+    if isinstance(value, dict):
+        value = list(value.values())
+    if isinstance(value, (list, tuple)):
+        return [path for item in value for path in _paths(item)]
+    return []
+
+
+def cached_stats(name, **params):
+    """
+    ANALYSES[name](**params) through the results store: JSON-ready stats,
+    recomputed only when the inputs, the parameters or analysis/ changed.
+    Parameters left at None are dropped, so they share the default's entry.
+    """
+    params = {k: v for k, v in params.items() if v is not None}
+    inputs = STATS_INPUTS.get(name, []) + [path for key in PATH_PARAMS & params.keys()
+                                           for path in _paths(params[key])]
+    key = {k: v for k, v in params.items() if k not in IGNORED_PARAMS}
+    return memoize(name, lambda: _jsonable(ANALYSES[name](**params)), inputs, key)
+
+
+def _jsonable(value):
+    if isinstance(value, dict):
+        return {str(k): _jsonable(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_jsonable(v) for v in value]
+    if isinstance(value, np.ndarray):
+        return value.tolist()
+    if isinstance(value, np.generic):
+        return value.item()
+    return value
+
+
+def run(names=None):
+    """Return {name: stats} for the selected analyses (default: all)."""
+    return {name: cached_stats(name) for name in (names or ANALYSES)}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('analyses', nargs='*', help=f"any of: {', '.join(ANALYSES)}")
+    parser.add_argument('--indent', type=int, default=2)
+    args = parser.parse_args(argv)
+
+    unknown = [name for name in args.analyses if name not in ANALYSES]
+    if unknown:
+        parser.error(f"unknown analysis: {', '.join(unknown)}")
+    json.dump(run(args.analyses), sys.stdout, indent=args.indent, ensure_ascii=False)
+    sys.stdout.write('\n')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
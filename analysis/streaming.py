@@ -0,0 +1,244 @@
+"""
+Out-of-core speedup statistics for archive-scale block_stats files.
+
+The exact path in analysis.speedup holds every joined block in memory and
+calls np.percentile. This module instead reads the seq and target CSVs in
+chunks, merge-joins the two sorted block_number streams, and folds each
+joined chunk into
+
+  * a fixed-bin histogram (exact counts, same bins as the figures), and
+  * a log-bucketed quantile sketch (DDSketch-style) for the percentiles.
+
+Error bound: every quantile returned by QuantileSketch is within a
+relative error of `alpha` (default 0.5%) of an actual sample whose rank is
+the requested one; e.g. a true P50 of 6.60x is reported in [6.567, 6.633].
+Exact mode interpolates linearly between neighbouring samples, so the two
+can also differ by that interpolation step. Memory is bounded by the
+number of occupied buckets, about log(max/min) / log((1+a)/(1-a)) -- under
+2,000 counters for speedups between 0.001x and 10,000x -- independent of
+the number of blocks. Histograms and sketches are mergeable, so per-config
+or per-shard partial results can be combined.
+
+Input files must be sorted by block_number, as written by the replay tool.
+"""
+
+import math
+
+import numpy as np
+
+from analysis.speedup import BINS, PERCENTILES, merge_join
+
+DEFAULT_CHUNKSIZE = 1_000_000
+
+
+def iter_block_stats(path, chunksize=DEFAULT_CHUNKSIZE):
+    """
+    Yield (block_numbers, elapsed_ms) chunks of a block_stats CSV, checking
+    that block numbers are strictly increasing across the whole file.
+    """
+    import pandas as pd
+
+    last = None
+    reader = pd.read_csv(path, chunksize=chunksize,
+                         dtype={'block_number': np.int64,
+                                'elapsed_time_ms': np.float64})
+    for chunk in reader:
+        blocks = chunk['block_number'].to_numpy()
+        times = chunk['elapsed_time_ms'].to_numpy()
+        if blocks.size == 0:
+            continue
+        if (last is not None and blocks[0] <= last) or \
+                (blocks.size > 1 and not (np.diff(blocks) > 0).all()):
+            raise ValueError(f"{path} is not sorted by block_number; "
+                             "streaming mode needs strictly increasing blocks")
+        last = blocks[-1]
+        yield blocks, times
+
+
+def stream_join(seq_chunks, target_chunks):
+    """
+    Merge-join two sorted (blocks, times) chunk streams. Yields
+    (blocks, seq_times, target_times) for every block present in both,
+    holding at most about one chunk of each stream in memory.
+    """
+    empty = (np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float64))
+    seq_chunks, target_chunks = iter(seq_chunks), iter(target_chunks)
+    s_blocks, s_times = next(seq_chunks, empty)
+    t_blocks, t_times = next(target_chunks, empty)
+    s_done = s_blocks.size == 0
+    t_done = t_blocks.size == 0
+
+    while s_blocks.size and t_blocks.size:
+        # Everything up to the smaller buffered tail can be joined now
+        limit = min(s_blocks[-1] if not s_done else math.inf,
+                    t_blocks[-1] if not t_done else math.inf)
+        s_cut = s_blocks.size if limit == math.inf else \
+            np.searchsorted(s_blocks, limit, side='right')
+        t_cut = t_blocks.size if limit == math.inf else \
+            np.searchsorted(t_blocks, limit, side='right')
+
+        s_idx, t_idx = merge_join(s_blocks[:s_cut], t_blocks[:t_cut])
+        if s_idx.size:
+            yield s_blocks[s_idx], s_times[s_idx], t_times[t_idx]
+
+        s_blocks, s_times = s_blocks[s_cut:], s_times[s_cut:]
+        t_blocks, t_times = t_blocks[t_cut:], t_times[t_cut:]
+        if not s_blocks.size and not s_done:
+            s_blocks, s_times = next(seq_chunks, empty)
+            s_done = s_blocks.size == 0
+        if not t_blocks.size and not t_done:
+            t_blocks, t_times = next(target_chunks, empty)
+            t_done = t_blocks.size == 0
+
+
+class StreamingHistogram:
+    """Fixed-bin histogram updated chunk by chunk (np.histogram semantics)."""
+
+    def __init__(self, bins=BINS):
+        self.bins = np.asarray(bins, dtype=np.float64)
+        self.counts = np.zeros(len(bins) - 1, dtype=np.int64)
+
+    def update(self, values):
+        counts, _ = np.histogram(values, bins=self.bins)
+        self.counts += counts
+
+    def merge(self, other):
+        self.counts += other.counts
+        return self
+
+    @property
+    def total(self):
+        return int(self.counts.sum())
+
+    def percentages(self):
+        return (self.counts / self.total) * 100
+
+
+class QuantileSketch:
+    """
+    Mergeable relative-error quantile sketch over positive values.
+
+    Values are mapped to logarithmic buckets of ratio gamma = (1+a)/(1-a);
+    each bucket is reported by its midpoint, which is within relative error
+    a of every value it contains. Counters live in one dense int64 array
+    that grows to cover the occupied index range.
+    """
+
+    def __init__(self, alpha=0.005):
+        self.alpha = alpha
+        self.gamma = (1 + alpha) / (1 - alpha)
+        self.log_gamma = math.log(self.gamma)
+        self.offset = 0
+        self.counts = np.zeros(0, dtype=np.int64)
+        self.zero_count = 0
+        self.count = 0
+        self.sum = 0.0
+        self.min = math.inf
+        self.max = -math.inf
+
+    def _grow(self, lo, hi):
+        if not self.counts.size:
+            self.offset = lo
+            self.counts = np.zeros(hi - lo + 1, dtype=np.int64)
+            return
+        new_lo = min(lo, self.offset)
+        new_hi = max(hi, self.offset + self.counts.size - 1)
+        if new_lo == self.offset and new_hi - new_lo + 1 == self.counts.size:
+            return
+        counts = np.zeros(new_hi - new_lo + 1, dtype=np.int64)
+        start = self.offset - new_lo
+        counts[start:start + self.counts.size] = self.counts
+        self.offset, self.counts = new_lo, counts
+
+    def update(self, values):
+        values = np.asarray(values, dtype=np.float64)
+        if not values.size:
+            return
+        if (values < 0).any() or np.isnan(values).any():
+            raise ValueError("QuantileSketch only accepts non-negative values")
+        self.count += values.size
+        self.sum += float(values.sum())
+        self.min = min(self.min, float(values.min()))
+        self.max = max(self.max, float(values.max()))
+
+        positive = values[values > 0]
+        self.zero_count += values.size - positive.size
+        if not positive.size:
+            return
+        idx = np.ceil(np.log(positive) / self.log_gamma).astype(np.int64)
+        lo, hi = int(idx.min()), int(idx.max())
+        self._grow(lo, hi)
+        self.counts += np.bincount(idx - self.offset, minlength=self.counts.size)
+
+    def merge(self, other):
+        if other.alpha != self.alpha:
+            raise ValueError("cannot merge sketches with different alpha")
+        self.count += other.count
+        self.sum += other.sum
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+        self.zero_count += other.zero_count
+        if other.counts.size:
+            self._grow(other.offset, other.offset + other.counts.size - 1)
+            start = other.offset - self.offset
+            self.counts[start:start + other.counts.size] += other.counts
+        return self
+
+    def quantile(self, q):
+        """Approximate q-quantile, q in [0, 1]."""
+        if not self.count:
+            raise ValueError("empty sketch")
+        rank = q * (self.count - 1)
+        if rank < self.zero_count:
+            return 0.0
+        cumulative = np.cumsum(self.counts)
+        i = int(np.searchsorted(cumulative, rank - self.zero_count, side='right'))
+        i = min(i, self.counts.size - 1)
+        value = 2 * self.gamma ** (self.offset + i) / (self.gamma + 1)
+        return min(max(value, self.min), self.max)
+
+    def percentiles(self, qs=PERCENTILES):
+        return {q: self.quantile(q / 100) for q in qs}
+
+
+def stream_speedups(seq_path, target_path, bins=BINS, alpha=0.005,
+                    chunksize=DEFAULT_CHUNKSIZE):
+    """
+    Fold seq/target speedups into a (StreamingHistogram, QuantileSketch)
+    pair without materializing the joined table.
+    """
+    hist = StreamingHistogram(bins)
+    sketch = QuantileSketch(alpha)
+    joined = stream_join(iter_block_stats(seq_path, chunksize),
+                         iter_block_stats(target_path, chunksize))
+    for _, seq_times, target_times in joined:
+        speedups = seq_times / target_times
+        hist.update(speedups)
+        sketch.update(speedups)
+    if not sketch.count:
+        raise ValueError(f"No overlapping blocks between {seq_path} and {target_path}")
+    return hist, sketch
+
+
+def summarize_sketch(sketch, qs=PERCENTILES):
+    """Streaming counterpart of analysis.speedup.summarize (same keys)."""
+    stats = {
+        'n': sketch.count,
+        'min': sketch.min,
+        'max': sketch.max,
+        'mean': sketch.sum / sketch.count,
+        'median': sketch.quantile(0.5),
+    }
+    for q, value in sketch.percentiles(qs).items():
+        stats[f'p{q}'] = value
+    return stats
+
+
+def stream_summary(seq_path, target_path, bins=BINS, qs=PERCENTILES,
+                   alpha=0.005, chunksize=DEFAULT_CHUNKSIZE):
+    """
+    Return (counts, percentages, stats) in the same shape as the exact
+    histogram()/summarize() pair.
+    """
+    hist, sketch = stream_speedups(seq_path, target_path, bins, alpha, chunksize)
+    return hist.counts, hist.percentages(), summarize_sketch(sketch, qs)
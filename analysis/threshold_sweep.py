@@ -0,0 +1,183 @@
+"""
+Frequency-threshold sweep over raw path execution records.
+
+    python -m analysis.threshold_sweep records.npz --total-tx 567372
+
+Reproduces the tables in e2e/analyze.md and the coverage columns of
+table/storage-coverage-tradeoff.tex. An EntryPoint is retained at
+threshold t when it executed at least t times. A transaction is covered
+when every one of its executions went through a retained EntryPoint. It
+is Top-k covered when, in addition, every execution took one of the k
+most frequent paths of its EntryPoint.
+
+All the work happens in one pass. Keys are factorized and counted with
+np.bincount, and each transaction is reduced to its minimum EntryPoint
+frequency (and maximum path rank). After that, any threshold is a
+searchsorted or cumsum lookup over sorted frequencies, so adding
+thresholds costs almost nothing.
+"""
+
+import argparse
+import json
+import sys
+
+import numpy as np
+
+from analysis.records import factorize, group_ranks, load_path_records
+
+THRESHOLDS = [1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000, 10000]
+TOP_K = [1, 3, 5, 10]
+# Thresholds with a detail block in the report (e2e/analyze.md)
+DETAIL_THRESHOLDS = [1, 10, 50, 100, 500]
+
+
+def _count_at_least(sorted_values, thresholds):
+    """Number of entries >= t for every t (sorted_values ascending)."""
+    return sorted_values.size - np.searchsorted(sorted_values, thresholds, side='left')
+
+
+class ThresholdSweep:
+    """Per-EntryPoint/transaction reductions from which every threshold is read."""
+
+    def __init__(self, tx, entry_point, path_digest, top_k=TOP_K, total_tx=None):
+        tx_idx, _ = factorize(tx)
+        ep_idx, _ = factorize(entry_point)
+        path_idx, _ = factorize(path_digest)
+
+        self.n_exec = tx_idx.size
+        self.n_tx = int(tx_idx.max()) + 1 if tx_idx.size else 0
+        self.total_tx = total_tx or self.n_tx
+        self.top_k = list(top_k)
+
+        ep_freq = np.bincount(ep_idx)
+        self.ep_freq_sorted = np.sort(ep_freq)
+        # Executions covered by EntryPoints with freq >= t: suffix sums
+        self.ep_exec_suffix = np.cumsum(self.ep_freq_sorted[::-1])[::-1]
+        exec_freq = ep_freq[ep_idx]
+
+        # Rank each (EntryPoint, PathDigest) pair within its EntryPoint
+        pair_keys = ep_idx * (int(path_idx.max()) + 1) + path_idx
+        pair_idx, pair_uniques = factorize(pair_keys)
+        pair_freq = np.bincount(pair_idx)
+        pair_ep = pair_uniques // (int(path_idx.max()) + 1)
+        exec_rank = group_ranks(pair_ep, pair_freq)[pair_idx]
+
+        # Per-transaction minimum EntryPoint frequency / maximum path rank
+        tx_min_freq = np.full(self.n_tx, np.iinfo(np.int64).max, dtype=np.int64)
+        np.minimum.at(tx_min_freq, tx_idx, exec_freq)
+        tx_max_rank = np.zeros(self.n_tx, dtype=np.int64)
+        np.maximum.at(tx_max_rank, tx_idx, exec_rank)
+
+        self.tx_min_freq_sorted = np.sort(tx_min_freq)
+        self.tx_topk_sorted = {
+            k: np.sort(np.where(tx_max_rank < k, tx_min_freq, 0)) for k in self.top_k
+        }
+
+    def sweep(self, thresholds=THRESHOLDS):
+        """Return one row dict per threshold."""
+        thresholds = np.asarray(thresholds, dtype=np.int64)
+        retained = _count_at_least(self.ep_freq_sorted, thresholds)
+        start = np.searchsorted(self.ep_freq_sorted, thresholds, side='left')
+        suffix = np.r_[self.ep_exec_suffix, 0]
+        covered_exec = suffix[start]
+        covered_tx = _count_at_least(self.tx_min_freq_sorted, thresholds)
+        topk = {k: _count_at_least(v, thresholds) for k, v in self.tx_topk_sorted.items()}
+
+        rows = []
+        for i, t in enumerate(thresholds):
+            row = {
+                'threshold': int(t),
+                'entry_points': int(retained[i]),
+                'total_entry_points': int(self.ep_freq_sorted.size),
+                'executions': int(covered_exec[i]),
+                'total_executions': int(self.n_exec),
+                'transactions': int(covered_tx[i]),
+                'total_transactions': int(self.total_tx),
+            }
+            for k in self.top_k:
+                row[f'top{k}_transactions'] = int(topk[k][i])
+            rows.append(row)
+        return rows
+
+
+def format_table(rows, detail=DETAIL_THRESHOLDS, eoa_transfers=None):
+    """
+    Render rows in the layout of e2e/analyze.md: totals, the per-threshold
+    table, then a detail block for each representative threshold in detail.
+    eoa_transfers, when known, is the number of plain EOA transfers that
+    were filtered out of the transaction denominator.
+    """
+    def cell(n, total, width):
+        pct = n / total * 100 if total else 0.0
+        return f"{n:>{width},}/{total:>{width},} ({pct:5.1f}%)"
+
+    def share(n, total):
+        return f"{n / total * 100 if total else 0.0:.2f}%"
+
+    rule = '=' * 90
+    first = rows[0] if rows else {'total_transactions': 0, 'total_entry_points': 0,
+                                  'total_executions': 0}
+    valid = f"有效交易数: {first['total_transactions']:,}"
+    if eoa_transfers is not None:
+        everything = first['total_transactions'] + eoa_transfers
+        valid += (f" (过滤掉 {eoa_transfers:,} 个 EOA 纯转账，"
+                  f"{eoa_transfers / everything * 100 if everything else 0.0:.1f}%)")
+    lines = [valid, '',
+             f"总 EntryPoint 数: {first['total_entry_points']:,}",
+             f"总执行次数: {first['total_executions']:,}", '',
+             rule, '不同频率阈值的过滤效果', rule, '',
+             f"{'频率':>6} | {'保留EntryPoint':>22} | {'覆盖执行':>22} | {'覆盖交易':>22}",
+             '-' * 90]
+    for r in rows:
+        lines.append(f"{str(r['threshold']) + '+':>6} | "
+                     f"{cell(r['entry_points'], r['total_entry_points'], 7)} | "
+                     f"{cell(r['executions'], r['total_executions'], 9)} | "
+                     f"{cell(r['transactions'], r['total_transactions'], 9)}")
+    lines += ['', rule, '代表性频率阈值的详细分析', rule]
+
+    blocks = []
+    for r in (r for r in rows if r['threshold'] in set(detail)):
+        total = r['total_transactions']
+        block = [f"--- 频率 >= {r['threshold']} ---",
+                 f"保留 EntryPoint: {r['entry_points']:,} "
+                 f"({share(r['entry_points'], r['total_entry_points'])})",
+                 f"覆盖执行: {r['executions']:,}/{r['total_executions']:,} "
+                 f"({share(r['executions'], r['total_executions'])})",
+                 f"覆盖交易（所有路径）: {r['transactions']:,}/{total:,} "
+                 f"({share(r['transactions'], total)})"]
+        for k in (key[len('top'):-len('_transactions')] for key in r if key.startswith('top')):
+            n = r[f'top{k}_transactions']
+            block.append(f"覆盖交易（Top {k} 路径）: {n:,}/{total:,} ({share(n, total)})")
+        blocks.append('\n'.join(block))
+    return '\n'.join(lines) + '\n\n' + '\n\n\n'.join(blocks)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Frequency-threshold sweep over path records')
+    parser.add_argument('records', help='.csv or .npz execution records (see analysis.records)')
+    parser.add_argument('--thresholds', default=','.join(map(str, THRESHOLDS)),
+                        help='comma-separated frequency thresholds')
+    parser.add_argument('--top', default=','.join(map(str, TOP_K)),
+                        help='comma-separated Top-k path counts')
+    parser.add_argument('--total-tx', type=int, default=None,
+                        help='transaction denominator (default: transactions in the records)')
+    parser.add_argument('--eoa-transfers', type=int, default=None,
+                        help='plain EOA transfers excluded from the denominator, for the header')
+    parser.add_argument('--json', action='store_true', help='emit JSON rows')
+    args = parser.parse_args(argv)
+
+    records = load_path_records(args.records, columns=['tx', 'entry_point', 'path_digest'])
+    sweep = ThresholdSweep(records['tx'], records['entry_point'], records['path_digest'],
+                           top_k=[int(k) for k in args.top.split(',')],
+                           total_tx=args.total_tx)
+    rows = sweep.sweep([int(t) for t in args.thresholds.split(',')])
+    if args.json:
+        json.dump(rows, sys.stdout, indent=2)
+        sys.stdout.write('\n')
+    else:
+        print(format_table(rows, eoa_transfers=args.eoa_transfers))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,189 @@
+"""
+Time-weighted throughput of each configuration, for sync-time planning.
+
+    python -m analysis.throughput                       # deter optim optim_partial
+    python -m analysis.throughput optim --sync-blocks 1000000 --info e2e/block_info.csv
+
+The speedup figures weight every block equally. An operator syncing a
+chain pays the total wall-clock, so this report puts the per-block view
+next to the aggregate one:
+
+  * total-time speedup, sum(seq) / sum(target). It equals the per-block
+    ratios averaged with weights proportional to target time, so a slow
+    block counts for as much as the time it takes
+  * geometric-mean speedup, plus the arithmetic mean and median per block
+  * time concentration: the share of total time spent in the slowest
+    1/5/10/20/50% of blocks, and the share of blocks that makes up 50/80/90%
+    of it, for seq and target; this is the cumulative-time CDF
+  * blocks/s and, when gas_used is known, Mgas/s for seq and target
+  * projected sync hours for --sync-blocks blocks at the measured mean
+
+gas_used is taken from the target's block_stats CSV, else the seq one,
+else a block_info CSV (--info). Every metric is one vectorized pass over
+the joined arrays of a configuration (one sort for the CDF).
+"""
+
+import argparse
+import json
+import math
+import sys
+
+import numpy as np
+
+from analysis.cache import block_info_columns, block_stats_columns
+from analysis.speedup import DATA_DIR, block_stats_path, merge_join
+
+MODES = ['deter', 'optim', 'optim_partial']
+TOP_BLOCK_PCTS = [1, 5, 10, 20, 50]
+TIME_PCTS = [50, 80, 90]
+CURVE_POINTS = 101
+
+
+def time_concentration(times_ms, top=TOP_BLOCK_PCTS, shares=TIME_PCTS,
+                       points=CURVE_POINTS):
+    """
+    Cumulative share of total time over blocks sorted slowest first: the
+    time share of the slowest top% blocks, the block share needed for each
+    time share, and the curve at `points` log-spaced block fractions
+    (0.01% to 100%, so the few blocks that dominate stay visible).
+    """
+    desc = np.sort(np.asarray(times_ms, dtype=np.float64))[::-1]
+    cum = np.cumsum(desc)
+    n, total = desc.size, cum[-1]
+    at = np.maximum(np.ceil(n * np.asarray(top, dtype=np.float64) / 100).astype(np.int64), 1)
+    needed = np.searchsorted(cum, total * np.asarray(shares, dtype=np.float64) / 100) + 1
+    fractions = np.geomspace(0.01, 100, points)
+    k = np.ceil(n * fractions / 100).astype(np.int64)
+    curve = cum[np.maximum(k, 1) - 1] / total * 100
+    return {
+        'time_pct_of_top_blocks': {str(p): float(v) for p, v in zip(top, cum[at - 1] / total * 100)},
+        'block_pct_for_time': {str(s): float(v) for s, v in zip(shares, needed / n * 100)},
+        'curve_block_pct': fractions.tolist(),
+        'curve_time_pct': curve.tolist(),
+    }
+
+
+def throughput(seq_ms, target_ms, gas_used=None, sync_blocks=None):
+    """Aggregate and per-block speedups, throughput and time concentration."""
+    seq_ms = np.asarray(seq_ms, dtype=np.float64)
+    target_ms = np.asarray(target_ms, dtype=np.float64)
+    if not seq_ms.size:
+        raise ValueError("no blocks to aggregate")
+    ratio = seq_ms / target_ms
+    seq_total, target_total = float(seq_ms.sum()), float(target_ms.sum())
+    result = {
+        'blocks': int(seq_ms.size),
+        'seq_total_s': seq_total / 1000,
+        'target_total_s': target_total / 1000,
+        'saved_s': (seq_total - target_total) / 1000,
+        'time_speedup': seq_total / target_total,
+        'geomean_speedup': float(np.exp(np.mean(np.log(ratio)))),
+        'mean_speedup': float(np.mean(ratio)),
+        'median_speedup': float(np.median(ratio)),
+        'slower_time_pct': float(target_ms[ratio < 1].sum() / target_total * 100),
+        'blocks_per_s': {'seq': seq_ms.size / seq_total * 1000,
+                         'target': seq_ms.size / target_total * 1000},
+        'seq': time_concentration(seq_ms),
+        'target': time_concentration(target_ms),
+    }
+    if gas_used is not None:
+        gas_used = np.asarray(gas_used, dtype=np.float64)
+        known = ~np.isnan(gas_used)
+        gas = float(gas_used[known].sum())
+        result['gas_blocks'] = int(known.sum())
+        result['mgas_per_s'] = {
+            'seq': gas / float(seq_ms[known].sum()) / 1000 if known.any() else math.nan,
+            'target': gas / float(target_ms[known].sum()) / 1000 if known.any() else math.nan,
+        }
+    if sync_blocks:
+        result['sync_blocks'] = int(sync_blocks)
+        result['sync_hours'] = {'seq': sync_blocks * seq_total / seq_ms.size / 3.6e6,
+                                'target': sync_blocks * target_total / seq_ms.size / 3.6e6}
+    return result
+
+
+def _gas_column(blocks, sources):
+    """gas_used for blocks from the first source column that has it (NaN if none)."""
+    for source_blocks, gas in sources:
+        if gas is None:
+            continue
+        source_idx, idx = merge_join(np.asarray(source_blocks, dtype=np.int64), blocks)
+        column = np.full(blocks.size, np.nan)
+        column[idx] = np.asarray(gas)[source_idx]
+        return column
+    return None
+
+
+def throughput_stats(modes=MODES, info=None, sync_blocks=None, data_dir=DATA_DIR):
+    """{mode: throughput report} against block_stats_seq.csv."""
+    seq = block_stats_columns(block_stats_path('seq', data_dir))
+    seq_blocks = np.asarray(seq['block_number'], dtype=np.int64)
+    info_columns = block_info_columns(info) if info is not None else {}
+    result = {}
+    for mode in modes:
+        target = block_stats_columns(block_stats_path(mode, data_dir))
+        seq_idx, target_idx = merge_join(seq_blocks,
+                                         np.asarray(target['block_number'], dtype=np.int64))
+        blocks = seq_blocks[seq_idx]
+        gas = _gas_column(blocks, [(target['block_number'], target.get('gas_used')),
+                                   (seq['block_number'], seq.get('gas_used')),
+                                   (info_columns.get('block_number'),
+                                    info_columns.get('gas_used'))])
+        result[mode] = throughput(np.asarray(seq['elapsed_time_ms'])[seq_idx],
+                                  np.asarray(target['elapsed_time_ms'])[target_idx],
+                                  gas, sync_blocks)
+    return result
+
+
+def cached_throughput(modes=MODES, info=None, sync_blocks=None):
+    """throughput_stats served from the results store (see analysis.results)."""
+    from analysis.results import memoize
+
+    inputs = [block_stats_path(mode) for mode in ['seq', *modes]] + ([info] if info else [])
+    return memoize('throughput', lambda: throughput_stats(modes, info, sync_blocks), inputs,
+                   {'modes': list(modes), 'info': info, 'sync_blocks': sync_blocks})
+
+
+def format_report(mode, r):
+    lines = [f"{mode}: {r['blocks']:,} blocks, seq {r['seq_total_s']:,.1f} s -> "
+             f"target {r['target_total_s']:,.1f} s ({r['saved_s']:,.1f} s saved)",
+             f"  total-time speedup {r['time_speedup']:.2f}×, geomean {r['geomean_speedup']:.2f}×, "
+             f"per-block mean {r['mean_speedup']:.2f}×, median {r['median_speedup']:.2f}×",
+             f"  blocks/s: seq {r['blocks_per_s']['seq']:.2f}, "
+             f"target {r['blocks_per_s']['target']:.2f}"]
+    if 'mgas_per_s' in r:
+        lines.append(f"  Mgas/s: seq {r['mgas_per_s']['seq']:.1f}, "
+                     f"target {r['mgas_per_s']['target']:.1f} ({r['gas_blocks']:,} blocks with gas)")
+    if 'sync_hours' in r:
+        lines.append(f"  sync {r['sync_blocks']:,} blocks: seq {r['sync_hours']['seq']:,.1f} h, "
+                     f"target {r['sync_hours']['target']:,.1f} h")
+    lines.append(f"  {r['slower_time_pct']:.1f}% of target time is spent in blocks slower than seq")
+    for side in ['seq', 'target']:
+        c = r[side]
+        top = ', '.join(f"top {p}%: {v:.1f}%" for p, v in c['time_pct_of_top_blocks'].items())
+        need = ', '.join(f"{s}% in {v:.1f}%" for s, v in c['block_pct_for_time'].items())
+        lines.append(f"  {side} time in slowest blocks: {top}; {need} of blocks")
+    return '\n'.join(lines)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('modes', nargs='*', default=MODES,
+                        help=f"block_stats modes (default: {' '.join(MODES)})")
+    parser.add_argument('--info', help='block_info CSV with a gas_used column')
+    parser.add_argument('--sync-blocks', type=int,
+                        help='project sync time for this many blocks')
+    parser.add_argument('--json', action='store_true')
+    args = parser.parse_args(argv)
+
+    stats = cached_throughput(args.modes, args.info, args.sync_blocks)
+    if args.json:
+        json.dump(stats, sys.stdout, indent=2)
+        sys.stdout.write('\n')
+    else:
+        print('\n\n'.join(format_report(mode, r) for mode, r in stats.items()))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
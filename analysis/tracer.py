@@ -0,0 +1,423 @@
+"""
+Offline Path Tracer: raw opcode traces to PathLogs, PathDigests and GasChunks.
+
+    python -m analysis.tracer trace.bin -o pathlogs.bin [--plans txplans.csv]
+
+A trace is a compact binary stream of everything the EVM executed, with
+call-frame boundaries:
+
+    u32  magic 0x43525448 ('HTRC')   u32 version (1)
+    u64  n_ops   u64 n_events   u64 n_pushes
+    u8   opcodes[n_ops]                  in execution order, all frames
+    16B  events[n_events]                u64 position, u8 kind (1 enter,
+                                         2 exit), u8 status (exit: 0 ok,
+                                         1 revert, 2 exceptional halt), pad
+    u8   immediates[32 * n_pushes]       big-endian PUSH values, in order
+
+An enter event at position p starts a frame whose opcodes begin at p. The
+parent's opcodes resume at the matching exit. Top-level frames are
+transactions. This reproduces Algorithm "Shadow Stack Tracing" in
+algorithm/shadow-stack-tracing.tex without stepping opcode by opcode:
+
+  * Stack heights come from a segmented cumsum of (outputs - inputs).
+  * Every stack write is keyed by (slot, time). Producing opcodes write a
+    fresh LSN, while DUPn and SWAPn write copies of slots they read just
+    before. A pop at time t reads the last write to its slot before t,
+    found with one searchsorted over all writes of all frames.
+  * Copy chains (DUP of a SWAPped DUP ...) collapse by vectorized pointer
+    jumping, so each D_in entry resolves to the LSN that produced it.
+  * PathDigest is 64-bit FNV-1a over the frame's executed opcodes. It is
+    advanced in lockstep over all frames, one opcode column per step.
+  * GasChunks close at GAS/RETURN/STOP/REVERT/CREATE/CREATE2 and carry
+    the static gas since the previous delimiter. A path without a final
+    delimiter gets a synthetic STOP entry, counted in the PathLog's
+    synthetic_entries so it is never mistaken for an executed opcode.
+
+Frames that end in an exceptional halt are digested but not emitted, as in
+the tracer's health check. Frames whose heights underflow (truncated
+traces) are dropped and counted. The trace is memory-mapped and processed
+in batches of whole transactions.
+"""
+
+import argparse
+import collections
+import struct
+import sys
+import time
+
+import numpy as np
+
+from analysis.evm import (DUP1, DUP16, GAS_DELIMITERS, IS_PUSH, IS_STACK_ONLY, OPCODES,
+                          STACK_IN, STACK_OUT, STATIC_GAS, SWAP1, SWAP16)
+from analysis.pathlog import write_pathlogs
+
+TRACE_MAGIC = 0x43525448
+TRACE_HEADER = struct.Struct('<IIQQQ')
+EVENT_DTYPE = np.dtype([('position', '<u8'), ('kind', 'u1'), ('status', 'u1'),
+                        ('pad', 'V6')])
+ENTER, EXIT = 1, 2
+OK, REVERTED, HALTED = range(3)
+STATUS_NAMES = ['ok', 'revert', 'halt']
+
+FNV_OFFSET = np.uint64(0xcbf29ce484222325)
+FNV_PRIME = np.uint64(0x100000001b3)
+BATCH_OPS = 1 << 24
+
+IS_DELIMITER = np.zeros(256, dtype=bool)
+IS_DELIMITER[GAS_DELIMITERS] = True
+DELTA = STACK_OUT - STACK_IN
+STOP = OPCODES['STOP']
+
+
+def write_trace(path, opcodes, events, immediates):
+    """Write a trace; events are (position, kind, status) triples."""
+    opcodes = np.asarray(opcodes, dtype=np.uint8)
+    table = np.zeros(len(events), dtype=EVENT_DTYPE)
+    if len(events):
+        table['position'], table['kind'], table['status'] = np.asarray(events).T
+    immediates = np.asarray(immediates, dtype=np.uint8).reshape(-1, 32)
+    with open(path, 'wb') as f:
+        f.write(TRACE_HEADER.pack(TRACE_MAGIC, 1, opcodes.size, table.size, immediates.shape[0]))
+        f.write(opcodes.tobytes())
+        f.write(table.tobytes())
+        f.write(immediates.tobytes())
+
+
+def read_trace(path):
+    """(opcodes, events, immediates) memory-mapped from a trace file."""
+    with open(path, 'rb') as f:
+        magic, version, n_ops, n_events, n_pushes = TRACE_HEADER.unpack(
+            f.read(TRACE_HEADER.size))
+    if magic != TRACE_MAGIC or version != 1:
+        raise ValueError(f"{path}: not a version 1 opcode trace")
+    pos = TRACE_HEADER.size
+    opcodes = np.memmap(path, dtype=np.uint8, mode='r', offset=pos, shape=(n_ops,))
+    pos += n_ops
+    events = np.memmap(path, dtype=EVENT_DTYPE, mode='r', offset=pos, shape=(n_events,))
+    pos += n_events * EVENT_DTYPE.itemsize
+    immediates = np.memmap(path, dtype=np.uint8, mode='r', offset=pos, shape=(n_pushes, 32))
+    return opcodes, events, immediates
+
+
+def fnv1a_segments(values, starts, lengths):
+    """64-bit FNV-1a of values[starts[i]:starts[i] + lengths[i]] for every i."""
+    order = np.argsort(-lengths, kind='stable')
+    starts, lengths = starts[order], lengths[order]
+    digest = np.full(starts.size, FNV_OFFSET, dtype=np.uint64)
+    values = np.asarray(values, dtype=np.uint64)
+    # Longest first, so the frames still running are always a prefix
+    descending = lengths[::-1]
+    for step in range(int(lengths[0]) if lengths.size else 0):
+        active = starts.size - int(np.searchsorted(descending, step, side='right'))
+        digest[:active] = (digest[:active] ^ values[starts[:active] + step]) * FNV_PRIME
+    out = np.empty_like(digest)
+    out[order] = digest
+    return out
+
+
+def segment_cumsum(values, starts):
+    """Inclusive cumulative sum restarting at every segment start (starts[0] == 0)."""
+    total = np.cumsum(values)
+    marker = np.zeros(total.size, dtype=np.int64)
+    marker[starts] = 1
+    return total - np.r_[0, total][starts][np.cumsum(marker) - 1]
+
+
+def assign_frames(events, n_ops, first_op=0):
+    """
+    Frame id of every opcode (-1 outside any frame) plus per-frame parent,
+    depth, transaction, enter order and exit status.
+    """
+    label = np.full(n_ops, -1, dtype=np.int64)
+    parent, depth, tx, status = [], [], [], []
+    stack, last, n_tx = [], first_op, -1
+    for position, kind, code in zip(events['position'].tolist(), events['kind'].tolist(),
+                                    events['status'].tolist()):
+        if stack:
+            label[last - first_op:position - first_op] = stack[-1]
+        last = position
+        if kind == ENTER:
+            if not stack:
+                n_tx += 1
+            parent.append(stack[-1] if stack else -1)
+            depth.append(len(stack))
+            tx.append(n_tx)
+            status.append(HALTED)
+            stack.append(len(parent) - 1)
+        elif stack:
+            status[stack.pop()] = code
+    if stack:
+        raise ValueError('trace batch ends inside a frame')
+    return label, {'parent': np.array(parent, dtype=np.int64),
+                   'depth': np.array(depth, dtype=np.int64),
+                   'tx': np.array(tx, dtype=np.int64),
+                   'status': np.array(status, dtype=np.int64)}
+
+
+def build_frames(opcodes, events, immediates, first_op=0, first_push=0):
+    """
+    Trace one batch of whole transactions. Returns (frames, pathlogs): the
+    per-frame columns (digest, ops, entries, valid, ...) and the PathLog
+    dicts of every emitted frame, keyed by frame id.
+    """
+    opcodes = np.asarray(opcodes, dtype=np.int64)
+    label, frames = assign_frames(events, opcodes.size, first_op)
+    n_frames = frames['parent'].size
+    push_index = np.cumsum(IS_PUSH[opcodes]) - 1 + first_push
+
+    # Opcodes grouped by frame, in execution order within each frame
+    order = np.flatnonzero(label >= 0)
+    order = order[np.argsort(label[order], kind='stable')]
+    op = opcodes[order]
+    fid = label[order]
+    n_ops = np.bincount(fid, minlength=n_frames)
+    frame_start = np.r_[0, np.cumsum(n_ops)[:-1]]
+    frames['ops'] = n_ops
+    frames['digest'] = fnv1a_segments(op, frame_start, n_ops)
+    nonempty = n_ops > 0
+    starts = frame_start[nonempty]
+
+    # Stack heights before/after each opcode, per frame
+    height_after = segment_cumsum(DELTA[op], starts)
+    height_before = height_after - DELTA[op]
+    underflow = np.bincount(fid[height_before < STACK_IN[op]], minlength=n_frames) > 0
+    frames['valid'] = ~underflow
+
+    is_entry = ~IS_STACK_ONLY[op]
+    lsn = segment_cumsum(is_entry.astype(np.int64), starts) - 1
+    g = np.arange(op.size)
+
+    # Stack writes: fresh LSNs from producing entries, copies from DUP/SWAP
+    fresh = np.flatnonzero(is_entry & (STACK_OUT[op] > 0))
+    dup = np.flatnonzero((op >= DUP1) & (op <= DUP16))
+    swap = np.flatnonzero((op >= SWAP1) & (op <= SWAP16))
+    n_dup = op[dup] - DUP1 + 1
+    n_swap = op[swap] - SWAP1 + 1
+    w_slot = np.concatenate([height_after[fresh] - 1, height_after[dup] - 1,
+                             height_before[swap] - 1, height_before[swap] - 1 - n_swap])
+    w_time = np.concatenate([fresh, dup, swap, swap])
+    w_lsn = np.concatenate([lsn[fresh], np.full(dup.size + 2 * swap.size, -1)])
+    # Slot each copy reads just before it is written
+    src_slot = np.concatenate([np.full(fresh.size, -1), height_before[dup] - n_dup,
+                               height_before[swap] - 1 - n_swap, height_before[swap] - 1])
+
+    span = op.size + 1
+    w_key = w_slot * span + w_time
+    w_order = np.argsort(w_key, kind='stable')
+    w_key, w_time, w_lsn, src_slot = (w_key[w_order], w_time[w_order], w_lsn[w_order],
+                                      src_slot[w_order])
+
+    def last_write(slots, times):
+        """Index of the last write to each slot strictly before each time."""
+        return np.searchsorted(w_key, slots * span + times, side='left') - 1
+
+    copy = src_slot >= 0
+    root = np.arange(w_key.size)
+    ok = copy & ~underflow[fid[w_time]]
+    root[ok] = last_write(src_slot[ok], w_time[ok])
+    while True:
+        jumped = root[root]
+        if np.array_equal(jumped, root):
+            break
+        root = jumped
+    w_value = w_lsn[root]
+
+    # D_in of every entry, top of stack first
+    entries = np.flatnonzero(is_entry)
+    k = np.where(underflow[fid[entries]], 0, STACK_IN[op[entries]])
+    dep_owner = np.repeat(entries, k)
+    pop = np.arange(dep_owner.size) - np.repeat(np.cumsum(k) - k, k)
+    deps = w_value[last_write(height_before[dep_owner] - 1 - pop, dep_owner)] \
+        if dep_owner.size else np.empty(0, dtype=np.int64)
+
+    # GasChunks: static gas since the previous delimiter, delimiter included
+    gas = segment_cumsum(STATIC_GAS[op], starts)
+    delimiter = np.flatnonzero(IS_DELIMITER[op])
+    bounds = np.r_[frame_start, op.size]
+    entry_bounds = np.searchsorted(entries, bounds)
+    delim_bounds = np.searchsorted(delimiter, bounds)
+    cumulative = gas[delimiter]
+    previous = np.r_[0, cumulative[:-1]]
+    previous[delim_bounds[:-1][delim_bounds[:-1] < delimiter.size]] = 0
+    chunk_gas = cumulative - previous
+    chunk_entry = lsn[delimiter]
+
+    # Frames whose path does not end on a delimiter get a synthetic STOP
+    # entry closing the trailing chunk
+    emit = frames['valid'] & nonempty & (frames['status'] != HALTED)
+    last_op = frame_start + n_ops - 1
+    has_delim = np.diff(delim_bounds) > 0
+    last = delim_bounds[1:] - 1
+    last_delim = np.where(has_delim, np.r_[delimiter, -1][last], -1)
+    closed = np.where(has_delim, np.r_[cumulative, 0][last], 0)
+    stop = emit & (last_delim != last_op)
+    tail = np.flatnonzero(stop)
+    entry_ops = np.insert(op[entries], entry_bounds[tail + 1], STOP)
+    entry_k = np.insert(k, entry_bounds[tail + 1], 0)
+    chunk_gas = np.insert(chunk_gas, delim_bounds[tail + 1], gas[last_op[tail]] - closed[tail])
+    chunk_entry = np.insert(chunk_entry, delim_bounds[tail + 1], np.diff(entry_bounds)[tail])
+    shift = np.r_[0, np.cumsum(stop)]
+    entry_bounds_ext = entry_bounds + shift
+    chunk_bounds = delim_bounds + shift
+    indptr = np.r_[0, np.cumsum(entry_k)]
+    dep_bounds = indptr[entry_bounds_ext]
+
+    is_push = IS_PUSH[op[entries]]
+    push_bounds = np.r_[0, np.cumsum(is_push)][entry_bounds]
+    emitted_push = np.repeat(emit, np.diff(entry_bounds))[is_push]
+    push_rows = np.zeros(is_push.sum(), dtype=np.int64)
+    push_rows[emitted_push] = np.arange(emitted_push.sum())
+    pushed = np.asarray(immediates[push_index[order[entries[is_push][emitted_push]]]])
+
+    pathlogs = {}
+    for f in np.flatnonzero(emit).tolist():
+        e0, e1 = entry_bounds_ext[f], entry_bounds_ext[f + 1]
+        c0, c1 = chunk_bounds[f], chunk_bounds[f + 1]
+        p0 = push_rows[push_bounds[f]] if push_bounds[f] < push_bounds[f + 1] else 0
+        pathlogs[f] = {
+            'native_opcodes': int(n_ops[f]),
+            'synthetic_entries': int(stop[f]),
+            'opcodes': entry_ops[e0:e1],
+            'indptr': indptr[e0:e1 + 1] - indptr[e0],
+            'deps': deps[dep_bounds[f]:dep_bounds[f + 1]],
+            'chunk_entry': chunk_entry[c0:c1],
+            'chunk_gas': chunk_gas[c0:c1],
+            'immediates': pushed[p0:p0 + push_bounds[f + 1] - push_bounds[f]],
+        }
+    frames['entries'] = np.diff(entry_bounds)
+    return frames, pathlogs
+
+
+def iter_batches(events, n_ops, batch_ops=BATCH_OPS):
+    """Event slices covering whole transactions and ~batch_ops opcodes each."""
+    depth = np.cumsum(np.where(events['kind'] == ENTER, 1, -1))
+    tx_end = np.flatnonzero((depth == 0) & (events['kind'] == EXIT))
+    if not tx_end.size:
+        return
+    positions = np.asarray(events['position'][tx_end], dtype=np.int64)
+    cuts = np.unique(np.searchsorted(positions, np.arange(batch_ops, n_ops, batch_ops)))
+    cuts = cuts[cuts < tx_end.size - 1]
+    first = 0
+    for end in np.r_[tx_end[cuts], tx_end[-1]].tolist():
+        yield first, end + 1
+        first = end + 1
+
+
+def trace_file(path, out=None, batch_ops=BATCH_OPS):
+    """
+    Trace a whole file, appending PathLogs to `out` when given. Returns the
+    per-frame columns of every batch concatenated (frame ids are global).
+    """
+    opcodes, events, immediates = read_trace(path)
+    push_offsets = np.r_[0, np.cumsum(IS_PUSH[np.asarray(opcodes)])] \
+        if opcodes.size else np.zeros(1, dtype=np.int64)
+    columns = collections.defaultdict(list)
+    if out is not None:
+        open(out, 'wb').close()
+    frame_base = tx_base = 0
+    for lo, hi in iter_batches(events, opcodes.size, batch_ops):
+        batch = events[lo:hi]
+        first = int(batch['position'][0])
+        last = int(batch['position'][-1])
+        frames, pathlogs = build_frames(opcodes[first:last], batch, immediates,
+                                        first, int(push_offsets[first]))
+        frames['parent'] = np.where(frames['parent'] >= 0, frames['parent'] + frame_base, -1)
+        frames['tx'] += tx_base
+        if out is not None:
+            write_pathlogs(out, ((frames['digest'][f], log) for f, log in pathlogs.items()),
+                           mode='ab')
+        frames['emitted'] = np.zeros(frames['digest'].size, dtype=bool)
+        frames['emitted'][list(pathlogs)] = True
+        for name, values in frames.items():
+            columns[name].append(values)
+        frame_base += frames['digest'].size
+        tx_base = int(frames['tx'].max()) + 1 if frames['tx'].size else tx_base
+    frames = {name: np.concatenate(values) for name, values in columns.items()}
+    frames['collision'] = find_collisions(opcodes, events, frames)
+    return frames
+
+
+def find_collisions(opcodes, events, frames):
+    """
+    Mask of frames whose PathDigest equals an earlier frame's but whose
+    opcode sequence differs (a true FNV-1a collision).
+    """
+    collision = np.zeros(frames['digest'].size, dtype=bool)
+    _, first, inverse, counts = np.unique(frames['digest'], return_index=True,
+                                          return_inverse=True, return_counts=True)
+    shared = np.flatnonzero(counts[inverse.ravel()] > 1)
+    shared = shared[frames['ops'][shared] > 0]
+    if not shared.size:
+        return collision
+    # Same digest but different length is already a collision
+    leader = first[inverse.ravel()[shared]]
+    differs = frames['ops'][shared] != frames['ops'][leader]
+    pending = shared[~differs]
+    collision[shared[differs]] = True
+    if pending.size:
+        sequences = frame_opcodes(opcodes, events, set(pending.tolist()) |
+                                  set(first[inverse.ravel()[pending]].tolist()))
+        for f, lead in zip(pending.tolist(), first[inverse.ravel()[pending]].tolist()):
+            collision[f] = sequences[f] != sequences[lead]
+    return collision
+
+
+def frame_opcodes(opcodes, events, wanted):
+    """Executed opcode bytes of the wanted frame ids (global enter order)."""
+    pieces = collections.defaultdict(list)
+    stack, last, frame = [], 0, -1
+    for position, kind in zip(events['position'].tolist(), events['kind'].tolist()):
+        if stack and stack[-1] in wanted:
+            pieces[stack[-1]].append(bytes(opcodes[last:position]))
+        last = position
+        if kind == ENTER:
+            frame += 1
+            stack.append(frame)
+        elif stack:
+            stack.pop()
+    return {f: b''.join(pieces[f]) for f in wanted}
+
+
+def write_plans(path, frames):
+    """TxPlans as CSV: one row per frame in enter order within its transaction."""
+    with open(path, 'w') as out:
+        out.write('tx,frame,depth,path_digest,status,emitted\n')
+        out.writelines(f"{t},{i},{d},{digest:#018x},{STATUS_NAMES[s]},{int(e)}\n"
+                       for i, (t, d, digest, s, e) in enumerate(zip(
+                           frames['tx'].tolist(), frames['depth'].tolist(),
+                           frames['digest'].tolist(), frames['status'].tolist(),
+                           frames['emitted'].tolist())))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='PathLogs, PathDigests and GasChunks '
+                                                 'from raw opcode traces')
+    parser.add_argument('trace', help='binary opcode trace (see module docstring)')
+    parser.add_argument('-o', '--output', help='PathLog dump to write')
+    parser.add_argument('--plans', help='write per-frame TxPlan rows as CSV')
+    parser.add_argument('--batch-ops', type=int, default=BATCH_OPS)
+    args = parser.parse_args(argv)
+
+    started = time.perf_counter()
+    frames = trace_file(args.trace, args.output, args.batch_ops)
+    elapsed = time.perf_counter() - started
+    if args.plans:
+        write_plans(args.plans, frames)
+
+    n = frames['digest'].size
+    emitted = frames['emitted']
+    unique = np.unique(frames['digest'][emitted]).size
+    print(f"Frames: {n:,} in {int(frames['tx'].max()) + 1 if n else 0:,} transactions, "
+          f"{int(frames['ops'].sum()):,} opcodes ({elapsed:.2f} s, "
+          f"{n / elapsed * 60 if elapsed else 0:,.0f} frames/min)")
+    for code, name in enumerate(STATUS_NAMES):
+        print(f"  {name:>6}: {int((frames['status'] == code).sum()):>10,}")
+    print(f"PathLogs emitted: {int(emitted.sum()):,} ({unique:,} distinct PathDigests), "
+          f"{int(frames['entries'][emitted].sum()):,} entries")
+    print(f"Dropped for stack underflow: {int((~frames['valid']).sum()):,}")
+    print(f"PathDigest collisions: {int(frames['collision'].sum()):,}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
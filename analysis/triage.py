@@ -0,0 +1,201 @@
+"""
+Triage of blocks that run slower than the sequential baseline.
+
+    python -m analysis.triage optim --info e2e/block_info.csv --top 20 --by fallbacks
+
+A block regresses when the target configuration takes longer than the
+sequential run (speedup < 1, the `<1×` bin of the speedup figures). Each
+regression is ranked by absolute time lost, target - seq in ms, since a
+0.9× block of 4 s hurts more than a 0.5× block of 2 ms.
+
+An optional per-block attribute CSV (block_number plus numeric columns
+such as tx_count, gas_used, cache_misses, fallbacks, unique_paths) is
+merge-joined onto the target's blocks. The report lists the worst blocks
+with their attributes and compares the attribute medians of regressed and
+non-regressed blocks. --by buckets blocks by quantiles of one attribute,
+showing where the regressions and lost time concentrate. The join, ranking
+and group-by are all array operations, so the report stays interactive at
+millions of blocks.
+"""
+
+import argparse
+import json
+import sys
+
+import numpy as np
+
+from analysis.cache import block_info_columns
+from analysis.speedup import SpeedupEngine, merge_join
+
+
+class Triage:
+    """Regressions of one attached target, optionally joined with block attributes."""
+
+    def __init__(self, engine, name, info_path=None):
+        self.name = name
+        self.blocks, self.seq, self.target = engine.targets[name]
+        self.attributes = {}
+        if info_path is not None:
+            info = block_info_columns(info_path)
+            info_idx, block_idx = merge_join(np.asarray(info['block_number']),
+                                             self.blocks.astype(np.int64))
+            for col, values in info.items():
+                if col == 'block_number':
+                    continue
+                joined = np.full(self.blocks.size, np.nan)
+                joined[block_idx] = values[info_idx]
+                self.attributes[col] = joined
+        self.lost_ms = self.target - self.seq
+        self.regressed = self.lost_ms > 0
+
+    def worst(self, top=20):
+        """Indices of the top regressions by time lost, worst first."""
+        lost = np.where(self.regressed, self.lost_ms, -np.inf)
+        top = min(top, int(self.regressed.sum()))
+        if not top:
+            return np.empty(0, dtype=np.intp)
+        idx = np.argpartition(-lost, top - 1)[:top]
+        return idx[np.argsort(-lost[idx], kind='stable')]
+
+    def summary(self):
+        """Counts, shares and time lost over all joined blocks."""
+        n = int(self.blocks.size)
+        lost = self.lost_ms[self.regressed]
+        return {
+            'target': self.name,
+            'blocks': n,
+            'regressed': int(lost.size),
+            'regressed_pct': float(lost.size / n * 100) if n else 0.0,
+            'time_lost_ms': float(lost.sum()),
+            'time_lost_pct_of_seq': float(lost.sum() / self.seq.sum() * 100) if n else 0.0,
+            'median_lost_ms': float(np.median(lost)) if lost.size else 0.0,
+        }
+
+    def attribute_contrast(self):
+        """Median of every attribute for regressed vs. other blocks."""
+        return {col: {'regressed': float(np.nanmedian(values[self.regressed]))
+                      if np.isfinite(values[self.regressed]).any() else None,
+                      'other': float(np.nanmedian(values[~self.regressed]))
+                      if np.isfinite(values[~self.regressed]).any() else None}
+                for col, values in self.attributes.items()}
+
+    def group_by(self, attribute, buckets=5):
+        """
+        Regression count, rate and time lost per quantile bucket of an
+        attribute. Blocks without the attribute go into a last bucket whose
+        low and high are None, so the buckets always add up to every block.
+        """
+        values = self.attributes[attribute]
+        known = np.isfinite(values)
+        lost_ms = np.where(self.regressed, self.lost_ms, 0)
+        groups = []
+        if known.any():
+            edges = np.unique(np.quantile(values[known], np.linspace(0, 1, buckets + 1)))
+            bucket = np.clip(np.searchsorted(edges, values[known], side='right') - 1,
+                             0, max(edges.size - 2, 0))
+            n_buckets = max(edges.size - 1, 1)
+            blocks = np.bincount(bucket, minlength=n_buckets)
+            regressed = np.bincount(bucket, weights=self.regressed[known], minlength=n_buckets)
+            lost = np.bincount(bucket, weights=lost_ms[known], minlength=n_buckets)
+            groups = [(float(edges[i]), float(edges[min(i + 1, edges.size - 1)]),
+                       blocks[i], regressed[i], lost[i]) for i in range(n_buckets)]
+        if not known.all():
+            groups.append((None, None, (~known).sum(), self.regressed[~known].sum(),
+                           lost_ms[~known].sum()))
+        return [{'low': low, 'high': high, 'blocks': int(blocks), 'regressed': int(regressed),
+                 'regressed_pct': float(regressed / blocks * 100) if blocks else 0.0,
+                 'time_lost_ms': float(lost)}
+                for low, high, blocks, regressed, lost in groups]
+
+    def rows(self, idx):
+        """Report rows (dicts) for the given block indices."""
+        rows = []
+        for i in idx.tolist():
+            row = {'block_number': int(self.blocks[i]), 'seq_ms': float(self.seq[i]),
+                   'target_ms': float(self.target[i]),
+                   'speedup': float(self.seq[i] / self.target[i]),
+                   'lost_ms': float(self.lost_ms[i])}
+            for col, values in self.attributes.items():
+                row[col] = None if np.isnan(values[i]) else float(values[i])
+            rows.append(row)
+        return rows
+
+    def report(self, top=20, by=None, buckets=5):
+        """Everything the CLI prints, as one JSON-able dict."""
+        report = {'summary': self.summary(), 'worst': self.rows(self.worst(top))}
+        if self.attributes:
+            report['attributes'] = self.attribute_contrast()
+        if by is not None:
+            report['by'] = {'attribute': by, 'buckets': self.group_by(by, buckets)}
+        return report
+
+
+def _fmt(value):
+    if value is None:
+        return '-'
+    if float(value).is_integer() or abs(value) >= 1000:
+        return f'{value:,.0f}'
+    return f'{value:.3g}'
+
+
+def format_report(report):
+    """Compact text rendering of Triage.report()."""
+    s = report['summary']
+    lines = [f"{s['target']}: {s['regressed']:,}/{s['blocks']:,} blocks slower than seq "
+             f"({s['regressed_pct']:.1f}%), {s['time_lost_ms']:,.1f} ms lost "
+             f"({s['time_lost_pct_of_seq']:.2f}% of seq time, median {s['median_lost_ms']:.2f} ms)"]
+    worst = report['worst']
+    if worst:
+        columns = list(worst[0])
+        header = ['block', 'seq ms', 'target ms', 'speedup', 'lost ms'] + columns[5:]
+        cells = [[str(r['block_number']), f"{r['seq_ms']:.2f}", f"{r['target_ms']:.2f}",
+                  f"{r['speedup']:.2f}×", f"{r['lost_ms']:.2f}"] +
+                 [_fmt(r[c]) for c in columns[5:]] for r in worst]
+        widths = [max(len(h), *(len(c[i]) for c in cells)) for i, h in enumerate(header)]
+        lines.append('')
+        lines.append('  '.join(h.rjust(w) for h, w in zip(header, widths)))
+        lines.extend('  '.join(c.rjust(w) for c, w in zip(row, widths)) for row in cells)
+    if report.get('attributes'):
+        lines.append('\nAttribute medians (regressed vs. other):')
+        for col, m in report['attributes'].items():
+            lines.append(f"  {col:>16}: {_fmt(m['regressed']):>12} vs {_fmt(m['other']):>12}")
+    if 'by' in report:
+        lines.append(f"\nRegressions by {report['by']['attribute']}:")
+        for b in report['by']['buckets']:
+            lines.append(f"  [{_fmt(b['low']):>10}, {_fmt(b['high']):>10}]  "
+                         f"{b['regressed']:>6,}/{b['blocks']:<7,} ({b['regressed_pct']:5.1f}%)  "
+                         f"{b['time_lost_ms']:12,.1f} ms lost")
+    return '\n'.join(lines)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Rank blocks slower than the sequential run')
+    parser.add_argument('targets', nargs='+', help='block_stats modes, e.g. deter optim')
+    parser.add_argument('--info', help='per-block attribute CSV keyed by block_number')
+    parser.add_argument('--top', type=int, default=20, help='worst blocks to list')
+    parser.add_argument('--by', help='attribute to bucket regressions by (needs --info)')
+    parser.add_argument('--buckets', type=int, default=5, help='quantile buckets for --by')
+    parser.add_argument('--json', action='store_true', help='emit the reports as JSON')
+    args = parser.parse_args(argv)
+    if args.by and not args.info:
+        parser.error('--by needs --info')
+
+    engine = SpeedupEngine()
+    reports = {}
+    for name in args.targets:
+        engine.attach(name)
+        triage = Triage(engine, name, args.info)
+        if args.by and args.by not in triage.attributes:
+            parser.error(f"unknown attribute {args.by!r}; have {', '.join(triage.attributes)}")
+        reports[name] = triage.report(args.top, args.by, args.buckets)
+
+    if args.json:
+        json.dump(reports, sys.stdout, indent=2)
+        sys.stdout.write('\n')
+    else:
+        print('\n\n'.join(format_report(r) for r in reports.values()))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,57 +1,39 @@
-import pandas as pd
+import os
+import sys
+
 import matplotlib.pyplot as plt
 import numpy as np
 
-# Read CSV files
-seq_df = pd.read_csv('block_stats_seq.csv')
-deter_df = pd.read_csv('block_stats_deter.csv')
-optim_df = pd.read_csv('block_stats_optim.csv')
-optim_partial_df = pd.read_csv('block_stats_optim_partial.csv')
-
-# Find common blocks shared across seq/deter/optim for backwards compatibility
-common_blocks = set(seq_df['block_number']) & set(deter_df['block_number']) & set(optim_df['block_number'])
-print(f"Total common blocks (seq/deter/optim): {len(common_blocks)}")
+script_dir = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(script_dir))
+from analysis.phases import checkpoint
+from analysis.stats import cached_stats
 
+checkpoint('compute')
+# Histograms of deter/optim over the blocks common to seq/deter/optim (for
+# backwards compatibility) and of optim_partial, from the results store
+stats = cached_stats('e2e-histograms')
+print(f"Total common blocks (seq/deter/optim): {stats['common_blocks']}")
 
-def prepare_speedup_dataset(seq_df, target_df, suffix, display_name, block_subset=None):
-    """
-    Filter the sequential and target dataframes to the desired block set and
-    compute the speedup values for histogram/stat generation.
-    """
-    if block_subset is None:
-        block_subset = set(seq_df['block_number']) & set(target_df['block_number'])
-    else:
-        block_subset = set(block_subset)
 
-    print(f"\n{display_name} matching blocks: {len(block_subset)}")
-    if not block_subset:
-        raise ValueError(f"No overlapping blocks found for {display_name} dataset")
-
-    seq_filtered = seq_df[seq_df['block_number'].isin(block_subset)].sort_values('block_number')
-    target_filtered = target_df[target_df['block_number'].isin(block_subset)].sort_values('block_number')
-    merged = pd.merge(seq_filtered, target_filtered, on='block_number', suffixes=('_seq', f'_{suffix}'))
-
-    speedup_series = merged['elapsed_time_ms_seq'] / merged[f'elapsed_time_ms_{suffix}']
+def prepare_speedup_dataset(stats, name, display_name):
+    """Print the summary of one mode and return its bin percentages."""
+    summary = stats[name]
+    print(f"\n{display_name} matching blocks: {summary['n']}")
 
     print(f"{display_name} speedup stats:")
-    print(f"  Min: {speedup_series.min():.2f}x")
-    print(f"  Max: {speedup_series.max():.2f}x")
-    print(f"  Mean: {speedup_series.mean():.2f}x")
-    print(f"  Median: {speedup_series.median():.2f}x")
+    print(f"  Min: {summary['min']:.2f}x")
+    print(f"  Max: {summary['max']:.2f}x")
+    print(f"  Mean: {summary['mean']:.2f}x")
+    print(f"  Median: {summary['median']:.2f}x")
 
-    return speedup_series.values
+    return np.asarray(summary['percentages'])
 
-def create_speedup_histogram(speedups, title, filename):
+def create_speedup_histogram(percentages, labels, title, filename):
     """
     Create speedup distribution histogram matching the reference style
     """
-    # Define bins: [0,1), [1,2), [2,3), ..., [49,50), [50,inf)
-    bins = list(range(0, 51)) + [float('inf')]
-    labels = ['<1×'] + [f'{i}×' for i in range(1, 50)] + ['≥50×']
-
-    # Count blocks in each bin
-    counts, _ = np.histogram(speedups, bins=bins)
-    percentages = (counts / len(speedups)) * 100
+    # Bins: [0,1), [1,2), [2,3), ..., [49,50), [50,inf) (analysis.stats.HISTOGRAM_BINS)
 
     # Create figure with white background
     fig, ax = plt.subplots(figsize=(14, 6), facecolor='white')
@@ -94,25 +76,27 @@ def create_speedup_histogram(speedups, title, filename):
     plt.close()
 
 # Prepare datasets
-deter_speedups = prepare_speedup_dataset(seq_df, deter_df, 'deter', 'Deter', block_subset=common_blocks)
-optim_speedups = prepare_speedup_dataset(seq_df, optim_df, 'optim', 'Optim', block_subset=common_blocks)
-optim_partial_speedups = prepare_speedup_dataset(seq_df, optim_partial_df, 'optim_partial', 'Optim Partial')
+labels = stats['labels']
+deter_pct = prepare_speedup_dataset(stats, 'deter', 'Deter')
+optim_pct = prepare_speedup_dataset(stats, 'optim', 'Optim')
+optim_partial_pct = prepare_speedup_dataset(stats, 'optim_partial', 'Optim Partial')
 
+checkpoint('draw')
 # Generate charts
 create_speedup_histogram(
-    deter_speedups,
+    deter_pct, labels,
     'Deter Speedup Distribution',
     'deter_speedup_distribution.png'
 )
 
 create_speedup_histogram(
-    optim_speedups,
+    optim_pct, labels,
     'Optim Speedup Distribution',
     'optim_speedup_distribution.png'
 )
 
 create_speedup_histogram(
-    optim_partial_speedups,
+    optim_partial_pct, labels,
     'Optim Partial Speedup Distribution',
     'optim_partial_speedup_distribution.png'
 )
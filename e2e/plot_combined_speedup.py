@@ -1,7 +1,16 @@
-import pandas as pd
+import argparse
+import os
+import sys
+
 import matplotlib.pyplot as plt
 import numpy as np
-import os
+
+script_dir = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(script_dir))
+from analysis.phases import checkpoint
+from analysis.speedup import (BINS, LABELS, SpeedupEngine, block_stats_path,
+                              histogram, percentiles)
+from analysis.stats import SPEEDUP_MODES, cached_stats
 
 # Set publication-quality parameters for double-column paper
 plt.rcParams['font.family'] = 'serif'
@@ -18,35 +27,58 @@ plt.rcParams['axes.linewidth'] = 0.8
 plt.rcParams['xtick.major.width'] = 0.6
 plt.rcParams['ytick.major.width'] = 0.6
 
-# Read CSV files
-script_dir = os.path.dirname(os.path.abspath(__file__))
-seq_df = pd.read_csv(os.path.join(script_dir, 'block_stats_seq.csv'))
-deter_df = pd.read_csv(os.path.join(script_dir, 'block_stats_deter.csv'))
-optim_df = pd.read_csv(os.path.join(script_dir, 'block_stats_optim.csv'))
-optim_partial_df = pd.read_csv(os.path.join(script_dir, 'block_stats_optim_partial.csv'))
+parser = argparse.ArgumentParser()
+parser.add_argument('--streaming', action='store_true',
+                    help='chunked out-of-core join with sketched percentiles '
+                         '(for archive-scale block_stats files)')
+parser.add_argument('--bootstrap', type=int, default=0, metavar='N',
+                    help='draw 95%% bootstrap CIs from N resamples as error bars')
+args = parser.parse_args()
+checkpoint('compute')
+if args.streaming and args.bootstrap:
+    parser.error('--bootstrap needs the exact (in-memory) mode')
 
 # Define bins and labels
-bins = [0, 1, 2, 3, 4, 5, 10, 20, float('inf')]
-labels = ['<1×', '1-2×', '2-3×', '3-4×', '4-5×', '5-10×', '10-20×', '≥20×']
-
-def calculate_speedup_distribution(seq_df, target_df):
+bins = BINS
+labels = LABELS
+
+# Bootstrap CIs per mode, filled in when --bootstrap is given
+bootstrap = {}
+
+if args.bootstrap:
+    # Load the sequential baseline once and join every target against it
+    engine = SpeedupEngine(data_dir=script_dir)
+    for mode in ('deter', 'optim', 'optim_partial'):
+        engine.attach(mode)
+elif not args.streaming:
+    # Percentages and P50/P75/P90 of every mode, from the results store
+    combined = cached_stats('combined')
+    names = {mode: name for name, mode in SPEEDUP_MODES.items()}
+
+def calculate_speedup_distribution(mode):
     """Calculate speedup distribution percentages."""
-    common_blocks = set(seq_df['block_number']) & set(target_df['block_number'])
-    seq_filtered = seq_df[seq_df['block_number'].isin(common_blocks)].sort_values('block_number')
-    target_filtered = target_df[target_df['block_number'].isin(common_blocks)].sort_values('block_number')
-    merged = pd.merge(seq_filtered, target_filtered, on='block_number', suffixes=('_seq', '_target'))
-    speedups = merged['elapsed_time_ms_seq'] / merged['elapsed_time_ms_target']
-    counts, _ = np.histogram(speedups, bins=bins)
-    percentages = (counts / len(speedups)) * 100
-    p50 = np.percentile(speedups, 50)
-    p75 = np.percentile(speedups, 75)
-    p90 = np.percentile(speedups, 90)
-    return percentages, p50, p75, p90, len(speedups)
+    if not args.streaming and not args.bootstrap:
+        stats = combined[names[mode]]
+        return (np.asarray(stats['percentages']), stats['p50'], stats['p75'], stats['p90'],
+                stats['n'])
+    if args.streaming:
+        from analysis.streaming import stream_summary
+        _, percentages, stats = stream_summary(
+            block_stats_path('seq', script_dir), block_stats_path(mode, script_dir),
+            bins=bins, qs=[50, 75, 90])
+        return percentages, stats['p50'], stats['p75'], stats['p90'], stats['n']
+    speedups = engine.speedups(mode)
+    _, percentages = histogram(speedups, bins=bins)
+    pcts = percentiles(speedups, [50, 75, 90])
+    if args.bootstrap:
+        from analysis.bootstrap import bootstrap_ci
+        bootstrap[mode] = bootstrap_ci(speedups, args.bootstrap, qs=[50, 75, 90], bins=bins)
+    return percentages, pcts[50], pcts[75], pcts[90], len(speedups)
 
 # Calculate distributions for all three modes
-replay_pct, replay_p50, replay_p75, replay_p90, replay_n = calculate_speedup_distribution(seq_df, deter_df)
-online_pct, online_p50, online_p75, online_p90, online_n = calculate_speedup_distribution(seq_df, optim_df)
-filtered_pct, filtered_p50, filtered_p75, filtered_p90, filtered_n = calculate_speedup_distribution(seq_df, optim_partial_df)
+replay_pct, replay_p50, replay_p75, replay_p90, replay_n = calculate_speedup_distribution('deter')
+online_pct, online_p50, online_p75, online_p90, online_n = calculate_speedup_distribution('optim')
+filtered_pct, filtered_p50, filtered_p75, filtered_p90, filtered_n = calculate_speedup_distribution('optim_partial')
 
 # Print statistics
 print("=" * 60)
@@ -59,6 +91,25 @@ print(f"  P50: {online_p50:.2f}×, P75: {online_p75:.2f}×, P90: {online_p90:.2f
 print(f"\nOnline Filtered (n={filtered_n}):")
 print(f"  P50: {filtered_p50:.2f}×, P75: {filtered_p75:.2f}×, P90: {filtered_p90:.2f}×")
 
+if bootstrap:
+    print(f"\n95% bootstrap CIs ({args.bootstrap} resamples):")
+    for mode, name in [('deter', 'Replay'), ('optim', 'Online'), ('optim_partial', 'Online Filtered')]:
+        ci = bootstrap[mode]
+        print(f"  {name:<16}" + ", ".join(
+            f"{key.upper()}: [{ci[key]['low']:.2f}, {ci[key]['high']:.2f}]×"
+            for key in ('p50', 'p75', 'p90')))
+
+
+def bin_yerr(mode, pct):
+    """Asymmetric error bars for the bin percentages of one mode."""
+    if mode not in bootstrap:
+        return None
+    ci = bootstrap[mode]['bins']
+    return [pct - ci['low'], ci['high'] - pct]
+
+error_kw = dict(elinewidth=0.5, capsize=1.2, capthick=0.5, ecolor='#333333')
+
+checkpoint('draw')
 # Create figure sized for double-column paper
 fig, ax = plt.subplots(figsize=(3.5, 2.4))
 
@@ -73,13 +124,15 @@ color_filtered = '#74add1'  # Light blue
 
 # Plot grouped bars
 bars1 = ax.bar(x - width, replay_pct, width, label='Replay',
-               color=color_replay, edgecolor='#333333', linewidth=0.4)
+               color=color_replay, edgecolor='#333333', linewidth=0.4,
+               yerr=bin_yerr('deter', replay_pct), error_kw=error_kw)
 bars2 = ax.bar(x, online_pct, width, label='Online',
                color=color_online, edgecolor='#333333', linewidth=0.4,
-               hatch='///')
+               hatch='///', yerr=bin_yerr('optim', online_pct), error_kw=error_kw)
 bars3 = ax.bar(x + width, filtered_pct, width, label='Online (filtered)',
                color=color_filtered, edgecolor='#333333', linewidth=0.4,
-               hatch='...')
+               hatch='...', yerr=bin_yerr('optim_partial', filtered_pct),
+               error_kw=error_kw)
 
 # Labels
 ax.set_xlabel('Speedup Range', fontweight='bold')
@@ -90,7 +143,10 @@ ax.set_xticks(x)
 ax.set_xticklabels(labels, rotation=0)
 
 # Y-axis formatting
-ax.set_ylim(0, max(max(replay_pct), max(online_pct), max(filtered_pct)) * 1.15)
+y_top = max(max(replay_pct), max(online_pct), max(filtered_pct))
+if bootstrap:
+    y_top = max(y_top, *(max(ci['bins']['high']) for ci in bootstrap.values()))
+ax.set_ylim(0, y_top * 1.15)
 
 # Grid
 ax.grid(axis='y', alpha=0.3, linestyle='--', linewidth=0.4)
@@ -0,0 +1,81 @@
+import argparse
+import os
+import sys
+
+import matplotlib.pyplot as plt
+
+script_dir = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(script_dir))
+from analysis.phases import checkpoint
+from analysis.throughput import MODES, cached_throughput
+
+# Set publication-quality parameters for double-column paper
+plt.rcParams['font.family'] = 'serif'
+plt.rcParams['font.serif'] = ['Times New Roman', 'Times', 'DejaVu Serif']
+plt.rcParams['mathtext.fontset'] = 'stix'
+plt.rcParams['font.size'] = 8
+plt.rcParams['axes.labelsize'] = 9
+plt.rcParams['axes.titlesize'] = 10
+plt.rcParams['xtick.labelsize'] = 8
+plt.rcParams['ytick.labelsize'] = 8
+plt.rcParams['legend.fontsize'] = 7
+plt.rcParams['figure.titlesize'] = 10
+plt.rcParams['axes.linewidth'] = 0.8
+plt.rcParams['xtick.major.width'] = 0.6
+plt.rcParams['ytick.major.width'] = 0.6
+
+parser = argparse.ArgumentParser()
+parser.add_argument('--info', help='block_info CSV with a gas_used column')
+args = parser.parse_args()
+checkpoint('compute')
+
+stats = cached_throughput(MODES, args.info)
+
+# Same colors as the combined distribution figure
+styles = {'deter': ('Replay', '#1a5490', '-'),
+          'optim': ('Online', '#e67e22', '--'),
+          'optim_partial': ('Online (filtered)', '#74add1', '-.')}
+
+checkpoint('draw')
+fig, ax = plt.subplots(figsize=(3.5, 2.4))
+
+# The seq baseline is the same for every mode
+seq = stats[MODES[0]]['seq']
+ax.plot(seq['curve_block_pct'], seq['curve_time_pct'], color='#333333', linewidth=1.0,
+        linestyle=':', label='Sequential')
+for mode in MODES:
+    label, color, linestyle = styles[mode]
+    r = stats[mode]
+    ax.plot(r['target']['curve_block_pct'], r['target']['curve_time_pct'], color=color,
+            linewidth=1.2, linestyle=linestyle,
+            label=f"{label} ({r['time_speedup']:.2f}× total)")
+
+ax.set_xscale('log')
+ax.set_xlim(0.01, 100)
+ax.set_ylim(0, 102)
+ax.set_xlabel('Slowest Blocks (%)', fontweight='bold')
+ax.set_ylabel('Share of Total Time (%)', fontweight='bold')
+ax.grid(alpha=0.3, linestyle='--', linewidth=0.4)
+ax.set_axisbelow(True)
+ax.legend(loc='lower right', framealpha=0.95, edgecolor='#666666',
+          handlelength=1.8, handletextpad=0.4, borderpad=0.3,
+          labelspacing=0.3, frameon=True, fancybox=False)
+ax.spines['top'].set_visible(False)
+ax.spines['right'].set_visible(False)
+
+plt.tight_layout(pad=0.3)
+
+plt.savefig(os.path.join(script_dir, 'cumulative_time.pdf'), dpi=600,
+            bbox_inches='tight', pad_inches=0.02)
+plt.savefig(os.path.join(script_dir, 'cumulative_time.png'), dpi=600,
+            bbox_inches='tight', pad_inches=0.02)
+
+print(f"{'Mode':<18} {'Total':>8} {'Geomean':>8} {'Median':>8} {'Top 1% time':>12}")
+for mode in MODES:
+    r = stats[mode]
+    print(f"{styles[mode][0]:<18} {r['time_speedup']:>7.2f}× {r['geomean_speedup']:>7.2f}× "
+          f"{r['median_speedup']:>7.2f}× {r['target']['time_pct_of_top_blocks']['1']:>11.1f}%")
+
+print("\nFigure saved successfully!")
+
+plt.close()
@@ -0,0 +1,98 @@
+import argparse
+import os
+import sys
+
+import matplotlib.pyplot as plt
+import numpy as np
+
+script_dir = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(script_dir))
+from analysis.phases import checkpoint
+from analysis.rolling import DEFAULT_WINDOW, MODE_LABELS, MODES, cached_rolling
+
+# Set publication-quality parameters for double-column paper
+plt.rcParams['font.family'] = 'serif'
+plt.rcParams['font.serif'] = ['Times New Roman', 'Times', 'DejaVu Serif']
+plt.rcParams['mathtext.fontset'] = 'stix'
+plt.rcParams['font.size'] = 8
+plt.rcParams['axes.labelsize'] = 9
+plt.rcParams['axes.titlesize'] = 9
+plt.rcParams['xtick.labelsize'] = 8
+plt.rcParams['ytick.labelsize'] = 8
+plt.rcParams['legend.fontsize'] = 7
+plt.rcParams['figure.titlesize'] = 10
+plt.rcParams['axes.linewidth'] = 0.8
+plt.rcParams['xtick.major.width'] = 0.6
+plt.rcParams['ytick.major.width'] = 0.6
+
+parser = argparse.ArgumentParser()
+parser.add_argument('-w', '--window', type=int, default=DEFAULT_WINDOW,
+                    help=f'blocks per rolling window (default: {DEFAULT_WINDOW})')
+parser.add_argument('--penalty', type=float,
+                    help='change-point penalty on log speedup (default: BIC-style)')
+args = parser.parse_args()
+checkpoint('compute')
+
+stats = cached_rolling(MODES, args.window, penalty=args.penalty)
+
+# Same colors as the combined distribution figure
+colors = {'deter': '#1a5490', 'optim': '#e67e22', 'optim_partial': '#74add1'}
+
+checkpoint('draw')
+fig, axes = plt.subplots(1, len(MODES), figsize=(7.0, 2.0), sharey=True)
+first_block = min(stats[mode]['first_block'] for mode in MODES)
+y_top = max(max(stats[mode]['percentiles']['p90']) for mode in MODES)
+
+for ax, mode in zip(axes, MODES):
+    series = stats[mode]
+    color = colors[mode]
+    x = np.asarray(series['blocks']) - first_block
+    p = {key: np.asarray(values) for key, values in series['percentiles'].items()}
+
+    ax.fill_between(x, p['p10'], p['p90'], color=color, alpha=0.15, linewidth=0,
+                    label='P10-P90')
+    ax.fill_between(x, p['p25'], p['p75'], color=color, alpha=0.35, linewidth=0,
+                    label='P25-P75')
+    ax.plot(x, p['p50'], '-', color=color, linewidth=1.2, label='Median')
+
+    # Change points, and the final (stable) segment's median
+    for block in series['change_points']:
+        ax.axvline(block - first_block, color='#555555', linestyle='--', linewidth=0.5)
+    stable = series['stable_from'] - first_block
+    ax.hlines(series['stable_median'], stable, x[-1], color='#333333', linewidth=0.8,
+              linestyle=':')
+    ax.annotate(f"stable {series['stable_median']:.2f}×", xy=(x[-1], series['stable_median']),
+                xytext=(-2, 3), textcoords='offset points', ha='right', fontsize=6.5,
+                color='#333333')
+
+    ax.set_title(MODE_LABELS[mode], fontweight='bold')
+    ax.set_xlabel('Block Offset', fontweight='bold')
+    ax.grid(axis='y', alpha=0.3, linestyle='--', linewidth=0.4)
+    ax.set_axisbelow(True)
+    ax.spines['top'].set_visible(False)
+    ax.spines['right'].set_visible(False)
+
+axes[0].set_ylabel('Speedup (×)', fontweight='bold')
+axes[0].set_ylim(0, y_top * 1.1)
+axes[0].legend(loc='upper left', framealpha=0.95, edgecolor='#666666',
+               handlelength=1.2, handletextpad=0.4, borderpad=0.3,
+               labelspacing=0.3, frameon=True, fancybox=False)
+
+plt.tight_layout(pad=0.3)
+
+plt.savefig(os.path.join(script_dir, 'rolling_speedup.pdf'), dpi=600,
+            bbox_inches='tight', pad_inches=0.02)
+plt.savefig(os.path.join(script_dir, 'rolling_speedup.png'), dpi=600,
+            bbox_inches='tight', pad_inches=0.02)
+
+print(f"Rolling speedup ({args.window}-block window):")
+for mode in MODES:
+    series = stats[mode]
+    p50 = series['percentiles']['p50']
+    print(f"  {MODE_LABELS[mode]:<18} median {p50[0]:.2f}× -> {p50[-1]:.2f}×, "
+          f"{len(series['change_points'])} change points, "
+          f"stable from block {series['stable_from']} at {series['stable_median']:.2f}×")
+
+print("\nFigure saved successfully!")
+
+plt.close()
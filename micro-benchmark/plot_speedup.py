@@ -1,6 +1,15 @@
+import argparse
+import os
+import sys
+
 import matplotlib.pyplot as plt
 import numpy as np
 
+script_dir = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(script_dir))
+from analysis.phases import checkpoint
+from analysis.stats import cached_stats
+
 # Set publication-quality parameters for double-column paper
 # Target width: ~3.5 inches (single column) or ~7 inches (full width)
 plt.rcParams['font.family'] = 'serif'
@@ -17,23 +26,26 @@ plt.rcParams['axes.linewidth'] = 0.8
 plt.rcParams['xtick.major.width'] = 0.6
 plt.rcParams['ytick.major.width'] = 0.6
 
+parser = argparse.ArgumentParser()
+parser.add_argument('--results', nargs='+', default=[], metavar='PATH',
+                    help='raw benchmark results (criterion dirs / go test -bench output) '
+                         'that override micro_benchmark.xlsx')
+args = parser.parse_args()
+checkpoint('compute')
+
 # Data (in microseconds)
 benchmarks = ['ERC20-\nTransfer', 'Uniswap-Swap\n1-hop', 'Uniswap-Swap\n4-hop']
 x = np.arange(len(benchmarks))
 width = 0.20  # Width of bars
 
-# Execution times for each system (absolute values)
-revm_native_abs = [4.9406, 62.021, 172.49]
-forerunner_revm_abs = [4.5099, 39.199, 130.36]
-revmc_normalized_abs = [5.55, 42.35, 126.84]  # Proportionally scaled
-helios_abs = [4.3465, 30.963, 97.345]
-
-# Calculate speedup over Revm Native baseline
-revm_native_speedup = [1.0, 1.0, 1.0]  # Baseline
-forerunner_revm_speedup = [revm_native_abs[i] / forerunner_revm_abs[i] for i in range(3)]
-revmc_speedup = [revm_native_abs[i] / revmc_normalized_abs[i] for i in range(3)]
-helios_speedup = [revm_native_abs[i] / helios_abs[i] for i in range(3)]
+# Speedup over Revm Native baseline (execution times from micro_benchmark.xlsx)
+speedup = cached_stats('microbench', results=args.results)['speedup']
+revm_native_speedup = speedup['Revm Native']  # Baseline
+forerunner_revm_speedup = speedup['Forerunner-Revm']
+revmc_speedup = speedup['Revmc']
+helios_speedup = speedup['Helios']
 
+checkpoint('draw')
 # Create figure and axis - sized for double-column paper
 # 3.5 inches width for single column, height adjusted for aspect ratio
 fig, ax = plt.subplots(figsize=(3.5, 2.4))
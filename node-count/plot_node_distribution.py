@@ -1,12 +1,22 @@
 #!/usr/bin/env python3
 """
 Plot SsaGraph Node Count Distribution for Evaluation Section.
-Data source: SSA_GRAPH_NODES_ANALYSIS_SUMMARY_CN.md (134,601 graphs)
+Data source: SSA_GRAPH_NODES_ANALYSIS_SUMMARY_CN.md (134,601 graphs),
+or a binary SSA cache dump with --dump.
 """
 
+import argparse
+import os
+import sys
+
 import matplotlib.pyplot as plt
 import numpy as np
 
+script_dir = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(script_dir))
+from analysis.phases import checkpoint
+from analysis.stats import cached_stats
+
 # Set publication-quality parameters (same style as plot_speedup.py)
 plt.rcParams['font.family'] = 'serif'
 plt.rcParams['font.serif'] = ['Times New Roman', 'Times', 'DejaVu Serif']
@@ -22,15 +32,22 @@ plt.rcParams['axes.linewidth'] = 0.8
 plt.rcParams['xtick.major.width'] = 0.6
 plt.rcParams['ytick.major.width'] = 0.6
 
-# Data from SSA_GRAPH_NODES_ANALYSIS_SUMMARY_CN.md
-ranges = [
-    '0-10', '11-20', '21-50', '51-100', '101-200',
-    '201-500', '501-1K', '1K-2K', '2K-5K', '5K-10K', '10K+'
-]
-percentages = [0.89, 1.07, 9.23, 10.55, 9.18, 30.81, 7.98, 26.31, 2.70, 0.75, 0.53]
+parser = argparse.ArgumentParser()
+parser.add_argument('--dump', metavar='PATH',
+                    help='SsaGraph cache dump to scan instead of the quoted summary')
+parser.add_argument('-j', '--workers', type=int, default=None,
+                    help='parallel scan processes for --dump')
+args = parser.parse_args()
+checkpoint('compute')
+
+# Data from SSA_GRAPH_NODES_ANALYSIS_SUMMARY_CN.md (or the dump)
+stats = cached_stats('node-count', dump=args.dump, workers=args.workers)
+ranges = stats['ranges']
+percentages = stats['percentages']
 
 x = np.arange(len(ranges))
 
+checkpoint('draw')
 # Create figure
 fig, ax = plt.subplots(figsize=(3.5, 2.4))
 
@@ -56,7 +73,7 @@ ax.grid(axis='y', alpha=0.3, linestyle='--', linewidth=0.4)
 ax.set_axisbelow(True)
 
 # Y-axis limit
-ax.set_ylim([0, 36])
+ax.set_ylim([0, max(36, max(percentages) + 5)])
 
 plt.tight_layout(pad=0.3)
 
@@ -0,0 +1,107 @@
+import argparse
+import os
+import sys
+
+import matplotlib.pyplot as plt
+import numpy as np
+
+script_dir = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(script_dir))
+from analysis.online_sweep import cached_sweep, format_report
+from analysis.phases import checkpoint
+from analysis.speedup import DATA_DIR
+
+# Set publication-quality parameters for double-column paper
+plt.rcParams['font.family'] = 'serif'
+plt.rcParams['font.serif'] = ['Times New Roman', 'Times', 'DejaVu Serif']
+plt.rcParams['mathtext.fontset'] = 'stix'
+plt.rcParams['font.size'] = 8
+plt.rcParams['axes.labelsize'] = 9
+plt.rcParams['axes.titlesize'] = 9
+plt.rcParams['xtick.labelsize'] = 8
+plt.rcParams['ytick.labelsize'] = 8
+plt.rcParams['legend.fontsize'] = 7
+plt.rcParams['figure.titlesize'] = 10
+plt.rcParams['axes.linewidth'] = 0.8
+plt.rcParams['xtick.major.width'] = 0.6
+plt.rcParams['ytick.major.width'] = 0.6
+
+parser = argparse.ArgumentParser()
+parser.add_argument('--data-dir', default=DATA_DIR,
+                    help='directory with block_stats_seq.csv and block_stats_optim_f{N}.csv')
+args = parser.parse_args()
+checkpoint('compute')
+
+stats = cached_sweep(args.data_dir)
+thresholds = stats['thresholds']
+percentages = np.asarray(stats['percentages'])
+row_labels = [f'≥{t}' for t in thresholds]
+
+checkpoint('draw')
+fig, (ax_heat, ax_curve) = plt.subplots(1, 2, figsize=(7.0, 2.4),
+                                        gridspec_kw={'width_ratios': [1.25, 1]})
+
+# Threshold x speedup-bin heatmap (% of blocks per bin)
+im = ax_heat.imshow(percentages, aspect='auto', cmap='Blues', vmin=0,
+                    vmax=max(percentages.max(), 1))
+for i in range(percentages.shape[0]):
+    for j in range(percentages.shape[1]):
+        value = percentages[i, j]
+        ax_heat.text(j, i, f'{value:.1f}', ha='center', va='center', fontsize=6,
+                     color='white' if value > percentages.max() * 0.6 else '#222222')
+ax_heat.set_xticks(np.arange(len(stats['labels'])))
+ax_heat.set_xticklabels(stats['labels'], rotation=30, ha='right')
+ax_heat.set_yticks(np.arange(len(thresholds)))
+ax_heat.set_yticklabels(row_labels)
+ax_heat.set_xlabel('Speedup Range', fontweight='bold')
+ax_heat.set_ylabel('Frequency Threshold', fontweight='bold')
+ax_heat.set_title('Blocks per Speedup Range (%)', fontweight='bold')
+cbar = fig.colorbar(im, ax=ax_heat, pad=0.02)
+cbar.ax.tick_params(labelsize=7)
+
+# Percentiles versus threshold, with artifact storage where the coverage table has it
+styles = {'p25': ('P25', ':'), 'p50': ('Median', '-'), 'p75': ('P75', '--'),
+          'p90': ('P90', '-.')}
+for key, (label, linestyle) in styles.items():
+    ax_curve.plot(thresholds, stats['percentiles'][key], linestyle, marker='o', markersize=3,
+                  color='#e67e22', linewidth=1.2 if key == 'p50' else 0.9, label=label)
+ax_curve.set_xscale('log')
+ax_curve.set_xticks(thresholds)
+ax_curve.set_xticklabels(row_labels, rotation=30, ha='right')
+ax_curve.minorticks_off()
+ax_curve.set_xlabel('Frequency Threshold', fontweight='bold')
+ax_curve.set_ylabel('Speedup (×)', fontweight='bold')
+ax_curve.set_ylim(bottom=0)
+ax_curve.grid(axis='y', alpha=0.3, linestyle='--', linewidth=0.4)
+ax_curve.set_axisbelow(True)
+ax_curve.spines['top'].set_visible(False)
+
+storage = [(t, cov['storage_mb']) for t, cov in zip(thresholds, stats['coverage']) if cov]
+handles, labels = ax_curve.get_legend_handles_labels()
+if storage:
+    ax_storage = ax_curve.twinx()
+    xs, mbs = zip(*storage)
+    line, = ax_storage.plot(xs, mbs, 's-', color='#555555', markersize=3, linewidth=0.8,
+                            label='Storage')
+    ax_storage.set_ylabel('Storage (MB)', fontweight='bold')
+    ax_storage.set_ylim(bottom=0)
+    ax_storage.spines['top'].set_visible(False)
+    handles.append(line)
+    labels.append('Storage')
+ax_curve.legend(handles, labels, loc='lower center', bbox_to_anchor=(0.5, 1.0),
+                framealpha=0.95, edgecolor='#666666', handlelength=1.6, handletextpad=0.4,
+                borderpad=0.3, columnspacing=0.8, frameon=True, fancybox=False,
+                ncol=len(handles))
+
+plt.tight_layout(pad=0.3, w_pad=1.5)
+
+plt.savefig(os.path.join(script_dir, 'threshold_sweep.pdf'), dpi=600,
+            bbox_inches='tight', pad_inches=0.02)
+plt.savefig(os.path.join(script_dir, 'threshold_sweep.png'), dpi=600,
+            bbox_inches='tight', pad_inches=0.02)
+
+print(format_report(stats))
+
+print("\nFigure saved successfully!")
+
+plt.close()
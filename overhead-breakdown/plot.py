@@ -1,6 +1,15 @@
+import argparse
+import os
+import sys
+
 import matplotlib.pyplot as plt
 import numpy as np
 
+script_dir = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(script_dir))
+from analysis.phases import checkpoint
+from analysis.stats import cached_stats
+
 # Set publication-quality parameters for double-column paper
 # Target width: ~3.5 inches (single column)
 plt.rcParams['font.family'] = 'serif'
@@ -17,23 +26,41 @@ plt.rcParams['axes.linewidth'] = 0.8
 plt.rcParams['xtick.major.width'] = 0.6
 plt.rcParams['ytick.major.width'] = 0.6
 
+parser = argparse.ArgumentParser()
+parser.add_argument('--samples', nargs='+', action='append', metavar=('LABEL', 'PATH'),
+                    help='system label and profile files (perf script or counter CSV) '
+                         'to derive the breakdown from; repeat per system')
+parser.add_argument('--map', help='JSON opcode -> category map (see analysis.overhead)')
+parser.add_argument('--iterations', type=float, help='workload iterations per profiled run')
+parser.add_argument('--ghz', type=float, default=1.0, help='clock rate for cycle counts')
+args = parser.parse_args()
+checkpoint('compute')
+
 # Data from Fine-grained Breakdown (unit: nanoseconds)
-labels = ['Native EVM', 'Helios (SSA)']
+if args.samples:
+    from analysis.overhead import load_category_map
+
+    stats = cached_stats('overhead-breakdown',
+                         profiles={group[0]: group[1:] for group in args.samples},
+                         category_map=load_category_map(args.map) if args.map else None,
+                         iterations=args.iterations, ghz=args.ghz)
+else:
+    stats = cached_stats('overhead-breakdown')
+labels = stats['labels']
 
 # 1. Heavy Ops (Keccak256) - nearly unchanged, Amdahl's law bottleneck
-heavy_ops = [314.79, 312.33]
+heavy_ops = stats['ns']['heavy_ops']
 
 # 2. Light Ops (Caller, MStore, Return, Gas-Op)
-light_ops = [46.49, 45.96]
+light_ops = stats['ns']['light_ops']
 
 # 3. System Overhead (core optimization target for Helios)
-# Native Overhead = Stack (12*5.27) + Gas Check (13*5.47) = 134.35 ns
-# Helios Overhead = Node (7*5.14) + Input (7*4.83) + Reg (4*3.97) + Chunk (2*3.99) = 93.65 ns
-overhead = [134.35, 93.65]
+overhead = stats['ns']['overhead']
 
 x = np.arange(len(labels)) * 0.7  # Reduce spacing between bars
 width = 0.5
 
+checkpoint('draw')
 # Create figure sized for double-column paper
 fig, ax = plt.subplots(figsize=(3.5, 2.4))
 
@@ -53,6 +80,11 @@ p3 = ax.bar(x, overhead, width, bottom=np.array(heavy_ops)+np.array(light_ops),
             label='System Overhead', color=color_overhead, edgecolor='black',
             linewidth=0.5)
 
+# Run-to-run spread of the total, when derived from several profiled runs
+if any(stats.get('total_std_ns', [])):
+    ax.errorbar(x, stats['total_ns'], yerr=stats['total_std_ns'], fmt='none',
+                ecolor='black', elinewidth=0.6, capsize=2)
+
 # Labels (no title - use figure caption in paper)
 ax.set_ylabel('Latency per Iteration (ns)', fontweight='bold')
 ax.set_xticks(x)
@@ -69,18 +101,26 @@ ax.legend(loc='upper center', bbox_to_anchor=(0.5, 1.02), ncol=3,
 bbox_props = dict(boxstyle='round,pad=0.2', facecolor='white',
                   edgecolor='none', alpha=0.85)
 
+# Largest overhead components when profiled, else the measured ones
+if 'components' in stats:
+    parts = [sorted(((ns, name.split('.', 1)[1]) for name, ns in c.items()
+                     if name.startswith('overhead.')), reverse=True)[:3]
+             for c in stats['components']]
+    overhead_parts = ['/'.join(n.replace('_', ' ').title() for _, n in p) or '-' for p in parts]
+else:
+    overhead_parts = ['Stack/Gas', 'Graph/Reg/Gas']
+
 # Native Overhead
-ax.annotate('134 ns\n(Stack/Gas)', xy=(x[0], 314.79 + 46.49 + 134.35/2),
+ax.annotate(f'{overhead[0]:.0f} ns\n({overhead_parts[0]})', xy=(x[0], heavy_ops[0] + light_ops[0] + overhead[0]/2),
             ha='center', va='center', color='black', fontsize=7.5,
             fontweight='bold', bbox=bbox_props)
 # Helios Overhead
-ax.annotate('94 ns\n(Graph/Reg/Gas)', xy=(x[1], 312.33 + 45.96 + 93.65/2),
+ax.annotate(f'{overhead[1]:.0f} ns\n({overhead_parts[1]})', xy=(x[1], heavy_ops[1] + light_ops[1] + overhead[1]/2),
             ha='center', va='center', color='black', fontsize=7.5,
             fontweight='bold', bbox=bbox_props)
 
 # Total time annotations
-total_native = sum([heavy_ops[0], light_ops[0], overhead[0]])
-total_helios = sum([heavy_ops[1], light_ops[1], overhead[1]])
+total_native, total_helios = stats['total_ns']
 
 ax.annotate(f'{total_native:.0f} ns', xy=(x[0], total_native), xytext=(0, 4),
             textcoords="offset points", ha='center', fontsize=8, fontweight='bold')
@@ -92,15 +132,13 @@ ax.grid(axis='y', alpha=0.3, linestyle='--', linewidth=0.4)
 ax.set_axisbelow(True)
 
 # Set axis limits - extend Y to avoid legend overlap
-ax.set_ylim([0, 620])
+ax.set_ylim([0, max(620, max(total_native, total_helios) * 1.25)])
 ax.set_xlim([-0.4, 1.1])
 
 # Tight layout with minimal padding
 plt.tight_layout(pad=0.3)
 
 # Save figure with high quality settings
-import os
-script_dir = os.path.dirname(os.path.abspath(__file__))
 plt.savefig(os.path.join(script_dir, 'overhead-breakdown.pdf'), dpi=600,
             bbox_inches='tight', pad_inches=0.02)
 plt.savefig(os.path.join(script_dir, 'overhead-breakdown.png'), dpi=600,
@@ -1,31 +1,33 @@
-import pandas as pd
+import argparse
+import os
+import sys
+
 import matplotlib.pyplot as plt
 import numpy as np
 
-# 数据定义
-workloads = ['ERC20-Transfer', 'Uniswap-V2-Swap-1hop', 'Uniswap-V2-Swap-4hop']
-data = {
-    'ERC20-Transfer': {'native': 4.9406, 'parallel': 41.51, 'cplr': 0.122222},
-    'Uniswap-V2-Swap-1hop': {'native': 62.021, 'parallel': 417.69, 'cplr': 0.090978},
-    'Uniswap-V2-Swap-4hop': {'native': 172.49, 'parallel': 1031.9, 'cplr': 0.037736}
-}
+script_dir = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(script_dir))
+from analysis.phases import checkpoint
+from analysis.stats import cached_stats
 
-slowdown_factors = []
-theoretical_speedups = []
-labels = ['ERC20\nTransfer', 'Uniswap V2\n1-hop Swap', 'Uniswap V2\n4-hop Swap']
+parser = argparse.ArgumentParser()
+parser.add_argument('--results', nargs='+', default=[], metavar='PATH',
+                    help='raw benchmark results (criterion dirs / go test -bench output)')
+parser.add_argument('--dump', metavar='PATH',
+                    help='SsaGraph dump to add the mainnet CPLR distribution to the note')
+parser.add_argument('-j', '--workers', type=int, default=None,
+                    help='parallel scan processes for --dump')
+args = parser.parse_args()
+checkpoint('compute')
 
-for workload in workloads:
-    native = data[workload]['native']
-    parallel = data[workload]['parallel']
-    cplr = data[workload]['cplr']
-    
-    slowdown = parallel / native
-    slowdown_factors.append(slowdown)
-    
-    # 理论speedup = 1/CPLR
-    theoretical = 1 / cplr if cplr > 0 else 1
-    theoretical_speedups.append(theoretical)
+# 数据来自 micro-benchmark/micro_benchmark.xlsx（见 analysis/microbench.py）；理论speedup = 1/CPLR
+stats = cached_stats('parallel-instruction', results=args.results, dump=args.dump,
+                     workers=args.workers)
+slowdown_factors = stats['slowdown']
+theoretical_speedups = stats['theoretical_speedup']
+labels = ['ERC20\nTransfer', 'Uniswap V2\n1-hop Swap', 'Uniswap V2\n4-hop Swap']
 
+checkpoint('draw')
 fig, ax = plt.subplots(figsize=(6, 4))
 
 x = np.arange(len(labels))
@@ -57,6 +59,13 @@ note_text = (
     f"{theoretical_speedups[0]:.1f}×, {theoretical_speedups[1]:.1f}×, and {theoretical_speedups[2]:.1f}× "
     f"for these workloads. Actual performance shows 6–8× slowdown instead."
 )
+if stats.get('mainnet', {}).get('graphs'):
+    mainnet = stats['mainnet']
+    note_text += (
+        f"\nAcross {mainnet['graphs']:,} cached mainnet paths the median CPLR is "
+        f"{mainnet['cplr_percentiles']['p50']:.3f} "
+        f"({mainnet['parallelism_percentiles']['p50']:.1f}× available parallelism)."
+    )
 
 ax.text(0.5, -0.15, note_text,
         transform=ax.transAxes,
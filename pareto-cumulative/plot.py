@@ -1,7 +1,14 @@
-import pandas as pd
+import argparse
+import os
+import sys
+
 import matplotlib.pyplot as plt
 import numpy as np
-import os
+
+script_dir = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(script_dir))
+from analysis.phases import checkpoint
+from analysis.stats import cached_stats
 
 # Set publication-quality parameters for double-column paper
 plt.rcParams['font.family'] = 'serif'
@@ -18,41 +25,47 @@ plt.rcParams['axes.linewidth'] = 0.8
 plt.rcParams['xtick.major.width'] = 0.6
 plt.rcParams['ytick.major.width'] = 0.6
 
-# Read Pareto data
-script_dir = os.path.dirname(os.path.abspath(__file__))
-df = pd.read_excel(os.path.join(script_dir, 'replay.xlsx'), sheet_name='帕累托效应')
-
-# Use 5000 blocks data (most stable)
-data_row = df[df['区块数量'] == 5000].iloc[0]
+parser = argparse.ArgumentParser()
+parser.add_argument('--records', metavar='PATH',
+                    help='raw execution records; compute the exact curve instead of replay.xlsx')
+parser.add_argument('--blocks', type=int, default=5000,
+                    help='block window of the curve (default: 5000)')
+args = parser.parse_args()
+checkpoint('compute')
 
-# Build cumulative distribution data
-path_percentages = [0, 1, 5, 10, 20, 50, 100]
-execution_coverage = [0,
-                      70,  # Top 1%
-                      85,  # Top 5%
-                      data_row['Top10%占比'] * 100,
-                      data_row['Top20%占比'] * 100,
-                      data_row['Top50%占比'] * 100,
-                      100]
+# Cumulative distribution over the 5000-block window (most stable)
+stats = cached_stats('pareto-cumulative', records=args.records, n_blocks=args.blocks)
+path_percentages = stats['path_percentages']
+execution_coverage = stats['execution_coverage']
 
+checkpoint('draw')
 # Create figure sized for double-column paper (compact height)
 fig, ax = plt.subplots(figsize=(3.3, 2.0))
 
 # Define color (grayscale-friendly)
 color_main = '#c0392b'  # Dark red
 
-# Plot cumulative distribution curve
-ax.plot(path_percentages, execution_coverage, 'o-',
-        linewidth=1.5, markersize=5, color=color_main,
-        markerfacecolor=color_main, markeredgecolor='white',
-        markeredgewidth=0.5)
+# Plot cumulative distribution curve (every percentile when computed from records)
+if 'curve_coverage' in stats:
+    ax.plot(stats['curve_percentages'], stats['curve_coverage'], '-',
+            linewidth=1.5, color=color_main)
+    ax.plot(path_percentages, execution_coverage, 'o',
+            markersize=5, color=color_main, markeredgecolor='white',
+            markeredgewidth=0.5)
+    fill_x, fill_y = stats['curve_percentages'], stats['curve_coverage']
+else:
+    ax.plot(path_percentages, execution_coverage, 'o-',
+            linewidth=1.5, markersize=5, color=color_main,
+            markerfacecolor=color_main, markeredgecolor='white',
+            markeredgewidth=0.5)
+    fill_x, fill_y = path_percentages, execution_coverage
 
 # Plot diagonal (uniform distribution reference)
 ax.plot([0, 100], [0, 100], '--', linewidth=1.0,
         color='#666666', alpha=0.7, label='Uniform Distribution')
 
 # Fill Pareto effect area
-ax.fill_between(path_percentages, execution_coverage, path_percentages,
+ax.fill_between(fill_x, fill_y, fill_x,
                 alpha=0.15, color=color_main)
 
 # Annotation style
@@ -61,21 +74,21 @@ bbox_props = dict(boxstyle='round,pad=0.2', facecolor='white',
 arrow_props = dict(arrowstyle='->', color=color_main, lw=1.0)
 
 # Annotate key data points - Top 1%
-ax.annotate('70%',
-            xy=(1, 70),
+ax.annotate(f'{execution_coverage[1]:.0f}%',
+            xy=(1, execution_coverage[1]),
             xytext=(8, 55),
             fontsize=7, fontweight='bold',
             bbox=bbox_props, arrowprops=arrow_props)
 
 # Top 5%
-ax.annotate('85%',
-            xy=(5, 85),
+ax.annotate(f'{execution_coverage[2]:.0f}%',
+            xy=(5, execution_coverage[2]),
             xytext=(14, 76),
             fontsize=7, fontweight='bold',
             bbox=bbox_props, arrowprops=arrow_props)
 
 # Top 10%
-ax.annotate('93%',
+ax.annotate(f'{execution_coverage[3]:.0f}%',
             xy=(10, execution_coverage[3]),
             xytext=(22, 86),
             fontsize=7, fontweight='bold',
@@ -117,3 +130,5 @@ print(f"\nKey statistics:")
 print(f"  Top 1%:  {execution_coverage[1]:.0f}% coverage")
 print(f"  Top 5%:  {execution_coverage[2]:.0f}% coverage")
 print(f"  Top 10%: {execution_coverage[3]:.0f}% coverage")
+if 'gini' in stats:
+    print(f"  Gini:    {stats['gini']:.3f}")
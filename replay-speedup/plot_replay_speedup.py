@@ -1,54 +1,53 @@
-import pandas as pd
+import argparse
+import os
+import sys
+
 import matplotlib.pyplot as plt
 import numpy as np
 
+script_dir = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(script_dir))
+from analysis.phases import checkpoint
+from analysis.speedup import BINS, LABELS, block_stats_path, print_summary
+from analysis.stats import cached_stats
+
 # Set academic publication style
 plt.rcParams['font.family'] = 'serif'
 plt.rcParams['font.size'] = 10
 plt.rcParams['axes.linewidth'] = 1.0
 
-# Read CSV files
-seq_df = pd.read_csv('block_stats_seq.csv')
-deter_df = pd.read_csv('block_stats_deter.csv')
-
-# Find common blocks
-common_blocks = set(seq_df['block_number']) & set(deter_df['block_number'])
-print(f"Total common blocks: {len(common_blocks)}")
-
-# Filter and merge data
-seq_filtered = seq_df[seq_df['block_number'].isin(common_blocks)].sort_values('block_number')
-deter_filtered = deter_df[deter_df['block_number'].isin(common_blocks)].sort_values('block_number')
-merged = pd.merge(seq_filtered, deter_filtered, on='block_number', suffixes=('_seq', '_deter'))
-
-# Calculate speedups
-speedups = merged['elapsed_time_ms_seq'] / merged['elapsed_time_ms_deter']
-
-# Print statistics
-print(f"\nReplay Mode (Deter) Speedup Statistics:")
-print(f"  Blocks analyzed: {len(speedups)}")
-print(f"  Min:    {speedups.min():.2f}×")
-print(f"  P25:    {np.percentile(speedups, 25):.2f}×")
-print(f"  Median: {speedups.median():.2f}×")
-print(f"  P75:    {np.percentile(speedups, 75):.2f}×")
-print(f"  P90:    {np.percentile(speedups, 90):.2f}×")
-print(f"  P95:    {np.percentile(speedups, 95):.2f}×")
-print(f"  P99:    {np.percentile(speedups, 99):.2f}×")
-print(f"  Max:    {speedups.max():.2f}×")
-print(f"  Mean:   {speedups.mean():.2f}×")
+parser = argparse.ArgumentParser()
+parser.add_argument('--streaming', action='store_true',
+                    help='chunked out-of-core join with sketched percentiles')
+args = parser.parse_args()
+checkpoint('compute')
 
 # Define non-uniform bins
-bins = [0, 1, 2, 3, 4, 5, 10, 20, float('inf')]
-labels = ['<1×', '1-2×', '2-3×', '3-4×', '4-5×', '5-10×', '10-20×', '≥20×']
+bins = BINS
+labels = LABELS
+
+if args.streaming:
+    from analysis.streaming import stream_summary
+    counts, percentages, stats = stream_summary(
+        block_stats_path('seq'), block_stats_path('deter'), bins=bins)
+    print(f"Total common blocks: {stats['n']}")
+else:
+    # Join of the target run against the sequential baseline, from the results store
+    result = cached_stats('replay')
+    stats = result['stats']
+    print(f"Total common blocks: {stats['n']}")
+    # Blocks in each bin
+    counts, percentages = np.asarray(result['counts']), np.asarray(result['percentages'])
 
-# Count blocks in each bin
-counts, _ = np.histogram(speedups, bins=bins)
-percentages = (counts / len(speedups)) * 100
+# Print statistics
+print_summary(stats, 'Replay Mode (Deter)')
 
-# Calculate percentiles for annotations
-p50 = np.percentile(speedups, 50)
-p75 = np.percentile(speedups, 75)
-p90 = np.percentile(speedups, 90)
+# Percentiles for annotations
+p50 = stats['p50']
+p75 = stats['p75']
+p90 = stats['p90']
 
+checkpoint('draw')
 # Create figure
 fig, ax = plt.subplots(figsize=(10, 5.5), facecolor='white')
 ax.set_facecolor('white')
@@ -1,6 +1,14 @@
+import argparse
+import os
+import sys
+
 import matplotlib.pyplot as plt
 import numpy as np
-import os
+
+script_dir = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(script_dir))
+from analysis.phases import checkpoint
+from analysis.stats import cached_stats
 
 # Set publication-quality parameters for double-column paper
 plt.rcParams['font.family'] = 'serif'
@@ -17,14 +25,20 @@ plt.rcParams['axes.linewidth'] = 0.8
 plt.rcParams['xtick.major.width'] = 0.6
 plt.rcParams['ytick.major.width'] = 0.6
 
-# Data from replay.xlsx
-block_counts = [1000, 2000, 3000, 4000, 5000]
-block_sizes_mb = [227.93, 421.85, 626.38, 812.41, 1015.72]
-helios_artifacts_mb = [119, 188, 301, 362, 426]
+parser = argparse.ArgumentParser()
+parser.add_argument('--manifest', metavar='PATH',
+                    help='artifact manifest to account per block instead of replay.xlsx')
+args = parser.parse_args()
+checkpoint('compute')
 
-# Calculate overhead percentages
-overhead_percentages = [(h/b)*100 for h, b in zip(helios_artifacts_mb, block_sizes_mb)]
+# Block data vs. artifact size and overhead percentages
+stats = cached_stats('storage-growth', manifest=args.manifest)
+block_counts = stats['block_counts']
+block_sizes_mb = stats['block_data_mb']
+helios_artifacts_mb = stats['artifacts_mb']
+overhead_percentages = stats['overhead_pct']
 
+checkpoint('draw')
 # Create figure sized for double-column paper
 fig, ax = plt.subplots(figsize=(3.5, 2.4))
 
@@ -32,11 +46,18 @@ fig, ax = plt.subplots(figsize=(3.5, 2.4))
 color_block = '#2c3e50'     # Dark blue-gray
 color_helios = '#e67e22'    # Orange (distinct in grayscale)
 
-# Plot both lines with refined styling
-line1 = ax.plot(block_counts, block_sizes_mb, 'o-', linewidth=1.5, markersize=5,
+# Plot both lines with refined styling (per-block curves when accounted from a manifest)
+if 'curve' in stats:
+    curve = stats['curve']
+    ax.plot(curve['blocks'], curve['block_data_mb'], '-', linewidth=1.2, color=color_block)
+    ax.plot(curve['blocks'], curve['artifacts_mb'], '--', linewidth=1.2, color=color_helios)
+    block_style, artifact_style = 'o', 's'
+else:
+    block_style, artifact_style = 'o-', 's--'
+line1 = ax.plot(block_counts, block_sizes_mb, block_style, linewidth=1.5, markersize=5,
                 color=color_block, label='Block Data', markerfacecolor='white',
                 markeredgewidth=1.2, markeredgecolor=color_block)
-line2 = ax.plot(block_counts, helios_artifacts_mb, 's--', linewidth=1.5, markersize=5,
+line2 = ax.plot(block_counts, helios_artifacts_mb, artifact_style, linewidth=1.5, markersize=5,
                 color=color_helios, label='Helios Artifacts', markerfacecolor='white',
                 markeredgewidth=1.2, markeredgecolor=color_helios)
 
@@ -60,7 +81,7 @@ ax.set_ylabel('Storage Size (MB)', fontweight='bold')
 
 # Set x-axis ticks
 ax.set_xticks(block_counts)
-ax.set_xticklabels([f'{x//1000}K' for x in block_counts])
+ax.set_xticklabels([f'{x / 1000:g}K' if x >= 1000 else str(x) for x in block_counts])
 
 # Set y-axis
 ax.set_ylim(0, max(block_sizes_mb) * 1.12)
@@ -83,7 +104,6 @@ ax.spines['right'].set_visible(False)
 plt.tight_layout(pad=0.3)
 
 # Save figure with high quality settings
-script_dir = os.path.dirname(os.path.abspath(__file__))
 plt.savefig(os.path.join(script_dir, 'storage_growth.pdf'), dpi=600,
             bbox_inches='tight', pad_inches=0.02)
 plt.savefig(os.path.join(script_dir, 'storage_growth.png'), dpi=600,
@@ -94,6 +114,6 @@ print("\n=== Storage Growth Statistics ===")
 for i, (blocks, block_size, artifact_size, pct) in enumerate(zip(
         block_counts, block_sizes_mb, helios_artifacts_mb, overhead_percentages)):
     print(f"{blocks:5d} blocks: Block Data = {block_size:7.2f} MB, "
-          f"Artifacts = {artifact_size:3d} MB ({pct:4.1f}%)")
+          f"Artifacts = {artifact_size:3.0f} MB ({pct:4.1f}%)")
 
 plt.close()
@@ -0,0 +1,14 @@
+import os
+import sys
+
+script_dir = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(script_dir))
+from analysis.microbench import cached_microbench, write_tables
+from analysis.phases import checkpoint
+
+checkpoint('compute')
+# Raw benchmark results given on the command line override micro_benchmark.xlsx
+bench = cached_microbench(sys.argv[1:])
+checkpoint('write')
+for path in write_tables(bench, script_dir):
+    print(f"Wrote {os.path.basename(path)}")
@@ -0,0 +1,31 @@
+import argparse
+import os
+import sys
+
+script_dir = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(script_dir))
+from analysis.overhead import load_category_map, render_table
+from analysis.phases import checkpoint
+from analysis.stats import cached_stats
+
+parser = argparse.ArgumentParser()
+parser.add_argument('--samples', nargs='+', action='append', metavar=('LABEL', 'PATH'),
+                    help='system label and profile files; repeat per system')
+parser.add_argument('--map', help='JSON opcode -> category map (see analysis.overhead)')
+parser.add_argument('--iterations', type=float, help='workload iterations per profiled run')
+parser.add_argument('--ghz', type=float, default=1.0, help='clock rate for cycle counts')
+args = parser.parse_args()
+checkpoint('compute')
+
+if args.samples:
+    stats = cached_stats('overhead-breakdown',
+                         profiles={group[0]: group[1:] for group in args.samples},
+                         category_map=load_category_map(args.map) if args.map else None,
+                         iterations=args.iterations, ghz=args.ghz)
+else:
+    stats = cached_stats('overhead-breakdown')
+checkpoint('write')
+path = os.path.join(script_dir, 'overhead-breakdown.tex')
+with open(path, 'w', encoding='utf-8') as f:
+    f.write(render_table(stats))
+print(f"Wrote {os.path.basename(path)}")